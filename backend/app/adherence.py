@@ -0,0 +1,196 @@
+"""
+Medication adherence as monthly bitsets: Adherence/{user_id}/Months/{YYYY-MM}.
+
+    month  "2026-10"
+    meds   {medication_id: {
+               "name":   "Metformin",
+               "logged": int,        bit d-1 set if a compliance entry exists for day d
+               "taken":  int,        bit d-1 set if it was marked taken on day d
+               "times":  [31 x ""|"HH:mm"]   time taken per day
+           }}
+
+A year of adherence for any number of medications is 12 small documents, and
+rates and streaks come from bit counts instead of re-reading one
+MedicationCompliance document per day. POST /compliance rewrites the saved
+day's bits in a one-document transaction. Existing compliance documents are
+folded in by build_months() (lazily per user, or for everyone with
+python -m backend.app.backfill_adherence).
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from google.cloud import firestore
+
+DAYS_IN_SLOT = 31
+
+
+def adherence_ref(db, user_id: str):
+    return db.collection("Adherence").document(user_id)
+
+
+def adherence_months_ref(db, user_id: str):
+    return adherence_ref(db, user_id).collection("Months")
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+def empty_month(month: str) -> Dict:
+    return {"month": month, "meds": {}}
+
+
+def apply_day(month_doc: Dict, day: int, entries: List[Dict]) -> Dict:
+    """Replace one day's bits with the given compliance entries (a saved day overwrites the previous one)."""
+    bit = 1 << (day - 1)
+    meds = month_doc.setdefault("meds", {})
+    for med in meds.values():
+        med["logged"] = med.get("logged", 0) & ~bit
+        med["taken"] = med.get("taken", 0) & ~bit
+        if med.get("times"):
+            med["times"][day - 1] = ""
+    for entry in entries:
+        med_id = entry.get("medication_id")
+        if not med_id:
+            continue
+        med = meds.setdefault(med_id, {"name": None, "logged": 0, "taken": 0, "times": [""] * DAYS_IN_SLOT})
+        if entry.get("medication_name"):
+            med["name"] = entry["medication_name"]
+        med["logged"] |= bit
+        if entry.get("taken"):
+            med["taken"] |= bit
+            times = med.setdefault("times", [""] * DAYS_IN_SLOT)
+            times[day - 1] = entry.get("time_taken") or ""
+    return month_doc
+
+
+@firestore.transactional
+def _record(transaction, ref, month: str, day: int, entries: List[Dict]) -> None:
+    snap = ref.get(transaction=transaction)
+    month_doc = (snap.to_dict() or {}) if snap.exists else empty_month(month)
+    apply_day(month_doc, day, entries)
+    month_doc["updatedAt"] = firestore.SERVER_TIMESTAMP
+    transaction.set(ref, month_doc)
+
+
+def record_compliance(db, user_id: str, day_str: str, entries: List[Dict]) -> None:
+    try:
+        day = date.fromisoformat(day_str)
+    except (TypeError, ValueError):
+        return
+    month = day_str[:7]
+    try:
+        _record(db.transaction(), adherence_months_ref(db, user_id).document(month), month, day.day, entries)
+    except Exception as e:
+        print(f"Warning: failed to update Adherence for {user_id}: {e}")
+
+
+def build_months(compliance_docs: Iterable[Dict]) -> Dict[str, Dict]:
+    """Month documents from MedicationCompliance documents ({date, entries})."""
+    months: Dict[str, Dict] = {}
+    for doc in sorted(compliance_docs, key=lambda d: str(d.get("date") or "")):
+        try:
+            day = date.fromisoformat(str(doc.get("date") or ""))
+        except ValueError:
+            continue
+        month = day.isoformat()[:7]
+        apply_day(months.setdefault(month, empty_month(month)), day.day, doc.get("entries") or [])
+    return months
+
+
+def _month_window(month: str, start: date, end: date) -> int:
+    """Bitmask of the days of `month` that fall inside [start, end]."""
+    first = date.fromisoformat(month + "-01")
+    lo = max(start, first)
+    next_month = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    hi = min(end, next_month - timedelta(days=1))
+    if lo > hi:
+        return 0
+    return ((1 << (hi.day - lo.day + 1)) - 1) << (lo.day - 1)
+
+
+def _runs(days: List[bool]):
+    """(current run ending at the last element, longest run) of True values."""
+    longest = current = 0
+    for ok in days:
+        current = current + 1 if ok else 0
+        longest = max(longest, current)
+    return current, longest
+
+
+def summarize(month_docs: List[Dict], start: date, end: date, today: Optional[date] = None) -> Dict:
+    """Adherence rates, streaks and a per-day heatmap for [start, end]."""
+    by_month = {m.get("month"): m for m in month_docs}
+    n_days = (end - start).days + 1
+    dates = [start + timedelta(days=i) for i in range(n_days)]
+
+    meds: Dict[str, Dict] = {}
+    per_day_logged = [0] * n_days
+    per_day_taken = [0] * n_days
+    for month, m in sorted(by_month.items()):
+        window = _month_window(month, start, end)
+        if not window:
+            continue
+        first = date.fromisoformat(month + "-01")
+        for med_id, med in (m.get("meds") or {}).items():
+            stats = meds.setdefault(med_id, {"name": med.get("name"), "logged": 0, "taken": 0, "days": {}})
+            stats["name"] = med.get("name") or stats["name"]
+            logged = med.get("logged", 0) & window
+            taken = med.get("taken", 0) & window
+            stats["logged"] += _popcount(logged)
+            stats["taken"] += _popcount(taken)
+            # Only walk the set bits: cost scales with logged days, not calendar days
+            bits = logged
+            while bits:
+                low = bits & -bits
+                d = low.bit_length()
+                i = (first.replace(day=d) - start).days
+                per_day_logged[i] += 1
+                ok = bool(taken & low)
+                per_day_taken[i] += ok
+                stats["days"][i] = ok
+                bits ^= low
+
+    # Streaks count calendar days taken; today may still be unlogged without breaking them.
+    cutoff = n_days
+    if today is not None and dates and dates[-1] == today and not per_day_logged[-1]:
+        cutoff -= 1
+
+    medications = []
+    for med_id, stats in meds.items():
+        current, longest = _runs([stats["days"].get(i, False) for i in range(cutoff)])
+        medications.append({
+            "medication_id": med_id,
+            "medication_name": stats["name"],
+            "days_logged": stats["logged"],
+            "days_taken": stats["taken"],
+            "rate": round(stats["taken"] / stats["logged"], 3) if stats["logged"] else None,
+            "current_streak": current,
+            "longest_streak": longest,
+        })
+    medications.sort(key=lambda m: (m["medication_name"] or "", m["medication_id"]))
+
+    all_taken = [per_day_logged[i] > 0 and per_day_taken[i] == per_day_logged[i] for i in range(cutoff)]
+    current, longest = _runs(all_taken)
+    total_logged = sum(per_day_logged)
+    total_taken = sum(per_day_taken)
+
+    return {
+        "from_date": start.isoformat(),
+        "to_date": end.isoformat(),
+        "rate": round(total_taken / total_logged, 3) if total_logged else None,
+        "doses_logged": total_logged,
+        "doses_taken": total_taken,
+        "current_streak": current,
+        "longest_streak": longest,
+        "medications": medications,
+        "heatmap": [
+            {
+                "date": dates[i].isoformat(),
+                "taken": per_day_taken[i],
+                "total": per_day_logged[i],
+                "rate": round(per_day_taken[i] / per_day_logged[i], 3) if per_day_logged[i] else None,
+            }
+            for i in range(n_days)
+        ],
+    }
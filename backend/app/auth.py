@@ -0,0 +1,85 @@
+"""
+Signed session tokens.
+
+/login and /signup hand out a token of the form
+
+    base64url(json {"sub": user_id, "exp": unix_seconds}) "." base64url(hmac_sha256)
+
+Routes verify it locally with the shared secret, so knowing who is calling
+costs no Firestore read. Set BENJI_SESSION_SECRET in .env; without it a random
+per-process secret is used and every token dies with the server.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from typing import Optional
+
+SESSION_TTL_SECONDS = 7 * 24 * 3600
+
+_secret: Optional[bytes] = None
+
+
+def _session_secret() -> bytes:
+    global _secret
+    if _secret is None:
+        configured = os.getenv("BENJI_SESSION_SECRET")
+        if configured:
+            _secret = configured.encode("utf-8")
+        else:
+            print("Warning: BENJI_SESSION_SECRET not set; session tokens will not survive a restart")
+            _secret = secrets.token_bytes(32)
+    return _secret
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_session_secret(), payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_session_token(user_id: str, ttl_seconds: Optional[int] = None) -> str:
+    ttl = ttl_seconds or int(os.getenv("BENJI_SESSION_TTL", SESSION_TTL_SECONDS))
+    body = json.dumps({"sub": user_id, "exp": int(time.time()) + ttl}, separators=(",", ":"))
+    payload = _b64encode(body.encode("utf-8"))
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_session_token(token: str) -> Optional[str]:
+    """Return the token's user_id, or None if it is malformed, forged or expired."""
+    try:
+        payload, signature = (token or "").split(".", 1)
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(claims, dict) or int(claims.get("exp", 0)) < time.time():
+        return None
+    return claims.get("sub") or None
+
+
+def verify_admin_token(token: Optional[str]) -> bool:
+    """True if `token` matches BENJI_ADMIN_TOKEN; operational routes are closed when it is unset."""
+    configured = os.getenv("BENJI_ADMIN_TOKEN")
+    if not configured or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), configured.encode("utf-8"))
+
+
+def tokenless_allowed() -> bool:
+    """
+    Temporary rollout switch: with BENJI_ALLOW_TOKENLESS=1, callers that send
+    no session token are still accepted for existing users. Off by default;
+    remove once every client sends its token.
+    """
+    return os.getenv("BENJI_ALLOW_TOKENLESS", "").strip().lower() in ("1", "true", "yes")
@@ -0,0 +1,29 @@
+"""
+One-off backfill: fold every MedicationCompliance document into the
+Adherence/{user_id}/Months bitsets used by /adherence.
+
+Run from the repo root:  python -m backend.app.backfill_adherence
+Safe to re-run; users whose adherence store is already complete are skipped.
+"""
+from backend.app.adherence import adherence_ref
+from backend.app.main import db, load_adherence_months
+
+
+def main():
+    user_ids = set()
+    for doc in db.collection("MedicationCompliance").select(["user_id"]).stream():
+        user_id = (doc.to_dict() or {}).get("user_id")
+        if user_id:
+            user_ids.add(user_id)
+
+    built = 0
+    for user_id in sorted(user_ids):
+        if (adherence_ref(db, user_id).get().to_dict() or {}).get("complete"):
+            continue
+        load_adherence_months(user_id, "0000-00", "9999-99")
+        built += 1
+    print(f"Found {len(user_ids)} users with compliance logs; built adherence for {built}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+One-off backfill: build CheckInSeries/{user_id}/Months for every user with
+check-ins, so /insights and the trend seeding never fall back to CheckIns.
+
+Run from the repo root:  python -m backend.app.backfill_checkin_series
+Safe to re-run; users whose series is already complete are skipped.
+"""
+from backend.app.main import db, load_checkin_series, series_ref
+
+
+def main():
+    user_ids = set()
+    for doc in db.collection("CheckIns").select(["UserID"]).stream():
+        user_id = (doc.to_dict() or {}).get("UserID")
+        if user_id:
+            user_ids.add(user_id)
+
+    built = 0
+    for user_id in sorted(user_ids):
+        if (series_ref(db, user_id).get().to_dict() or {}).get("complete"):
+            continue
+        load_checkin_series(user_id)
+        built += 1
+    print(f"Found {len(user_ids)} users with check-ins; built series for {built}.")
+
+
+if __name__ == "__main__":
+    main()
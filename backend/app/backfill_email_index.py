@@ -0,0 +1,34 @@
+"""
+One-off backfill: create an EmailIndex/{normalized_email} entry for every
+existing User so signup uniqueness holds for accounts created before the index.
+
+Run from the repo root:  python -m backend.app.backfill_email_index
+Safe to re-run; existing index entries are left alone.
+"""
+from backend.app.batching import BatchWriter
+from backend.app.main import db, email_index_ref
+
+
+def main():
+    writer = BatchWriter(db)
+    seen = set()
+    duplicates = []
+    for doc in db.collection("User").stream():
+        user = doc.to_dict() or {}
+        ref = email_index_ref(user.get("email", ""))
+        if not ref.id:
+            continue
+        if ref.id in seen:
+            duplicates.append((ref.id, doc.id))
+            continue
+        seen.add(ref.id)
+        if not ref.get().exists:
+            writer.set(ref, {"user_id": doc.id, "password": user.get("password")})
+    written = writer.commit()
+    print(f"Indexed {written} users ({len(seen)} distinct emails).")
+    for email, user_id in duplicates:
+        print(f"Duplicate email {email} on user {user_id}; not indexed.")
+
+
+if __name__ == "__main__":
+    main()
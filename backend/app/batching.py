@@ -0,0 +1,91 @@
+"""
+Write batching for Firestore.
+
+Collects set/update/delete operations and commits them in WriteBatch chunks
+of up to 500 operations (Firestore's per-batch limit). Chunks are committed
+in parallel, so N writes cost ceil(N / 500) round trips instead of N.
+
+    with BatchWriter(db) as writer:
+        for goal in goals:
+            writer.set(db.collection("Goals").document(), goal)
+
+Note: each chunk is atomic on its own; a multi-chunk write is not. When one
+chunk fails, others may already be committed, so a write that must only happen
+after all of them (e.g. deleting the source of a copy) belongs after commit()
+returns, not in the same BatchWriter.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+MAX_BATCH_OPS = 500
+
+
+class BatchWriter:
+    def __init__(self, db, max_ops: int = MAX_BATCH_OPS, max_workers: int = 4):
+        self.db = db
+        self.max_ops = min(max_ops, MAX_BATCH_OPS)
+        self.max_workers = max_workers
+        self._ops: List[Tuple[str, Any, Any, Dict]] = []
+
+    def __len__(self):
+        return len(self._ops)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+    def set(self, ref, data: Dict, merge: bool = False) -> None:
+        self._ops.append(("set", ref, data, {"merge": merge}))
+
+    def update(self, ref, data: Dict) -> None:
+        self._ops.append(("update", ref, data, {}))
+
+    def delete(self, ref) -> None:
+        self._ops.append(("delete", ref, None, {}))
+
+    def _commit_chunk(self, chunk) -> None:
+        batch = self.db.batch()
+        for op, ref, data, kwargs in chunk:
+            if op == "set":
+                batch.set(ref, data, **kwargs)
+            elif op == "update":
+                batch.update(ref, data)
+            else:
+                batch.delete(ref)
+        batch.commit()
+
+    def commit(self) -> int:
+        """
+        Commit all queued operations; returns how many were written.
+        Not atomic across chunks: if this raises, some chunks may have landed.
+        """
+        ops, self._ops = self._ops, []
+        if not ops:
+            return 0
+        chunks = [ops[i:i + self.max_ops] for i in range(0, len(ops), self.max_ops)]
+        if len(chunks) == 1:
+            self._commit_chunk(chunks[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                # list() re-raises the first failed chunk's exception
+                list(pool.map(self._commit_chunk, chunks))
+        return len(ops)
+
+
+def delete_query(db, query, page_size: int = MAX_BATCH_OPS) -> int:
+    """Delete every document matched by `query`, one batch per page. Returns the count."""
+    deleted = 0
+    while True:
+        docs = list(query.limit(page_size).stream())
+        if not docs:
+            return deleted
+        writer = BatchWriter(db)
+        for doc in docs:
+            writer.delete(doc.reference)
+        deleted += writer.commit()
+        if len(docs) < page_size:
+            return deleted
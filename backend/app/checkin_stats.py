@@ -0,0 +1,148 @@
+"""
+Rolling check-in aggregates: CheckInStats/{user_id}.
+
+Each POST /checkins adds the check-in's metrics to one per-day bucket and
+advances the streak counters inside a single-document transaction, so the
+write cost does not grow with history. Buckets older than MAX_WINDOW_DAYS
+are dropped as they age out, which keeps the document small.
+
+rolling_aggregates() turns the buckets into 7/30/90-day sums, counts and
+averages for the trend tools, so they no longer depend on however many raw
+check-ins a route happened to load.
+
+Users who predate CheckInStats are seeded with rebuild_stats() the first
+time either path (record_checkin on a new check-in, or seed_stats on a
+read) finds no stats document, inside the same transaction, so earlier
+history is never left out.
+"""
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from google.cloud import firestore
+
+from backend.app.metrics import METRICS, checkin_day, checkin_values
+
+WINDOWS = (7, 30, 90)
+MAX_WINDOW_DAYS = max(WINDOWS)
+
+
+def stats_ref(db, user_id: str):
+    return db.collection("CheckInStats").document(user_id)
+
+
+def apply_checkin(stats: Dict, day: str, metrics: Dict[str, float]) -> Dict:
+    """Fold one check-in into a stats dict (pure; returns the updated dict)."""
+    days = stats.setdefault("days", {})
+    bucket = days.setdefault(day, {"checkins": 0})
+    bucket["checkins"] += 1
+    for metric, value in metrics.items():
+        bucket[f"{metric}_sum"] = bucket.get(f"{metric}_sum", 0.0) + value
+        bucket[f"{metric}_n"] = bucket.get(f"{metric}_n", 0) + 1
+
+    stats["total_checkins"] = stats.get("total_checkins", 0) + 1
+    last = stats.get("last_date")
+    if last is None or day > last:
+        if last is not None and date.fromisoformat(day) - date.fromisoformat(last) == timedelta(days=1):
+            stats["current_streak"] = stats.get("current_streak", 0) + 1
+        else:
+            stats["current_streak"] = 1
+        stats["last_date"] = day
+    # Backdated check-ins (day <= last) count toward the buckets but not the streak.
+    stats["longest_streak"] = max(stats.get("longest_streak", 0), stats.get("current_streak", 0))
+
+    cutoff = (date.fromisoformat(stats["last_date"]) - timedelta(days=MAX_WINDOW_DAYS)).isoformat()
+    for old in [d for d in days if d <= cutoff]:
+        del days[old]
+    return stats
+
+
+def _once(seed: Optional[Callable[[], Iterable[Dict]]]) -> Callable[[], list]:
+    """Memoize the history read, so a retried transaction doesn't repeat it."""
+    rows: list = []
+
+    def load() -> list:
+        if seed is not None and not rows:
+            rows.append(list(seed()))
+        return rows[0] if rows else []
+    return load
+
+
+@firestore.transactional
+def _record(transaction, ref, day: Optional[str], metrics: Dict[str, float], seed: Callable[[], list]) -> Dict:
+    snap = ref.get(transaction=transaction)
+    if snap.exists:
+        stats = snap.to_dict() or {}
+        if day is None:
+            return stats
+    else:
+        stats = rebuild_stats(seed())
+    if day is not None:
+        stats = apply_checkin(stats, day, metrics)
+    stats["updatedAt"] = firestore.SERVER_TIMESTAMP
+    transaction.set(ref, stats)
+    return stats
+
+
+def record_checkin(db, user_id: str, checkin: Dict, seed: Optional[Callable[[], Iterable[Dict]]] = None) -> None:
+    """
+    Fold a new check-in into the user's stats. `seed` returns the user's earlier
+    check-ins (not including this one); it is only called when no stats
+    document exists yet.
+    """
+    day = checkin_day(checkin)
+    if day is None:
+        return
+    try:
+        _record(db.transaction(), stats_ref(db, user_id), day, checkin_values(checkin), _once(seed))
+    except Exception as e:
+        print(f"Warning: failed to update CheckInStats for {user_id}: {e}")
+
+
+def seed_stats(db, user_id: str, seed: Callable[[], Iterable[Dict]]) -> Dict:
+    """The user's stats, building and storing them from `seed()` if no document exists yet."""
+    return _record(db.transaction(), stats_ref(db, user_id), None, {}, _once(seed))
+
+
+def rebuild_stats(checkins) -> Dict:
+    """Stats dict from raw check-ins (any order); used to seed users who predate CheckInStats."""
+    stats: Dict = {}
+    dated = [(checkin_day(c), c) for c in checkins]
+    for day, c in sorted((x for x in dated if x[0]), key=lambda x: x[0]):
+        apply_checkin(stats, day, checkin_values(c))
+    return stats
+
+
+def rolling_aggregates(stats: Dict, today: Optional[date] = None) -> Dict:
+    """7/30/90-day sums, counts and averages plus streaks from a stats dict."""
+    today = today or datetime.utcnow().date()
+    last = stats.get("last_date")
+    if last and date.fromisoformat(last) > today:
+        # Client-local dates can run ahead of UTC.
+        today = date.fromisoformat(last)
+
+    windows = {}
+    days = stats.get("days") or {}
+    for n in WINDOWS:
+        start = (today - timedelta(days=n - 1)).isoformat()
+        in_window = [b for d, b in days.items() if d >= start]
+        window = {"days_logged": len(in_window), "checkins": sum(b.get("checkins", 0) for b in in_window)}
+        for metric in METRICS:
+            total = sum(b.get(f"{metric}_sum", 0.0) for b in in_window)
+            count = sum(b.get(f"{metric}_n", 0) for b in in_window)
+            window[metric] = {
+                "sum": round(total, 2),
+                "count": count,
+                "avg": round(total / count, 2) if count else None,
+            }
+        windows[f"{n}d"] = window
+
+    current = stats.get("current_streak", 0)
+    if not last or (today - date.fromisoformat(last)).days > 1:
+        current = 0  # streak broken: no check-in today or yesterday
+    return {
+        "windows": windows,
+        "current_streak": current,
+        "longest_streak": stats.get("longest_streak", 0),
+        "last_checkin_date": last,
+        "total_checkins": stats.get("total_checkins", 0),
+    }
@@ -0,0 +1,113 @@
+"""
+Read-through cache for small per-user Firestore documents.
+
+ProfileInfo, Medications, MenstrualFlowLog and the legacy Goals/{user_id}
+document are read on nearly every dashboard request but change rarely.
+DocumentCache keeps their contents in memory (bounded LRU + TTL), keyed by
+(collection, doc_id). Missing documents are cached too, so a user without a
+flow log does not cost a read per request either.
+
+Routes that write one of these documents must call invalidate() afterwards.
+invalidate() bumps a per-key generation, and a read that started before the
+bump does not store its (possibly pre-write) result. Generations are only
+kept while a read of that key is in flight, so they never outgrow the
+number of concurrent misses.
+The cache is per process: with several workers another process can serve a
+stale copy until the TTL runs out.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+_MISSING = object()
+
+
+class DocumentCache:
+    def __init__(self, db, max_entries: int = 2048, ttl_seconds: int = 5 * 60):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate()/clear(); a fill only lands if its key's generation is unchanged.
+        # Both maps only hold keys with a read in flight (_readers counts them).
+        self._generations: Dict[Tuple[str, str], int] = {}
+        self._readers: Dict[Tuple[str, str], int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        """Document data as a dict, or None if the document does not exist."""
+        key = (collection, doc_id)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                data = entry[1]
+                # Callers may mutate what they get back; hand out copies.
+                return None if data is _MISSING else copy.deepcopy(data)
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(key, 0))
+            self._readers[key] = self._readers.get(key, 0) + 1
+
+        data = _MISSING
+        fetched = False
+        try:
+            snap = self.db.collection(collection).document(doc_id).get()
+            data = (snap.to_dict() or {}) if snap.exists else _MISSING
+            fetched = True
+        finally:
+            with self._lock:
+                # A write invalidated the key while we were reading: don't cache what may predate it
+                if fetched and generation == (self._epoch, self._generations.get(key, 0)):
+                    self._entries[key] = (now, data)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                self._release(key)
+        return None if data is _MISSING else copy.deepcopy(data)
+
+    def _release(self, key: Tuple[str, str]) -> None:
+        """End one in-flight read of key; the last one out drops its generation. Caller holds the lock."""
+        remaining = self._readers.get(key, 0) - 1
+        if remaining > 0:
+            self._readers[key] = remaining
+        else:
+            self._readers.pop(key, None)
+            self._generations.pop(key, None)
+
+    def invalidate(self, collection: str, doc_id: str) -> None:
+        key = (collection, doc_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            # Only a read already in flight can store a pre-write copy
+            if key in self._readers:
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            per_collection: Dict[str, int] = {}
+            for collection, _ in self._entries:
+                per_collection[collection] = per_collection.get(collection, 0) + 1
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+                "collections": per_collection,
+            }
@@ -0,0 +1,137 @@
+"""
+Month-sharded menstrual flow log: MenstrualFlowLog/{user_id}/Months/{YYYY-MM}.
+
+    MenstrualFlowLog/{user_id}          UserID, sharded, loggedDays, lastLoggedDate, updatedAt
+    MenstrualFlowLog/{user_id}/Months/{YYYY-MM}
+        month    "2026-10"
+        entries  {"2026-10-03": {flow, symptoms, crampPain, discharge}, ...}
+
+PATCH /menstrual/{user_id}/{date} rewrites one day through a field-path write
+(entries.`2026-10-03`) instead of re-uploading the whole history, and no
+single document grows past a month of entries. The parent's updatedAt is the
+log version used to cache cycle results.
+
+Older users have every entry in the parent document's `entries` map; the
+first read or write after deploy moves them into month documents
+(ensure_sharded).
+"""
+from typing import Dict, Optional
+
+from google.cloud import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from backend.app.batching import BatchWriter
+
+
+def flow_log_ref(db, user_id: str):
+    return db.collection("MenstrualFlowLog").document(user_id)
+
+
+def flow_months_ref(db, user_id: str):
+    return flow_log_ref(db, user_id).collection("Months")
+
+
+def split_months(entries: Dict) -> Dict[str, Dict]:
+    """Month documents from a {date: entry} map."""
+    months: Dict[str, Dict] = {}
+    for day, entry in (entries or {}).items():
+        month = day[:7]
+        months.setdefault(month, {"month": month, "entries": {}})["entries"][day] = entry
+    return months
+
+
+def log_summary(entries: Dict) -> Dict:
+    logged = sorted(d for d, e in (entries or {}).items() if e)
+    return {"loggedDays": len(logged), "lastLoggedDate": logged[-1] if logged else None}
+
+
+def _write_months(db, user_id: str, entries: Dict, stamp: str, existing_months=()) -> None:
+    months = split_months(entries)
+    with BatchWriter(db) as writer:
+        for month, doc in months.items():
+            writer.set(flow_months_ref(db, user_id).document(month), doc)
+        for month in existing_months:
+            if month not in months:
+                writer.delete(flow_months_ref(db, user_id).document(month))
+        writer.set(flow_log_ref(db, user_id), {
+            "UserID": user_id,
+            "sharded": True,
+            "entries": firestore.DELETE_FIELD,
+            **log_summary(entries),
+            "updatedAt": stamp,
+        }, merge=True)
+
+
+def ensure_sharded(db, user_id: str, parent: Optional[Dict]) -> bool:
+    """Move a legacy single-document log into month documents. True if it wrote anything."""
+    if parent is None or parent.get("sharded"):
+        return False
+    _write_months(db, user_id, parent.get("entries") or {}, parent.get("updatedAt") or "")
+    return True
+
+
+def replace_log(db, user_id: str, entries: Dict, stamp: str) -> None:
+    """Full replace (PUT): rewrite every month present and drop months no longer present."""
+    existing = [doc.id for doc in flow_months_ref(db, user_id).select([]).stream()]
+    _write_months(db, user_id, entries, stamp, existing)
+
+
+@firestore.transactional
+def _patch(transaction, parent_ref, month_ref, day: str, entry: Optional[Dict], stamp: str) -> Dict:
+    parent_snap = parent_ref.get(transaction=transaction)
+    month_snap = month_ref.get(transaction=transaction)
+    parent = (parent_snap.to_dict() or {}) if parent_snap.exists else {}
+    month_entries = ((month_snap.to_dict() or {}).get("entries") or {}) if month_snap.exists else {}
+
+    had = bool(month_entries.get(day))
+    field = FieldPath("entries", day).to_api_repr()
+    if entry:
+        transaction.set(month_ref, {"month": day[:7], "entries": {day: entry}}, merge=["month", field])
+    elif month_snap.exists and day in month_entries:
+        transaction.update(month_ref, {field: firestore.DELETE_FIELD})
+
+    logged = max(0, int(parent.get("loggedDays") or 0) + bool(entry) - had)
+    last = parent.get("lastLoggedDate")
+    if entry and (not last or day > last):
+        last = day
+    elif not entry and had and day == last:
+        remaining = sorted(d for d, e in month_entries.items() if e and d != day)
+        # None means "look further back" (see patch_day)
+        last = remaining[-1] if remaining else None
+    summary = {"loggedDays": logged, "lastLoggedDate": last}
+    transaction.set(parent_ref, {"UserID": parent_ref.id, "sharded": True, **summary, "updatedAt": stamp}, merge=True)
+    return summary
+
+
+def patch_day(db, user_id: str, day: str, entry: Optional[Dict], stamp: str) -> Dict:
+    """Set (or with an empty entry, clear) one day. Returns the updated log summary."""
+    summary = _patch(
+        db.transaction(), flow_log_ref(db, user_id), flow_months_ref(db, user_id).document(day[:7]), day, entry, stamp
+    )
+    if summary["lastLoggedDate"] is None and summary["loggedDays"]:
+        earlier = (
+            flow_months_ref(db, user_id)
+            .where("month", "<", day[:7])
+            .order_by("month", direction=firestore.Query.DESCENDING)
+            .limit(1)
+            .stream()
+        )
+        for doc in earlier:
+            summary = {**summary, "lastLoggedDate": log_summary((doc.to_dict() or {}).get("entries"))["lastLoggedDate"]}
+        flow_log_ref(db, user_id).set({"lastLoggedDate": summary["lastLoggedDate"]}, merge=True)
+    return summary
+
+
+def read_entries(db, user_id: str, from_date: Optional[str] = None, to_date: Optional[str] = None) -> Dict:
+    """Entries in [from_date, to_date] (YYYY-MM-DD, both optional), reading only the months that overlap."""
+    query = flow_months_ref(db, user_id)
+    if from_date:
+        query = query.where("month", ">=", from_date[:7])
+    if to_date:
+        query = query.where("month", "<=", to_date[:7])
+    entries: Dict = {}
+    for doc in query.stream():
+        for day, entry in ((doc.to_dict() or {}).get("entries") or {}).items():
+            if (not from_date or day >= from_date) and (not to_date or day <= to_date):
+                entries[day] = entry
+    return dict(sorted(entries.items()))
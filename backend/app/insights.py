@@ -0,0 +1,237 @@
+"""
+Check-in analytics for /insights/{user_id}.
+
+A user's check-ins are loaded into NumPy column arrays on a dense daily
+grid: one row per calendar day from the first check-in to the last, one
+column per metric, NaN where nothing was logged. Several check-ins on the
+same day are averaged. Everything below then runs as whole-array operations
+(cumulative sums, bincount, masked reductions), so years of daily history
+cost milliseconds rather than a Python loop per check-in.
+
+Input normally comes from the columnar CheckInSeries month documents
+(months_to_columns); to_columns handles raw check-in dicts.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.app.metrics import COLUMNS, SERIES_COLUMNS, checkin_day, first_number
+
+# (x, y, label) pairs reported under "correlations"
+CORRELATION_PAIRS = (
+    ("sleep", "mood", "sleep_vs_mood"),
+    ("drinkScore", "dayScore", "hydration_vs_dayScore"),
+    ("sleep", "dayScore", "sleep_vs_dayScore"),
+    ("stress", "mood", "stress_vs_mood"),
+    ("fitnessScore", "mood", "fitness_vs_mood"),
+)
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MIN_CORRELATION_DAYS = 5
+ANOMALY_BASELINE_DAYS = 30
+ANOMALY_Z = 2.0
+
+
+def to_columns(checkins: Iterable[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """(days as datetime64[D], values float64[n, len(COLUMNS)]) for raw check-ins with a valid date."""
+    days, rows = [], []
+    for c in checkins:
+        day = checkin_day(c)
+        if day is None:
+            continue
+        days.append(np.datetime64(day, "D"))
+        rows.append([first_number(c, SERIES_COLUMNS[key]) for key in COLUMNS.values()])
+    return np.array(days, dtype="datetime64[D]"), np.array(rows, dtype=float).reshape(-1, len(COLUMNS))
+
+
+def months_to_columns(month_docs: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Same as to_columns, straight from CheckInSeries month documents (no per-row parsing)."""
+    days, blocks = [], []
+    for m in month_docs:
+        offsets = np.asarray(m.get("day") or [], dtype=np.int64)
+        if not len(offsets):
+            continue
+        days.append(np.datetime64(m["month"] + "-01", "D") + (offsets - 1).astype("timedelta64[D]"))
+        block = np.full((len(offsets), len(COLUMNS)), np.nan)
+        for j, key in enumerate(COLUMNS.values()):
+            column = m.get(key) or []
+            if len(column) == len(offsets):
+                # None -> NaN on conversion
+                block[:, j] = np.array(column, dtype=float)
+        blocks.append(block)
+    if not days:
+        return np.array([], dtype="datetime64[D]"), np.empty((0, len(COLUMNS)))
+    return np.concatenate(days), np.vstack(blocks)
+
+
+def daily_grid(days: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Dense per-day grid: (grid_days, means[n_days, cols] with NaN gaps, logged[n_days] bool).
+    Same-day check-ins are averaged column by column.
+    """
+    start = days.min()
+    offsets = (days - start).astype(np.int64)
+    n_days = int(offsets.max()) + 1
+    present = ~np.isnan(values)
+
+    sums = np.zeros((n_days, values.shape[1]))
+    counts = np.zeros((n_days, values.shape[1]))
+    np.add.at(sums, offsets, np.where(present, values, 0.0))
+    np.add.at(counts, offsets, present)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+
+    logged = np.zeros(n_days, dtype=bool)
+    logged[offsets] = True
+    grid_days = start + np.arange(n_days).astype("timedelta64[D]")
+    return grid_days, means, logged
+
+
+def trailing_mean(grid: np.ndarray, window: int) -> np.ndarray:
+    """NaN-aware trailing mean over `window` days for every row (cumulative-sum based)."""
+    present = ~np.isnan(grid)
+    csum = np.vstack([np.zeros((1, grid.shape[1])), np.cumsum(np.where(present, grid, 0.0), axis=0)])
+    ccnt = np.vstack([np.zeros((1, grid.shape[1])), np.cumsum(present, axis=0)])
+    lo = np.maximum(np.arange(grid.shape[0]) + 1 - window, 0)
+    hi = np.arange(grid.shape[0]) + 1
+    total = csum[hi] - csum[lo]
+    count = ccnt[hi] - ccnt[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def weekday_profile(grid_days: np.ndarray, grid: np.ndarray) -> Dict[str, Dict[str, Optional[float]]]:
+    # 1970-01-01 was a Thursday, so shift by 3 to make Monday 0.
+    weekday = (grid_days.astype(np.int64) + 3) % 7
+    present = ~np.isnan(grid)
+    out = {}
+    for j, name in enumerate(COLUMNS):
+        sums = np.bincount(weekday, weights=np.where(present[:, j], grid[:, j], 0.0), minlength=7)
+        counts = np.bincount(weekday, weights=present[:, j].astype(float), minlength=7)
+        if not counts.any():
+            continue
+        out[name] = {WEEKDAYS[d]: (round(float(sums[d] / counts[d]), 2) if counts[d] else None) for d in range(7)}
+    return out
+
+
+def correlations(grid: np.ndarray) -> Dict[str, Dict]:
+    index = {name: j for j, name in enumerate(COLUMNS)}
+    out = {}
+    for x_name, y_name, label in CORRELATION_PAIRS:
+        x, y = grid[:, index[x_name]], grid[:, index[y_name]]
+        both = ~np.isnan(x) & ~np.isnan(y)
+        n = int(both.sum())
+        r = None
+        if n >= MIN_CORRELATION_DAYS:
+            xs, ys = x[both], y[both]
+            if xs.std() > 0 and ys.std() > 0:
+                r = round(float(np.corrcoef(xs, ys)[0, 1]), 3)
+        out[label] = {"r": r, "days": n}
+    return out
+
+
+def streaks(logged: np.ndarray, grid_days: np.ndarray, today: np.datetime64) -> Dict:
+    # Run lengths of consecutive logged days, from the edges of the boolean mask
+    padded = np.concatenate([[False], logged, [False]]).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    runs = edges[1::2] - edges[0::2]
+    current = int(runs[-1]) if len(runs) else 0
+    if (today - grid_days[-1]).astype(int) > 1:
+        current = 0  # nothing logged today or yesterday
+    return {
+        "current": current,
+        "longest": int(runs.max()) if len(runs) else 0,
+        "days_logged": int(logged.sum()),
+        "days_spanned": int(len(logged)),
+    }
+
+
+def anomalies(grid_days: np.ndarray, grid: np.ndarray, recent_days: int) -> List[Dict]:
+    """
+    Days in the last `recent_days` whose value is >= ANOMALY_Z standard deviations
+    from the user's own previous ANOMALY_BASELINE_DAYS days.
+    """
+    present = ~np.isnan(grid)
+    x = np.where(present, grid, 0.0)
+    zero = np.zeros((1, grid.shape[1]))
+    c1 = np.vstack([zero, np.cumsum(x, axis=0)])
+    c2 = np.vstack([zero, np.cumsum(x * x, axis=0)])
+    cn = np.vstack([zero, np.cumsum(present, axis=0)])
+
+    rows = np.arange(grid.shape[0])
+    lo = np.maximum(rows - ANOMALY_BASELINE_DAYS, 0)
+    n = cn[rows] - cn[lo]          # baseline excludes the day itself
+    s1 = c1[rows] - c1[lo]
+    s2 = c2[rows] - c2[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s1 / n
+        std = np.sqrt(np.maximum(s2 / n - mean * mean, 0.0))
+        z = (grid - mean) / std
+    flagged = present & (n >= 7) & (std > 0) & (np.abs(z) >= ANOMALY_Z)
+    flagged[: max(0, grid.shape[0] - recent_days)] = False
+
+    names = list(COLUMNS)
+    out = []
+    for i, j in zip(*np.nonzero(flagged)):
+        out.append({
+            "date": str(grid_days[i]),
+            "metric": names[j],
+            "value": round(float(grid[i, j]), 2),
+            "baseline": round(float(mean[i, j]), 2),
+            "z": round(float(z[i, j]), 2),
+            "direction": "high" if z[i, j] > 0 else "low",
+        })
+    return out
+
+
+def compute_insights(
+    days: np.ndarray,
+    values: np.ndarray,
+    today: Optional[date] = None,
+    series_days: int = 90,
+    anomaly_days: int = 30,
+) -> Dict:
+    """Insights from column arrays (see to_columns / months_to_columns)."""
+    if not len(days):
+        return {"checkins": 0}
+
+    grid_days, grid, logged = daily_grid(days, values)
+    today64 = np.datetime64(today or date.today(), "D")
+    ma7 = trailing_mean(grid, 7)
+    ma30 = trailing_mean(grid, 30)
+
+    def _last(arr, j):
+        v = arr[-1, j]
+        return None if np.isnan(v) else round(float(v), 2)
+
+    moving = {}
+    all_time = {}
+    for j, name in enumerate(COLUMNS):
+        column = grid[:, j]
+        if np.isnan(column).all():
+            continue
+        moving[name] = {"7d": _last(ma7, j), "30d": _last(ma30, j)}
+        all_time[name] = round(float(np.nanmean(column)), 2)
+
+    tail = slice(max(0, len(grid_days) - series_days), None)
+    series = {
+        "dates": [str(d) for d in grid_days[tail]],
+        "ma7": {
+            name: [None if np.isnan(v) else round(float(v), 2) for v in ma7[tail, j]]
+            for j, name in enumerate(COLUMNS) if name in moving
+        },
+    }
+
+    return {
+        "checkins": int(len(days)),
+        "first_date": str(grid_days[0]),
+        "last_date": str(grid_days[-1]),
+        "averages": all_time,
+        "moving_averages": moving,
+        "weekday": weekday_profile(grid_days, grid),
+        "correlations": correlations(grid),
+        "streaks": streaks(logged, grid_days, today64),
+        "anomalies": anomalies(grid_days, grid, anomaly_days),
+        "series": series,
+    }
@@ -0,0 +1,152 @@
+"""
+Live copies of UserContext/{user_id} for users with an open session.
+
+UserContext (backend/app/user_context.py) is the one place the LLM routes'
+assembled context comes from. For a user with an open session (activated on
+/login and when the chat WebSocket connects) LiveContextRegistry keeps an
+on_snapshot listener on that document, so every slice the write routes merge
+in, from any worker, is pushed here and reading the context costs no
+request-time read. Other requests never attach listeners; without one the
+document is read once per request.
+
+Each listener costs a connection and a read per change. Listeners are
+detached once a user has been idle for idle_seconds (swept from activate()
+and, at most every sweep_seconds, from get()), and the least recently used
+users are dropped past max_users.
+"""
+import copy
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.app.user_context import user_context_ref
+
+
+class LiveUserContext:
+    """Listener handle plus the latest UserContext document it has delivered for one user."""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.data: Optional[Dict] = None
+        self.ready = False  # True once the first snapshot has arrived
+        self._watch = None
+        self._lock = threading.Lock()
+        self.last_used = time.time()
+
+    def on_snapshot(self, docs, changes, read_time) -> None:
+        snap = docs[0] if docs else None
+        with self._lock:
+            self.data = (snap.to_dict() or {}) if snap is not None and snap.exists else None
+            self.ready = True
+
+    def snapshot(self) -> Optional[Dict]:
+        with self._lock:
+            self.last_used = time.time()
+            return copy.deepcopy(self.data)
+
+    def close(self) -> None:
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception as e:
+                print(f"Warning: failed to detach listener for {self.user_id}: {e}")
+        self._watch = None
+
+
+class LiveContextRegistry:
+    def __init__(
+        self,
+        db,
+        idle_seconds: int = 10 * 60,
+        max_users: int = 200,
+        sweep_seconds: int = 60,
+    ):
+        self.db = db
+        self.idle_seconds = idle_seconds
+        self.max_users = max_users
+        self.sweep_seconds = sweep_seconds
+        self._contexts: Dict[str, LiveUserContext] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """
+        The user's UserContext document as last pushed, or None if no listener is
+        attached, it has not synced yet, or the document does not exist.
+        """
+        self._maybe_sweep()
+        with self._lock:
+            ctx = self._contexts.get(user_id)
+        if ctx is None:
+            return None
+        if not ctx.ready:
+            ctx.last_used = time.time()
+            return None
+        return ctx.snapshot()
+
+    def _maybe_sweep(self) -> None:
+        # Most requests only call get(), so idle users must also be dropped from here
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_seconds:
+                return
+            self._last_sweep = now
+        self.evict_idle()
+
+    def activate(self, user_id: str) -> None:
+        """Attach the listener at session start (no-op if already attached) and drop idle users."""
+        self.evict_idle()
+        with self._lock:
+            ctx = self._contexts.get(user_id)
+            if ctx is not None:
+                ctx.last_used = time.time()
+                return
+            ctx = LiveUserContext(user_id)
+            self._contexts[user_id] = ctx
+            overflow = []
+            if len(self._contexts) > self.max_users:
+                by_age = sorted(self._contexts.values(), key=lambda c: c.last_used)
+                overflow = by_age[:len(self._contexts) - self.max_users]
+                for old in overflow:
+                    del self._contexts[old.user_id]
+        for old in overflow:
+            old.close()
+
+        try:
+            ctx._watch = user_context_ref(self.db, user_id).on_snapshot(ctx.on_snapshot)
+        except Exception as e:
+            print(f"Warning: failed to attach live context listener for {user_id}: {e}")
+            self.deactivate(user_id)
+
+    def deactivate(self, user_id: str) -> None:
+        with self._lock:
+            ctx = self._contexts.pop(user_id, None)
+        if ctx is not None:
+            ctx.close()
+
+    def evict_idle(self) -> int:
+        cutoff = time.time() - self.idle_seconds
+        with self._lock:
+            self._last_sweep = time.time()
+            idle = [c for c in self._contexts.values() if c.last_used < cutoff]
+            for ctx in idle:
+                del self._contexts[ctx.user_id]
+        for ctx in idle:
+            ctx.close()
+        return len(idle)
+
+    def close_all(self) -> None:
+        with self._lock:
+            contexts, self._contexts = list(self._contexts.values()), {}
+        for ctx in contexts:
+            ctx.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            contexts = list(self._contexts.values())
+        return {
+            "active_users": len(contexts),
+            "ready": sum(1 for c in contexts if c.ready),
+            "idle_seconds": self.idle_seconds,
+            "max_users": self.max_users,
+        }
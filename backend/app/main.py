@@ -1,7 +1,7 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import Response
 from fastapi.staticfiles import StaticFiles
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from pydantic import BaseModel, Field
 from hashlib import sha256
 from uuid import uuid4
@@ -9,12 +9,44 @@ from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from datetime import datetime, timedelta
+from collections import deque
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 import random
 
 import json
 import os
+import threading
 
 from backend.llm.client import BenjiLLM
+from backend.llm.retrieval import HistoryIndexRegistry, build_history_index
+from backend.llm.drug_names import resolve_name as resolve_drug_name
+from backend.llm.questions import select_questions
+from backend.llm.cycle import PHASE_RECOMMENDATIONS, CycleResultCache, analyze_cycle, default_notes as default_cycle_notes
+from backend.app.batching import BatchWriter, delete_query
+from backend.app.auth import issue_session_token, tokenless_allowed, verify_admin_token, verify_session_token
+from backend.app.doc_cache import DocumentCache
+from backend.app.live_context import LiveContextRegistry
+from backend.app.checkin_stats import MAX_WINDOW_DAYS, record_checkin, rolling_aggregates, seed_stats, stats_ref
+from backend.app.adherence import (
+    adherence_months_ref, adherence_ref, build_months as build_adherence_months, record_compliance, summarize,
+)
+from backend.app.medications import (
+    create_item as create_medication_item, ensure_items, item_field, items_from_list, medication_list,
+    medications_ref,
+)
+from backend.app.flow_log import (
+    ensure_sharded, flow_months_ref, patch_day as patch_flow_day, read_entries as read_flow_entries,
+    replace_log as replace_flow_log,
+)
+from backend.app.timeseries import (
+    SOURCE_FIELDS as SERIES_SOURCE_FIELDS, append_checkin, build_months, month_rows, months_ref,
+    read_months, series_ref,
+)
+from backend.app.user_context import (
+    RECENT_CHECKINS, build_user_context, compact_checkin, compact_goal, compact_profile,
+    compliance_summary, context_facts, medication_summary, menstrual_summary,
+    push_recent_checkin, update_user_context, user_context_ref,
+)
 
 import firebase_admin
 from firebase_admin import credentials, firestore
@@ -50,6 +82,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 @app.middleware("http")
@@ -61,6 +94,14 @@ async def disable_cache(request: Request, call_next):
     return response
 
 benji = BenjiLLM()
+history_indexes = HistoryIndexRegistry()
+doc_cache = DocumentCache(db)  # ProfileInfo, Medications, MenstrualFlowLog, legacy Goals/{user_id}
+live_contexts = LiveContextRegistry(db)  # UserContext listeners for users with an open session
+
+
+@app.on_event("shutdown")
+def close_live_contexts():
+    live_contexts.close_all()
 
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
@@ -179,6 +220,7 @@ class LoginRequest(BaseModel):
 class LoginResponse(BaseModel):
     user_id: str
     message: str
+    token: Optional[str] = None  # send back as "Authorization: Bearer <token>"
 
 class QuestionRequest(BaseModel):
     active_goals: List[str]
@@ -243,14 +285,47 @@ class RunRequest(BaseModel):
 class RunResponse(BaseModel):
     response: str
     
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def email_index_ref(email: str):
+    """EmailIndex/{normalized_email} -> {user_id, password}: one direct get per login."""
+    return db.collection("EmailIndex").document(normalize_email(email))
+
+
+def find_legacy_user(email: str):
+    """
+    User doc for an email that has no EmailIndex entry yet (accounts created
+    before the index). Older docs store the email as typed, so the raw value is
+    tried after the normalized one. Returns the snapshot or None.
+    """
+    normalized = normalize_email(email)
+    for candidate in dict.fromkeys([normalized, (email or "").strip(), email or ""]):
+        if not candidate:
+            continue
+        docs = (
+            db.collection("User")
+              .where("email", "==", candidate)
+              .limit(1)
+              .stream()
+        )
+        doc = next(docs, None)
+        if doc:
+            return doc
+    return None
+
+
 def authenticate_firestore(email: str, password: str) -> Optional[str]:
-    docs = (
-        db.collection("User")
-          .where("email", "==", email)
-          .limit(1)
-          .stream()
-    )
-    doc = next(docs, None)
+    index_snap = email_index_ref(email).get()
+    if index_snap.exists:
+        entry = index_snap.to_dict() or {}
+        if entry.get("password") != password:
+            return None
+        return entry.get("user_id")
+
+    # Users created before EmailIndex existed: query once, then index them
+    doc = find_legacy_user(email)
     if not doc:
         return None
 
@@ -258,9 +333,59 @@ def authenticate_firestore(email: str, password: str) -> Optional[str]:
     if user.get("password") != password:
         return None
 
+    email_index_ref(email).set({"user_id": doc.id, "password": user.get("password")})
     return doc.id
 
 
+@firestore.transactional
+def _create_user_transaction(transaction, index_ref, user_ref, user_data: dict) -> bool:
+    """Create the User doc and its EmailIndex entry together; False if the email is taken."""
+    if index_ref.get(transaction=transaction).exists:
+        return False
+    transaction.set(user_ref, user_data)
+    transaction.set(index_ref, {"user_id": user_ref.id, "password": user_data["password"]})
+    return True
+
+
+def session_user(authorization: Optional[str] = Header(None)) -> Optional[str]:
+    """User id from a Bearer session token; None when the caller sent none (require_user rejects that)."""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    user_id = verify_session_token(token.strip()) if scheme.lower() == "bearer" else None
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    return user_id
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Operational routes (cache stats) need the X-Admin-Token header to match BENJI_ADMIN_TOKEN."""
+    if not verify_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def require_user(user_id: str, session_user_id: Optional[str]) -> None:
+    """
+    Check the caller may act as user_id: the session must belong to that user.
+    Only while tokenless callers are allowed does a missing session fall back
+    to the User existence read.
+    """
+    if session_user_id:
+        if session_user_id != user_id:
+            raise HTTPException(status_code=403, detail="Session does not match user")
+        return
+    if not tokenless_allowed():
+        raise HTTPException(status_code=401, detail="Session token required")
+    if not db.collection("User").document(user_id).get().exists:
+        raise HTTPException(status_code=404, detail="User not found")
+
+
+def authorize_user(user_id: str, session_user_id: Optional[str] = Depends(session_user)) -> str:
+    """Route dependency for /.../{user_id} paths: require_user on the path's user_id."""
+    require_user(user_id, session_user_id)
+    return user_id
+
+
 def load_users() -> dict:
     try:
         with open(USERS_DB_FILE, "r") as f:
@@ -296,6 +421,7 @@ class AddCheckInResponse(BaseModel):
 class GetCheckInsResponse(BaseModel):
     goal_id: str
     check_ins: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
 
 def get_user_by_id(user_id: str) -> Optional[dict]:
     users = load_users()
@@ -342,26 +468,34 @@ def _json_safe(val):
 
 @app.post("/signup", response_model=LoginResponse)
 def signup(request: SignupRequest):
-    # unique email
-    existing = (
-        db.collection("User")
-          .where("email", "==", request.email)
-          .limit(1)
-          .stream()
-    )
-    if next(existing, None) is not None:
+    # Accounts from before EmailIndex have no index entry; index them so the
+    # transaction below sees the email as taken
+    legacy = None if email_index_ref(request.email).get().exists else find_legacy_user(request.email)
+    if legacy is not None:
+        email_index_ref(request.email).set({"user_id": legacy.id, "password": (legacy.to_dict() or {}).get("password")})
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    # Firestore auto-ID
+    # Firestore auto-ID; the EmailIndex entry makes the email unique
     doc_ref = db.collection("User").document()
-    doc_ref.set({
-        "first_name": request.first_name,
-        "last_name": request.last_name,
-        "email": request.email,
-        "password": request.password
-    })
+    created = _create_user_transaction(
+        db.transaction(),
+        email_index_ref(request.email),
+        doc_ref,
+        {
+            "first_name": request.first_name,
+            "last_name": request.last_name,
+            "email": normalize_email(request.email),
+            "password": request.password
+        },
+    )
+    if not created:
+        raise HTTPException(status_code=400, detail="Email already exists")
 
-    return LoginResponse(user_id=doc_ref.id, message="User created successfully")
+    return LoginResponse(
+        user_id=doc_ref.id,
+        message="User created successfully",
+        token=issue_session_token(doc_ref.id),
+    )
 
 
 @app.post("/login", response_model=LoginResponse)
@@ -369,39 +503,44 @@ def login(request: LoginRequest):
     user_id = authenticate_firestore(request.email, request.password)
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid email or password")
-    return LoginResponse(user_id=user_id, message="Login successful")
+    # A session starts here: keep the user's context pushed to this process
+    live_contexts.activate(user_id)
+    return LoginResponse(user_id=user_id, message="Login successful", token=issue_session_token(user_id))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
 
 @app.post("/relevant-questions", response_model=QuestionResponse)
-def get_relevant_questions(payload: QuestionRequest):
+def get_relevant_questions(
+    payload: QuestionRequest,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    session_user_id: Optional[str] = Depends(session_user),
+):
     """
     Return relevant check-in questions based on active goals and user's existing facts.
-    """
-    try:
-        # Fetch the user facts from the backend
-        print(payload.user_id)
-        d = get_profileinfo(payload.user_id)
-        user_facts = {
-            "benji_facts": d.benji_facts,
-            "height": d.height,
-            "weight": d.weight,
-        }
-        print(user_facts)
-        if user_facts is None:
-            raise HTTPException(status_code=404, detail="User not found")
 
-        relevant = benji.select_relevant_questions(
-            active_goals={},
-            user_facts=user_facts
-        )
-        print(relevant)
-        return QuestionResponse(questions=relevant)
+    Selection is local (backend/llm/questions.py): goal types and profile facts map
+    to a precomputed question bundle. The response carries the bundle's ETag; send it
+    back as If-None-Match to get an empty 304 when the questions haven't changed.
+    """
+    # Validate the caller before loading (and possibly rebuilding) their context
+    require_user(payload.user_id, session_user_id)
+    user_facts, _ = load_profile_and_goals(payload.user_id)
+    if not user_facts:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    questions, etag = select_questions(payload.active_goals, user_facts)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return QuestionResponse(questions=questions)
 
-@app.get("/user/{user_id}", response_model=UserInfoOut)
+@app.get("/user/{user_id}", response_model=UserInfoOut, dependencies=[Depends(authorize_user)])
 def get_user_info(user_id: str):
     """Retrieve basic user info (name, email) from Firestore."""
     snap = db.collection("User").document(user_id).get()
@@ -417,7 +556,8 @@ def get_user_info(user_id: str):
 
 
 @app.post("/update_facts")
-def update_facts(update: UpdateUserFacts):
+def update_facts(update: UpdateUserFacts, session_user_id: Optional[str] = Depends(session_user)):
+    require_user(update.user_id, session_user_id)
     user = get_user_by_id(update.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -430,12 +570,10 @@ def update_facts(update: UpdateUserFacts):
     return {"message": "User facts updated successfully", "user_facts": user["user_facts"]}
 
 def fetch_profileinfo(user_id: str):
-    snap = db.collection("ProfileInfo").document(user_id).get()
-    if not snap.exists:
+    d = doc_cache.get("ProfileInfo", user_id)
+    if d is None:
         return None  # don’t raise HTTPException here
 
-    d = snap.to_dict() or {}
-
     benji_facts = d.get("BenjiFacts") or {}
     if isinstance(benji_facts, str):
         try:
@@ -450,8 +588,78 @@ def fetch_profileinfo(user_id: str):
         "weight": d.get("Weight"),
     }
 
+# Fields the LLM tools, prompts and retrieval index read from a check-in
+CHECKIN_CONTEXT_FIELDS = [
+    "createdAt", "date", "dayScore", "sleepScore", "sleep", "stress", "mood",
+    "fitnessScore", "fitness", "recoveryDay", "recovery_day", "eatScore",
+    "drinkScore", "wellnessScore", "fitnessNotes", "dayNotes", "tags",
+]
+
+
+def utc_now_iso() -> str:
+    """UTC timestamp with fixed-width microseconds so string order == time order."""
+    return datetime.utcnow().isoformat(timespec="microseconds") + "Z"
+
+
+def fetch_recent_checkins(user_id: str, limit: int, fields: Optional[List[str]] = CHECKIN_CONTEXT_FIELDS) -> list:
+    """
+    The user's `limit` most recent check-ins, newest first.
+    Served by the composite index CheckIns (UserID ASC, createdAt DESC), so
+    exactly `limit` documents are read; `fields` projects away everything else.
+    """
+    query = db.collection("CheckIns") \
+        .where("UserID", "==", user_id) \
+        .order_by("createdAt", direction=firestore.Query.DESCENDING)
+    if fields:
+        query = query.select(fields)
+    out = []
+    for doc in query.limit(limit).stream():
+        d = doc.to_dict()
+        d["id"] = doc.id
+        out.append(d)
+    return out
+
+
+def load_checkin_series(user_id: str, from_month: Optional[str] = None) -> list:
+    """
+    CheckInSeries month documents from from_month (YYYY-MM) on, oldest first.
+    The first call for a user who predates the series copies their CheckIns in.
+    """
+    if (series_ref(db, user_id).get().to_dict() or {}).get("complete"):
+        return read_months(db, user_id, from_month=from_month)
+
+    query = db.collection("CheckIns") \
+        .where("UserID", "==", user_id) \
+        .select(SERIES_SOURCE_FIELDS)
+    months = build_months((doc.id, doc.to_dict() or {}) for doc in query.stream())
+    writer = BatchWriter(db)
+    for month, month_doc in months.items():
+        writer.set(months_ref(db, user_id).document(month), month_doc)
+    writer.set(series_ref(db, user_id), {"complete": True, "builtAt": firestore.SERVER_TIMESTAMP})
+    writer.commit()
+    return [months[m] for m in sorted(months) if not from_month or m >= from_month]
+
+
+def stats_seed_rows(user_id: str, exclude_id: Optional[str] = None) -> list:
+    """The last MAX_WINDOW_DAYS of the user's check-in series, for seeding CheckInStats."""
+    from_month = (datetime.utcnow() - timedelta(days=MAX_WINDOW_DAYS + 1)).strftime("%Y-%m")
+    rows = month_rows(load_checkin_series(user_id, from_month=from_month))
+    return [r for r in rows if r.get("id") != exclude_id]
+
+
+def fetch_checkin_trends(user_id: str) -> dict:
+    """
+    Rolling 7/30/90-day aggregates and streaks from CheckInStats/{user_id}.
+    Users without a stats doc yet are seeded once from the last 90 days of their check-in series.
+    """
+    snap = stats_ref(db, user_id).get()
+    if snap.exists:
+        return rolling_aggregates(snap.to_dict() or {})
+    return rolling_aggregates(seed_stats(db, user_id, lambda: stats_seed_rows(user_id)))
+
+
 @app.post("/run", response_model=RunResponse)
-def run_agent(payload: RunRequest):
+def run_agent(payload: RunRequest, session_user_id: Optional[str] = Depends(session_user)):
     """
     Run BenjiLLM with optional pre-known user facts.
     If user_id provided, automatically load ProfileInfo, goals, and recent check-ins.
@@ -459,6 +667,7 @@ def run_agent(payload: RunRequest):
     user_facts = payload.user_facts or {}
 
     if payload.user_id:
+        require_user(payload.user_id, session_user_id)
         # Load ProfileInfo (preferred over legacy user_facts from users.json)
         try:
             profile = get_profileinfo(payload.user_id)
@@ -484,22 +693,19 @@ def run_agent(payload: RunRequest):
         
         # Load recent check-ins (latest + history for tools)
         try:
-            docs = list(db.collection("CheckIns")
-                        .where("UserID", "==", payload.user_id)
-                        .limit(10)
-                        .stream())
-            checkins = []
-            for doc in docs:
-                d_data = doc.to_dict()
-                checkins.append(d_data)
-            # Sort by createdAt descending
-            checkins.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
+            checkins = fetch_recent_checkins(payload.user_id, limit=10)
             if checkins:
                 user_facts["latest_checkin"] = checkins[0]
                 user_facts["checkin_history"] = checkins
         except Exception as e:
             print(f"Warning: failed to load check-ins for run: {e}")
 
+        # Rolling aggregates for the trend tools (one small document)
+        try:
+            user_facts["checkin_trends"] = fetch_checkin_trends(payload.user_id)
+        except Exception as e:
+            print(f"Warning: failed to load check-in trends for run: {e}")
+
     output = benji.run(
         user_input=payload.user_input,
         user_facts=user_facts
@@ -520,10 +726,11 @@ def firebase_health():
 
 
 @app.post("/goals", response_model=RunGoalsResponse)
-def run_goals_endpoint(payload: RunGoalsRequest):
+def run_goals_endpoint(payload: RunGoalsRequest, session_user_id: Optional[str] = Depends(session_user)):
     """
     Generate SMART goals for a user's input goal and optionally persist to user facts.
     """
+    require_user(payload.user_id, session_user_id)
     try:
         print("Payload received:", payload)
         
@@ -543,13 +750,14 @@ def run_goals_endpoint(payload: RunGoalsRequest):
 ##TODO Create a route to update user facts adding goals
 
 @app.post("/upcoming", response_model=RunUpcomingResponse)
-def run_upcoming_endpoint(payload: RunUpcomingRequest):
+def run_upcoming_endpoint(payload: RunUpcomingRequest, session_user_id: Optional[str] = Depends(session_user)):
     """
     Generate a 2-day upcoming plan using stored SMART goals
     and optionally persist it to user facts.
     """
     if not payload.user_id:
         raise HTTPException(status_code=400, detail="user_id is required")
+    require_user(payload.user_id, session_user_id)
 
     try:
         # Use fetch_profileinfo so missing profile does not raise 404 -> 500
@@ -617,8 +825,197 @@ def run_upcoming_endpoint(payload: RunUpcomingRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
     
+def load_history_index(user_id: str, goals: Optional[list] = None):
+    """
+    Return the user's retrieval index, building it from Firestore on a cold start.
+    Warm indexes are kept current by the write routes; goals are synced against the
+    current list, so edited goals are replaced and deleted ones dropped.
+    """
+    index = history_indexes.get(user_id)
+    if index is None:
+        ensure_chat_migrated(user_id)
+        checkins = fetch_recent_checkins(user_id, limit=100)
+        messages = fetch_chat_messages(user_id, limit=100)
+        index = build_history_index(checkins, goals or [], messages)
+        history_indexes.put(user_id, index)
+    else:
+        index.sync_goals(goals or [])
+    return index
+
+
+def load_profile_and_goals(user_id: str):
+    """
+    Profile + goal facts and recent check-ins for LLM routes, all from
+    UserContext/{user_id}: the live copy when the user has an open session
+    (no reads), else one read. An incomplete or missing document is rebuilt
+    from the source collections.
+    Returns (user_facts, recent_checkins newest first).
+    """
+    ctx = live_contexts.get(user_id)
+    if ctx is None:
+        ctx_snap = user_context_ref(db, user_id).get()
+        ctx = (ctx_snap.to_dict() or {}) if ctx_snap.exists else {}
+    if ctx.get("complete"):
+        return context_facts(ctx)
+
+    # Cold path: read every source once and denormalize into UserContext
+    profile_snap = db.collection("ProfileInfo").document(user_id).get()
+    profile = (profile_snap.to_dict() or {}) if profile_snap.exists else None
+    goals_data = {}
+    try:
+        goals_data = get_goals(user_id)
+    except Exception:
+        # Goals not found - continue without
+        pass
+    checkins = [
+        compact_checkin(c["id"], c, CHECKIN_CONTEXT_FIELDS)
+        for c in fetch_recent_checkins(user_id, limit=RECENT_CHECKINS)
+    ]
+    meds_snap = medications_ref(db, user_id).get()
+    medications = medication_list(meds_snap.to_dict() if meds_snap.exists else None)
+
+    ctx = build_user_context(
+        profile,
+        goals_data.get("goals") or [],
+        goals_data.get("accepted") or [],
+        checkins,
+        medications,
+    )
+    # Replace the rebuilt slices outright so goals deleted since the last build don't linger
+    update_user_context(db, user_id, ctx, replace=True)
+    return context_facts(ctx)
+
+
+def load_chat_context(user_id: str):
+    """Load profile facts, goals and the retrieval index used for chat turns."""
+    history_index = None
+    ensure_chat_migrated(user_id)
+    user_facts, _ = load_profile_and_goals(user_id)
+
+    # Per-user retrieval index over check-in notes, goals and past chats
+    try:
+        history_index = load_history_index(user_id, user_facts.get("goals"))
+    except Exception as e:
+        print(f"Warning: failed to build history index for chat: {e}")
+
+    return user_facts, history_index
+
+
+def chat_messages_ref(user_id: str):
+    """Append-only chat log: ChatHistory/{user_id}/Messages, one document per message."""
+    return db.collection("ChatHistory").document(user_id).collection("Messages")
+
+
+def chat_message_id(ts: str, seq: int, suffix: Optional[str] = None) -> str:
+    """Document ids sort by time (then seq), so ordering by id needs no index."""
+    compact = ts.replace("-", "").replace(":", "").replace(".", "").rstrip("Z")
+    return f"{compact}_{seq:06d}_{suffix or uuid4().hex[:6]}"
+
+
+def append_chat_history(user_id: str, user_input: str, reply: str, history_index=None) -> None:
+    """Persist one user/assistant exchange as two new message documents (one batch, no reads)."""
+    try:
+        now = utc_now_iso()
+        messages = [
+            {"role": "user", "content": user_input, "ts": now},
+            {"role": "assistant", "content": reply, "ts": now},
+        ]
+
+        writer = BatchWriter(db)
+        messages_ref = chat_messages_ref(user_id)
+        for seq, msg in enumerate(messages):
+            writer.set(messages_ref.document(chat_message_id(now, seq)), msg)
+        writer.commit()
+
+        if history_index is not None:
+            for msg in messages:
+                history_index.add_chat_message(f"{msg['ts']}:{msg['role']}", msg)
+    except Exception as e:
+        print(f"Warning: failed to persist chat history for {user_id}: {e}")
+
+
+def migrate_legacy_chat_history(user_id: str) -> int:
+    """
+    Move the old ChatHistory/{user_id}.messages array into the Messages
+    subcollection. Returns the number of messages moved (0 if nothing to do).
+
+    Runs whenever the legacy field is still present, even if new-style messages
+    already exist. Ids are derived from the array position, so a retry after a
+    partial failure overwrites the same documents instead of duplicating them.
+    """
+    doc_ref = db.collection("ChatHistory").document(user_id)
+    snap = doc_ref.get()
+    if not snap.exists:
+        return 0
+    data = snap.to_dict() or {}
+    if "messages" not in data:
+        return 0
+    messages = data.get("messages") or []
+
+    messages_ref = chat_messages_ref(user_id)
+    writer = BatchWriter(db)
+    for seq, msg in enumerate(messages):
+        writer.set(messages_ref.document(chat_message_id(msg.get("ts") or "", seq, suffix="legacy")), msg)
+    writer.commit()
+    doc_ref.update({"messages": firestore.DELETE_FIELD})
+    return len(messages)
+
+
+_chat_migrated = set()  # user ids whose legacy chat array has been checked this process
+_chat_migrated_lock = threading.Lock()
+
+
+def ensure_chat_migrated(user_id: str) -> None:
+    """Run migrate_legacy_chat_history once per user per process (one ChatHistory read)."""
+    with _chat_migrated_lock:
+        if user_id in _chat_migrated:
+            return
+        _chat_migrated.add(user_id)
+    try:
+        migrate_legacy_chat_history(user_id)
+    except Exception as e:
+        with _chat_migrated_lock:
+            _chat_migrated.discard(user_id)
+        print(f"Warning: failed to migrate chat history for {user_id}: {e}")
+
+
+def fetch_chat_messages(user_id: str, limit: int = 50, cursor: Optional[str] = None, since: Optional[str] = None) -> list:
+    """
+    Newest `limit` messages older than `cursor` (a message id), oldest first.
+    With `since` (ISO timestamp), return the oldest `limit` messages written
+    after it instead; `cursor` is then "<ts>|<id>" of the last message seen,
+    since both messages of an exchange share one ts.
+    """
+    if since:
+        messages_ref = chat_messages_ref(user_id)
+        query = messages_ref.where("ts", ">", since).order_by("ts").order_by("__name__")
+        if cursor:
+            ts, _, doc_id = cursor.rpartition("|")
+            query = query.start_after({"ts": ts, "__name__": messages_ref.document(doc_id)})
+        out = []
+        for doc in query.limit(limit).stream():
+            d = doc.to_dict()
+            d["id"] = doc.id
+            out.append(d)
+        return out
+
+    query = chat_messages_ref(user_id).order_by("__name__", direction=firestore.Query.DESCENDING)
+    if cursor:
+        query = query.start_after({"__name__": chat_messages_ref(user_id).document(cursor)})
+    out = []
+    for doc in query.limit(limit).stream():
+        d = doc.to_dict()
+        d["id"] = doc.id
+        out.append(d)
+    out.reverse()
+    return out
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat_endpoint(req: ChatRequest):
+def chat_endpoint(req: ChatRequest, session_user_id: Optional[str] = Depends(session_user)):
+    if req.user_id:
+        require_user(req.user_id, session_user_id)
+
     # Convert frontend history to LangChain messages
     history_msgs = [
         HumanMessage(content=msg.content) if msg.role == "user" else AIMessage(content=msg.content)
@@ -626,110 +1023,164 @@ def chat_endpoint(req: ChatRequest):
     ]
     
     user_facts = {}
+    history_index = None
     if req.user_id:
-        # Load ProfileInfo
-        try:
-            d = get_profileinfo(req.user_id)
-            user_facts = {
-                "benji_facts": d.benji_facts,
-                "height": d.height,
-                "weight": d.weight,
-            }
-        except HTTPException:
-            # Profile not found - continue with empty facts
-            pass
-        
-        # Load accepted goals (same as /checkin-recommendations)
-        try:
-            goals_data = get_goals(req.user_id)
-            goals_array = goals_data.get("goals") or goals_data.get("accepted") or []
-            if goals_array:
-                user_facts["goals"] = goals_array
-        except Exception:
-            # Goals not found - continue without
-            pass
-        
-        # Load recent check-ins (last 7 days)
-        try:
-            docs = list(db.collection("CheckIns")
-                        .where("UserID", "==", req.user_id)
-                        .limit(7)
-                        .stream())
-            recent_checkins = []
-            for doc in docs:
-                d_data = doc.to_dict()
-                recent_checkins.append(d_data)
-            # Sort by createdAt descending and store
-            recent_checkins.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
-            if recent_checkins:
-                user_facts["recent_checkins"] = recent_checkins
-                user_facts["latest_checkin"] = recent_checkins[0]
-        except Exception as e:
-            print(f"Warning: failed to load recent check-ins for chat: {e}")
+        user_facts, history_index = load_chat_context(req.user_id)
 
     # Call chat function, passing LangChain message objects
-    reply = benji.chat(req.user_input, history=history_msgs, user_facts=user_facts)
+    reply = benji.chat(
+        req.user_input,
+        history=history_msgs,
+        user_facts=user_facts,
+        history_index=history_index,
+    )
 
     # Persist chat history to Firestore if user is logged in
     if req.user_id:
-        try:
-            now = datetime.utcnow().isoformat() + "Z"
-            doc_ref = db.collection("ChatHistory").document(req.user_id)
-            snap = doc_ref.get()
-            
-            if snap.exists:
-                existing = snap.to_dict()
-                messages = existing.get("messages", [])
-            else:
-                messages = []
-            
-            # Append user message and assistant reply
-            messages.append({"role": "user", "content": req.user_input, "ts": now})
-            messages.append({"role": "assistant", "content": reply, "ts": now})
-            
-            # Trim to last 500 messages if too large
-            if len(messages) > 500:
-                messages = messages[-500:]
-            
-            doc_ref.set({"UserID": req.user_id, "messages": messages, "updatedAt": now})
-        except Exception as e:
-            print(f"Warning: failed to persist chat history for {req.user_id}: {e}")
+        append_chat_history(req.user_id, req.user_input, reply, history_index)
 
     return ChatResponse(response=reply)
 
 
+# ---------- Chat over WebSocket (server-held session) ----------
+WS_HISTORY_LIMIT = 20  # messages kept in memory per connection
+
+
+@app.websocket("/ws/chat/{user_id}")
+async def chat_websocket(websocket: WebSocket, user_id: str):
+    """
+    Chat session that keeps user context and recent history on the server.
+
+    Client frames (JSON):
+      {"type": "message", "text": "..."}       one new user turn
+      {"type": "reset", "history": [...]}      start over, optionally seeding prior turns
+    Server frames:
+      {"type": "ready"} once context is loaded, then per turn one or more
+      {"type": "token", "text": "..."} followed by {"type": "done", "response": "..."}.
+
+    Browsers cannot set headers on a WebSocket, so the session token comes as
+    ?token=...; it is checked like the Bearer header on HTTP routes and the
+    socket is closed (policy violation) when it is missing, invalid or for
+    another user.
+    """
+    token = websocket.query_params.get("token")
+    session_user_id = verify_session_token(token) if token else None
+    if not session_user_id and (token or not tokenless_allowed()):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        await run_in_threadpool(require_user, user_id, session_user_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    await run_in_threadpool(live_contexts.activate, user_id)
+
+    user_facts, history_index = await run_in_threadpool(load_chat_context, user_id)
+    history = deque(maxlen=WS_HISTORY_LIMIT)
+    await websocket.send_json({"type": "ready"})
+
+    try:
+        while True:
+            frame = await websocket.receive_json()
+            kind = frame.get("type", "message")
+
+            if kind == "reset":
+                history.clear()
+                for msg in (frame.get("history") or [])[-WS_HISTORY_LIMIT:]:
+                    content = msg.get("content") or ""
+                    history.append(HumanMessage(content=content) if msg.get("role") == "user" else AIMessage(content=content))
+                continue
+
+            text = (frame.get("text") or "").strip()
+            if not text:
+                await websocket.send_json({"type": "error", "detail": "Empty message"})
+                continue
+
+            parts = []
+            try:
+                stream = benji.chat_stream(
+                    text,
+                    history=list(history),
+                    user_facts=user_facts,
+                    history_index=history_index,
+                )
+                async for chunk in iterate_in_threadpool(stream):
+                    parts.append(chunk)
+                    await websocket.send_json({"type": "token", "text": chunk})
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+
+            reply = "".join(parts)
+            history.append(HumanMessage(content=text))
+            history.append(AIMessage(content=reply))
+            await websocket.send_json({"type": "done", "response": reply})
+
+            await run_in_threadpool(append_chat_history, user_id, text, reply, history_index)
+    except WebSocketDisconnect:
+        pass
+
+
 class ChatHistoryResponse(BaseModel):
     messages: List[Dict[str, str]]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to load older messages
 
 
-@app.get("/chat-history/{user_id}", response_model=ChatHistoryResponse)
-def get_chat_history(user_id: str):
-    """Return chat history for a user from Firestore."""
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Get chat history
-    doc_ref = db.collection("ChatHistory").document(user_id)
-    snap = doc_ref.get()
-    
-    if not snap.exists:
-        return {"messages": []}
-    
-    data = snap.to_dict()
-    messages = data.get("messages", [])
-    
-    return {"messages": messages}
+@app.get("/chat-history/{user_id}", response_model=ChatHistoryResponse, dependencies=[Depends(authorize_user)])
+def get_chat_history(
+    user_id: str,
+    response: Response,
+    limit: int = 500,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+):
+    """
+    Return chat history for a user from Firestore, newest page first.
+    Messages within a page are in chronological order; next_cursor is set when
+    older messages remain. Pass `since` (the last `ts` the client has) to get
+    only newer messages, oldest first; while more remain the X-Next-Cursor
+    header is set; repeat the request with the same `since` and ?cursor= it.
+    """
+
+    limit = max(1, min(limit, 500))
+    # One-off move of the legacy single-document array into the subcollection
+    ensure_chat_migrated(user_id)
+    messages = fetch_chat_messages(user_id, limit=limit, cursor=cursor, since=since)
+
+    if since:
+        # Delta pages run forward in time; the cursor travels in a header like /checkins
+        next_cursor = None
+        if len(messages) == limit:
+            response.headers["X-Next-Cursor"] = f"{messages[-1].get('ts', '')}|{messages[-1]['id']}"
+    else:
+        next_cursor = messages[0]["id"] if len(messages) == limit else None
+    return {"messages": messages, "next_cursor": next_cursor}
+
+@app.get("/chat-cache/stats", dependencies=[Depends(require_admin)])
+def get_chat_cache_stats():
+    """Hit/miss counters and per-entry stats for the semantic chat cache."""
+    if benji.response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **benji.response_cache.stats()}
+
+
+@app.get("/doc-cache/stats", dependencies=[Depends(require_admin)])
+def get_doc_cache_stats():
+    """Hit/miss counters for the per-user document read-through cache."""
+    return {**doc_cache.stats(), "live_contexts": live_contexts.stats()}
 
-@app.post("/profileinfo/{user_id}", response_model=ProfileInfoOut)
-def create_profileinfo(user_id: str, payload: CreateProfileInfoRequest):
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
 
+@app.post("/profileinfo/{user_id}", response_model=ProfileInfoOut, dependencies=[Depends(authorize_user)])
+def create_profileinfo(
+    user_id: str,
+    payload: CreateProfileInfoRequest,
+):
     doc_ref = db.collection("ProfileInfo").document(user_id)
-    if doc_ref.get().exists:
+    if doc_cache.get("ProfileInfo", user_id) is not None:
         raise HTTPException(status_code=409, detail="ProfileInfo already exists for this user")
 
     # Build doc_data with PascalCase for Firestore
@@ -748,6 +1199,8 @@ def create_profileinfo(user_id: str, payload: CreateProfileInfoRequest):
             raise HTTPException(status_code=400, detail="BenjiFacts must be a valid JSON string")
 
     doc_ref.set(doc_data)
+    doc_cache.invalidate("ProfileInfo", user_id)
+    update_user_context(db, user_id, {"profile": compact_profile(doc_data)})
 
     return ProfileInfoOut(
         user_id=user_id,
@@ -756,13 +1209,11 @@ def create_profileinfo(user_id: str, payload: CreateProfileInfoRequest):
         weight=doc_data.get("Weight"),
     )
 
-@app.get("/profileinfo/{user_id}", response_model=ProfileInfoOut)
+@app.get("/profileinfo/{user_id}", response_model=ProfileInfoOut, dependencies=[Depends(authorize_user)])
 def get_profileinfo(user_id: str):
-    snap = db.collection("ProfileInfo").document(user_id).get()
-    if not snap.exists:
+    d = doc_cache.get("ProfileInfo", user_id)
+    if d is None:
         raise HTTPException(status_code=404, detail="ProfileInfo not found")
-
-    d = snap.to_dict() or {}
     
     benji_facts = d.get("BenjiFacts") or {}
     if isinstance(benji_facts, str):
@@ -779,11 +1230,10 @@ def get_profileinfo(user_id: str):
         weight=d.get("Weight"),
     )
 
-@app.patch("/profileinfo/{user_id}", response_model=ProfileInfoOut)
+@app.patch("/profileinfo/{user_id}", response_model=ProfileInfoOut, dependencies=[Depends(authorize_user)])
 def update_profileinfo(user_id: str, payload: UpdateProfileInfoRequest):
-    doc_ref = db.collection("ProfileInfo").document(user_id)
-    snap = doc_ref.get()
-    if not snap.exists:
+    current = doc_cache.get("ProfileInfo", user_id)
+    if current is None:
         raise HTTPException(status_code=404, detail="ProfileInfo not found")
 
     # Map lowercase to PascalCase for Firestore
@@ -804,9 +1254,11 @@ def update_profileinfo(user_id: str, payload: UpdateProfileInfoRequest):
     if not updates:
         raise HTTPException(status_code=400, detail="No fields provided to update")
 
-    doc_ref.update(updates)
+    db.collection("ProfileInfo").document(user_id).update(updates)
+    doc_cache.invalidate("ProfileInfo", user_id)
+    update_user_context(db, user_id, {"profile": compact_profile(updates)})
 
-    d = doc_ref.get().to_dict() or {}
+    d = {**current, **updates}
     return ProfileInfoOut(
         user_id=user_id,
         benji_facts=d.get("BenjiFacts"),
@@ -820,7 +1272,7 @@ class GoalsAcceptedRequest(BaseModel):
     goals: List[Dict[str, Any]] = Field(default_factory=list, description="List of accepted goal objects")
 
 
-@app.get("/goals/{user_id}")
+@app.get("/goals/{user_id}", dependencies=[Depends(authorize_user)])
 def get_goals(user_id: str, goal_type: Optional[str] = None):
     """Return stored goals for user from Firestore.
     
@@ -847,12 +1299,10 @@ def get_goals(user_id: str, goal_type: Optional[str] = None):
         goals.append(d)
     
     # Also check legacy format (Goals/{user_id} document with accepted/generated arrays)
-    legacy_doc_ref = db.collection("Goals").document(user_id)
-    legacy_snap = legacy_doc_ref.get()
+    legacy_data = doc_cache.get("Goals", user_id)
     legacy_accepted = []
     legacy_generated = []
-    if legacy_snap.exists:
-        legacy_data = legacy_snap.to_dict() or {}
+    if legacy_data is not None:
         legacy_accepted = legacy_data.get("accepted", [])
         legacy_generated = legacy_data.get("generated", [])
     
@@ -865,16 +1315,16 @@ def get_goals(user_id: str, goal_type: Optional[str] = None):
 
 from google.cloud import firestore
 
-@app.post("/goals/{user_id}/accepted")
-def save_goals_accepted(user_id: str, payload: GoalsAcceptedRequest):
+@app.post("/goals/{user_id}/accepted", dependencies=[Depends(authorize_user)])
+def save_goals_accepted(
+    user_id: str,
+    payload: GoalsAcceptedRequest,
+):
     """Save SMART goals as individual documents in Goals collection."""
 
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-
     saved_ids = []
+    context_goals = {}
+    writer = BatchWriter(db)
 
     for goal in payload.goals:
         doc_ref = db.collection("Goals").document()
@@ -884,17 +1334,17 @@ def save_goals_accepted(user_id: str, payload: GoalsAcceptedRequest):
         if isinstance(end_date, str):
             try:
                 # Attempt ISO format parsing
-                end_date = datetime.datetime.fromisoformat(end_date)
+                end_date = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
             except ValueError:
                 # Fallback: random 3-7 weeks from now
                 weeks_offset = random.randint(3, 7)
-                end_date = datetime.datetime.utcnow() + datetime.timedelta(weeks=weeks_offset)
+                end_date = datetime.utcnow() + timedelta(weeks=weeks_offset)
         elif not end_date:
             # If EndDate is None, also use random 3-7 weeks
             weeks_offset = random.randint(3, 7)
             end_date = datetime.utcnow() + timedelta(weeks=weeks_offset)
 
-        doc_ref.set({
+        goal_doc = {
             "Specific": goal.get("Specific"),
             "Measurable": goal.get("Measurable"),
             "Attainable": goal.get("Attainable"),
@@ -912,9 +1362,15 @@ def save_goals_accepted(user_id: str, payload: GoalsAcceptedRequest):
 
             "DateCreated": firestore.SERVER_TIMESTAMP,
             "UserID": user_id
-        })
+        }
+        writer.set(doc_ref, goal_doc)
 
         saved_ids.append(doc_ref.id)
+        context_goals[doc_ref.id] = compact_goal(goal_doc)
+
+    # All goals in one round trip
+    writer.commit()
+    update_user_context(db, user_id, {"goals": context_goals})
 
     return {
         "message": f"{len(saved_ids)} goals saved",
@@ -929,34 +1385,77 @@ class CheckinCreate(BaseModel):
     date: Optional[str] = None
 
 
-@app.get("/checkins/{user_id}")
-def get_checkins(user_id: str):
-    """Return check-ins for user from Firestore (e.g. list of docs)."""
-    docs = list(db.collection("CheckIns").where("UserID", "==", user_id).limit(100).stream())
+@app.get("/checkins/{user_id}", dependencies=[Depends(authorize_user)])
+def get_checkins(user_id: str, response: Response, limit: int = 100, cursor: Optional[str] = None, since: Optional[str] = None):
+    """
+    Return check-ins for user from Firestore, newest first.
+
+    - `since`: only check-ins created after this ISO timestamp (delta sync).
+    - `cursor`: continue after the page that returned it (X-Next-Cursor header).
+    Uses the composite index CheckIns (UserID ASC, createdAt DESC).
+    """
+    limit = max(1, min(limit, 100))
+    query = db.collection("CheckIns").where("UserID", "==", user_id)
+    if since:
+        query = query.where("createdAt", ">", since)
+    query = query.order_by("createdAt", direction=firestore.Query.DESCENDING) \
+        .order_by("__name__", direction=firestore.Query.DESCENDING)
+    if cursor:
+        created_at, _, doc_id = cursor.rpartition("|")
+        query = query.start_after({
+            "createdAt": created_at,
+            "__name__": db.collection("CheckIns").document(doc_id),
+        })
+
     out = []
-    for doc in docs:
+    for doc in query.limit(limit).stream():
         d = doc.to_dict()
         d["id"] = doc.id
         out.append(d)
-    out.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
+
+    # Keep the list body for existing callers; the cursor travels in a header
+    if len(out) == limit:
+        response.headers["X-Next-Cursor"] = f"{out[-1].get('createdAt', '')}|{out[-1]['id']}"
     return out
 
 
 @app.post("/checkins")
-def create_checkin(payload: CheckinCreate):
+def create_checkin(payload: CheckinCreate, session_user_id: Optional[str] = Depends(session_user)):
     """Save one check-in to Firestore."""
     from datetime import datetime
-    user_snap = db.collection("User").document(payload.user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
+    require_user(payload.user_id, session_user_id)
     body = payload.model_dump()
     body["UserID"] = payload.user_id
-    body["createdAt"] = datetime.utcnow().isoformat() + "Z"
+    body["createdAt"] = utc_now_iso()
     doc_ref = db.collection("CheckIns").document()
     doc_ref.set(body)
+
+    index = history_indexes.get(payload.user_id)
+    if index is not None:
+        index.add_checkin(doc_ref.id, body)
+    push_recent_checkin(db, payload.user_id, compact_checkin(doc_ref.id, body, CHECKIN_CONTEXT_FIELDS))
+    record_checkin(db, payload.user_id, body, seed=lambda: stats_seed_rows(payload.user_id, exclude_id=doc_ref.id))
+    append_checkin(db, payload.user_id, doc_ref.id, body)
+
     return {"message": "Check-in saved", "id": doc_ref.id}
 
 
+@app.get("/insights/{user_id}", dependencies=[Depends(authorize_user)])
+def get_insights(
+    user_id: str,
+    series_days: int = 90,
+):
+    """
+    Analytics over the user's full check-in history: moving averages, weekday
+    seasonality, correlations, streaks and anomaly flags (see backend/app/insights.py).
+    """
+    from backend.app.insights import compute_insights, months_to_columns
+
+    # One small columnar document per month instead of one read per check-in
+    days, values = months_to_columns(load_checkin_series(user_id))
+    return compute_insights(days, values, series_days=max(7, min(series_days, 730)))
+
+
 # ---------- Check-in Recommendations ----------
 class CheckinRecommendationsRequest(BaseModel):
     user_id: str
@@ -966,15 +1465,15 @@ class CheckinRecommendationsResponse(BaseModel):
     response: str
 
 @app.post("/checkin-recommendations", response_model=CheckinRecommendationsResponse)
-def get_checkin_recommendations(payload: CheckinRecommendationsRequest):
+def get_checkin_recommendations(
+    payload: CheckinRecommendationsRequest,
+    session_user_id: Optional[str] = Depends(session_user),
+):
     """
     Generate personalized check-in focus areas based on user profile and goals.
     Optionally considers a user message for customized suggestions.
     """
-    # Validate user exists
-    user_snap = db.collection("User").document(payload.user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
+    require_user(payload.user_id, session_user_id)
     
     # Load profile info
     try:
@@ -1017,59 +1516,23 @@ class CheckinSenseResponse(BaseModel):
     notes: list  # List of 2-4 "Benji's Notes" strings
 
 @app.post("/checkin-sense", response_model=CheckinSenseResponse)
-def sense_checkin(payload: CheckinSenseRequest):
+def sense_checkin(payload: CheckinSenseRequest, session_user_id: Optional[str] = Depends(session_user)):
     """
     Generate "Benji's Notes" - post check-in insights based on the submitted check-in,
     correlated with the user's goals and theme.
     Optionally stores the notes on the check-in document.
     """
-    # Validate user exists
-    user_snap = db.collection("User").document(payload.user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Load profile info
-    user_facts = {}
-    try:
-        profile = get_profileinfo(payload.user_id)
-        user_facts = {
-            "benji_facts": profile.benji_facts,
-            "height": profile.height,
-            "weight": profile.weight,
-        }
-    except HTTPException:
-        # Profile not found - continue with empty facts
-        pass
+    require_user(payload.user_id, session_user_id)
     
-    # Load goals
-    try:
-        goals_data = get_goals(payload.user_id)
-        # Use 'goals' array (new format) or 'accepted' (legacy)
-        goals_array = goals_data.get("goals") or goals_data.get("accepted") or []
-        if goals_array:
-            user_facts["goals"] = goals_array
-    except Exception:
-        # Goals not found - continue without
-        pass
+    # Load profile info, goals and recent check-ins (UserContext)
+    user_facts, context_checkins = load_profile_and_goals(payload.user_id)
     
-    # Load recent check-ins for trend context (last 5, excluding today)
-    recent_checkins = []
-    try:
-        docs = list(db.collection("CheckIns")
-                    .where("UserID", "==", payload.user_id)
-                    .limit(6)
-                    .stream())
-        for doc in docs:
-            d = doc.to_dict()
-            # Skip today's check-in (the one we're sensing)
-            if payload.checkin_id and doc.id == payload.checkin_id:
-                continue
-            recent_checkins.append(d)
-        # Sort by createdAt descending and take top 5
-        recent_checkins.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
-        recent_checkins = recent_checkins[:5]
-    except Exception as e:
-        print(f"Warning: failed to load recent check-ins: {e}")
+    # Recent check-ins for trend context (last 5, excluding today)
+    recent_checkins = [
+        d for d in context_checkins
+        # Skip today's check-in (the one we're sensing)
+        if not (payload.checkin_id and d.get("id") == payload.checkin_id)
+    ][:5]
     
     # Call LLM to generate notes
     notes = benji.checkin_sense(
@@ -1089,7 +1552,7 @@ def sense_checkin(payload: CheckinSenseRequest):
     return CheckinSenseResponse(notes=notes)
 
 
-@app.delete("/user/{user_id}", response_model=DeleteUserResponse)
+@app.delete("/user/{user_id}", response_model=DeleteUserResponse, dependencies=[Depends(authorize_user)])
 def delete_user(user_id: str, payload: LoginRequest):
     """
     Delete a user only if they are that user.
@@ -1110,20 +1573,45 @@ def delete_user(user_id: str, payload: LoginRequest):
     if not snap.exists:
         raise HTTPException(status_code=404, detail="User not found")
 
+    delete_user_data(user_id)
+    email_index_ref(payload.email).delete()
     doc_ref.delete()
 
-    # (optional) clean up dependent docs
-    # db.collection("ProfileInfo").document(user_id).delete()
-
     return DeleteUserResponse(message="User deleted successfully")
 
 
-@app.patch("/user/{user_id}", response_model=UpdateUserNameResponse)
+def delete_user_data(user_id: str) -> int:
+    """Delete every document owned by a user (not the User doc), in batched writes."""
+    deleted = 0
+
+    # Goals and their check-in subcollections
+    for goal_doc in db.collection("Goals").where("UserID", "==", user_id).stream():
+        deleted += delete_query(db, goal_checkins_ref(goal_doc.id))
+    deleted += delete_query(db, db.collection("Goals").where("UserID", "==", user_id))
+
+    deleted += delete_query(db, db.collection("CheckIns").where("UserID", "==", user_id))
+    deleted += delete_query(db, db.collection("MedicationCompliance").where("user_id", "==", user_id))
+    deleted += delete_query(db, chat_messages_ref(user_id))
+    deleted += delete_query(db, months_ref(db, user_id))
+    deleted += delete_query(db, adherence_months_ref(db, user_id))
+    deleted += delete_query(db, flow_months_ref(db, user_id))
+
+    # One-per-user documents
+    writer = BatchWriter(db)
+    for collection in ("ProfileInfo", "Goals", "ChatHistory", "Medications", "MenstrualFlowLog", "UserContext", "CheckInStats", "CheckInSeries", "Adherence"):
+        writer.delete(db.collection(collection).document(user_id))
+    deleted += writer.commit()
+    live_contexts.deactivate(user_id)
+    for collection in ("ProfileInfo", "Goals", "Medications", "MenstrualFlowLog"):
+        doc_cache.invalidate(collection, user_id)
+
+    history_indexes.invalidate(user_id)
+    return deleted
+
+
+@app.patch("/user/{user_id}", response_model=UpdateUserNameResponse, dependencies=[Depends(authorize_user)])
 def update_user_name(user_id: str, payload: UpdateUserNameRequest):
-    """
-    Update first and/or last name for a User doc.
-    NOTE: Auth is disabled for this endpoint until credentials are available.
-    """
+    """Update first and/or last name for a User doc."""
 
     # build optional updates
     updates = {}
@@ -1154,6 +1642,23 @@ class MedicationItem(BaseModel):
     frequency: str
     foodInstruction: Optional[str] = None  # "with_food", "empty_stomach", "no_preference"
     notes: Optional[str] = None
+    ingredientIds: Optional[List[str]] = None  # resolved from name on write (backend/llm/drug_names.py)
+
+
+class MedicationCreateRequest(BaseModel):
+    name: str
+    strength: str
+    frequency: str
+    foodInstruction: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class MedicationPatchRequest(BaseModel):
+    name: Optional[str] = None
+    strength: Optional[str] = None
+    frequency: Optional[str] = None
+    foodInstruction: Optional[str] = None
+    notes: Optional[str] = None
 
 
 class MedicationsListRequest(BaseModel):
@@ -1165,45 +1670,120 @@ class MedicationsListResponse(BaseModel):
     list: List[Dict[str, Any]]
 
 
-@app.get("/medications/{user_id}", response_model=MedicationsListResponse)
+def medications_written(user_id: str, data: Dict) -> MedicationsListResponse:
+    """Shared tail of the medication write routes: drop the cached doc, refresh UserContext, return the list."""
+    meds_list = medication_list(data)
+    doc_cache.invalidate("Medications", user_id)
+    update_user_context(db, user_id, {"medications": medication_summary(meds_list)})
+    return MedicationsListResponse(user_id=user_id, list=meds_list)
+
+
+@app.get("/medications/{user_id}", response_model=MedicationsListResponse, dependencies=[Depends(authorize_user)])
 def get_medications(user_id: str):
     """Get user's medication list from Firestore."""
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
     
     # Get medications document
-    doc_ref = db.collection("Medications").document(user_id)
-    snap = doc_ref.get()
+    data = doc_cache.get("Medications", user_id)
     
-    if not snap.exists:
-        return MedicationsListResponse(user_id=user_id, list=[])
-    
-    data = snap.to_dict()
-    return MedicationsListResponse(user_id=user_id, list=data.get("list", []))
+    return MedicationsListResponse(user_id=user_id, list=medication_list(data))
 
 
-@app.put("/medications/{user_id}", response_model=MedicationsListResponse)
-def update_medications(user_id: str, payload: MedicationsListRequest):
-    """Create or update user's medication list in Firestore."""
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
+@app.put("/medications/{user_id}", response_model=MedicationsListResponse, dependencies=[Depends(authorize_user)])
+def update_medications(
+    user_id: str,
+    payload: MedicationsListRequest,
+):
+    """Replace user's whole medication list in Firestore (the item routes below write one medication)."""
     
-    # Convert to dict list for Firestore storage
-    meds_list = [med.model_dump() for med in payload.list]
+    # Convert to the map layout for Firestore storage
+    items = items_from_list([
+        {**med.model_dump(), "ingredientIds": resolve_drug_name(med.name)} for med in payload.list
+    ])
     
     # Upsert medications document
-    doc_ref = db.collection("Medications").document(user_id)
-    doc_ref.set({
+    data = {
         "UserID": user_id,
-        "list": meds_list,
-        "updatedAt": datetime.utcnow().isoformat() + "Z"
-    })
+        "items": items,
+        "updatedAt": utc_now_iso()
+    }
+    medications_ref(db, user_id).set(data)
     
-    return MedicationsListResponse(user_id=user_id, list=meds_list)
+    return medications_written(user_id, data)
+
+
+@app.post("/medications/{user_id}/{med_id}", response_model=MedicationsListResponse, dependencies=[Depends(authorize_user)])
+def add_medication(
+    user_id: str,
+    med_id: str,
+    payload: MedicationCreateRequest,
+):
+    """Add one medication (a single map-entry write)."""
+
+    # Legacy `list` documents are converted first; the duplicate check runs in the transaction
+    ensure_items(db, user_id, doc_cache.get("Medications", user_id))
+
+    item = {
+        "id": med_id,
+        **payload.model_dump(),
+        "ingredientIds": resolve_drug_name(payload.name),
+    }
+    now = utc_now_iso()
+    data = create_medication_item(db.transaction(), medications_ref(db, user_id), user_id, item, now)
+    if data is None:
+        raise HTTPException(status_code=409, detail="Medication already exists")
+
+    return medications_written(user_id, data)
+
+
+@app.patch("/medications/{user_id}/{med_id}", response_model=MedicationsListResponse, dependencies=[Depends(authorize_user)])
+def patch_medication(
+    user_id: str,
+    med_id: str,
+    payload: MedicationPatchRequest,
+):
+    """Update the given fields of one medication (field-path writes)."""
+
+    updates = payload.model_dump(exclude_unset=True)
+    if not updates:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    # foodInstruction / notes may be cleared with null; the required fields may not
+    nulls = [field for field in ("name", "strength", "frequency") if field in updates and updates[field] is None]
+    if nulls:
+        raise HTTPException(status_code=400, detail=f"{', '.join(nulls)} cannot be null")
+    if "name" in updates:
+        updates["ingredientIds"] = resolve_drug_name(updates["name"])
+
+    data = ensure_items(db, user_id, doc_cache.get("Medications", user_id))
+    if data is None or med_id not in data["items"]:
+        raise HTTPException(status_code=404, detail="Medication not found")
+
+    medications_ref(db, user_id).update({
+        **{item_field(med_id, field): value for field, value in updates.items()},
+        "updatedAt": utc_now_iso(),
+    })
+
+    data["items"][med_id].update(updates)
+    return medications_written(user_id, data)
+
+
+@app.delete("/medications/{user_id}/{med_id}", response_model=MedicationsListResponse, dependencies=[Depends(authorize_user)])
+def delete_medication(
+    user_id: str,
+    med_id: str,
+):
+    """Remove one medication."""
+
+    data = ensure_items(db, user_id, doc_cache.get("Medications", user_id))
+    if data is None or med_id not in data["items"]:
+        raise HTTPException(status_code=404, detail="Medication not found")
+
+    medications_ref(db, user_id).update({
+        item_field(med_id): firestore.DELETE_FIELD,
+        "updatedAt": utc_now_iso(),
+    })
+
+    del data["items"][med_id]
+    return medications_written(user_id, data)
 
 
 # ---------- Menstrual Flow Log (Firestore) ----------
@@ -1223,48 +1803,102 @@ class MenstrualFlowLogResponse(BaseModel):
     entries: Dict[str, Any]
 
 
-@app.get("/menstrual/{user_id}", response_model=MenstrualFlowLogResponse)
-def get_menstrual_flow_log(user_id: str):
-    """Get user's menstrual flow log from Firestore."""
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Get menstrual flow log document
-    doc_ref = db.collection("MenstrualFlowLog").document(user_id)
-    snap = doc_ref.get()
-    
-    if not snap.exists:
-        return MenstrualFlowLogResponse(user_id=user_id, entries={})
-    
-    data = snap.to_dict()
-    return MenstrualFlowLogResponse(user_id=user_id, entries=data.get("entries", {}))
+class MenstrualDayResponse(BaseModel):
+    user_id: str
+    date: str
+    entry: Optional[Dict[str, Any]] = None  # None when the day was cleared
 
 
-@app.put("/menstrual/{user_id}", response_model=MenstrualFlowLogResponse)
-def update_menstrual_flow_log(user_id: str, payload: MenstrualFlowLogRequest):
-    """Create or update user's menstrual flow log in Firestore."""
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
+def parse_log_date(value: str) -> str:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
+
+def load_flow_entries(user_id: str, from_date: Optional[str] = None, to_date: Optional[str] = None):
+    """(parent document or None, entries in [from_date, to_date]); moves legacy single-document logs into month shards."""
+    parent = doc_cache.get("MenstrualFlowLog", user_id)
+    if parent is None:
+        return None, {}
+    if not parent.get("sharded"):
+        entries = parent.get("entries") or {}
+        try:
+            ensure_sharded(db, user_id, parent)
+            doc_cache.invalidate("MenstrualFlowLog", user_id)
+        except Exception as e:
+            print(f"Warning: failed to shard MenstrualFlowLog for {user_id}: {e}")
+        return parent, {
+            d: e for d, e in sorted(entries.items())
+            if (not from_date or d >= from_date) and (not to_date or d <= to_date)
+        }
+    return parent, read_flow_entries(db, user_id, from_date, to_date)
+
+
+@app.get("/menstrual/{user_id}", response_model=MenstrualFlowLogResponse, dependencies=[Depends(authorize_user)])
+def get_menstrual_flow_log(
+    user_id: str,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+):
+    """
+    Get user's menstrual flow log from Firestore. from_date / to_date
+    (YYYY-MM-DD, optional) limit the entries and the month documents read.
+    """
+
+    from_date = parse_log_date(from_date) if from_date else None
+    to_date = parse_log_date(to_date) if to_date else None
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(status_code=400, detail="from_date must be on or before to_date")
+
+    _, entries = load_flow_entries(user_id, from_date, to_date)
+    return MenstrualFlowLogResponse(user_id=user_id, entries=entries)
+
+
+@app.put("/menstrual/{user_id}", response_model=MenstrualFlowLogResponse, dependencies=[Depends(authorize_user)])
+def update_menstrual_flow_log(
+    user_id: str,
+    payload: MenstrualFlowLogRequest,
+):
+    """Replace user's whole menstrual flow log in Firestore (prefer PATCH /menstrual/{user_id}/{date})."""
     
     # Convert entries to dict for Firestore storage
     entries_dict = {date: entry.model_dump(exclude_none=True) for date, entry in payload.entries.items()}
     
-    # Upsert menstrual flow log document
-    doc_ref = db.collection("MenstrualFlowLog").document(user_id)
-    doc_ref.set({
-        "UserID": user_id,
-        "entries": entries_dict,
-        "updatedAt": datetime.utcnow().isoformat() + "Z"
-    })
+    # Rewrite the month documents (and drop months no longer present)
+    replace_flow_log(db, user_id, entries_dict, utc_now_iso())
+    doc_cache.invalidate("MenstrualFlowLog", user_id)
+    update_user_context(db, user_id, {"menstrual": menstrual_summary(entries_dict)})
     
     return MenstrualFlowLogResponse(user_id=user_id, entries=entries_dict)
 
 
-# ---------- Cycle Recommendations (AI-powered) ----------
+@app.patch("/menstrual/{user_id}/{date}", response_model=MenstrualDayResponse, dependencies=[Depends(authorize_user)])
+def patch_menstrual_day(
+    user_id: str,
+    date: str,
+    payload: MenstrualDayEntry,
+):
+    """
+    Set one day of the flow log (a field-path write to that day's month
+    document). An entry with no fields clears the day.
+    """
+    day = parse_log_date(date)
+
+    # Legacy logs must be moved into month documents before a per-day write
+    parent = doc_cache.get("MenstrualFlowLog", user_id)
+    if parent is not None and not parent.get("sharded"):
+        ensure_sharded(db, user_id, parent)
+
+    entry = payload.model_dump(exclude_none=True) or None
+    summary = patch_flow_day(db, user_id, day, entry, utc_now_iso())
+    doc_cache.invalidate("MenstrualFlowLog", user_id)
+    update_user_context(db, user_id, {"menstrual": summary})
+
+    return MenstrualDayResponse(user_id=user_id, date=day, entry=entry)
+
+
+# ---------- Cycle Recommendations ----------
 class CycleRecommendationItem(BaseModel):
     icon: Optional[str] = None  # Font Awesome icon class
     title: str
@@ -1274,45 +1908,50 @@ class CycleRecommendationItem(BaseModel):
 class CycleRecommendationsResponse(BaseModel):
     user_id: str
     current_phase: Optional[str] = None  # "Menstrual", "Follicular", "Ovulation", "Luteal"
-    cycle_day: Optional[int] = None  # 1-28
+    cycle_day: Optional[int] = None  # 1..mean cycle length
     predicted_period_onset: Optional[str] = None  # Date or range string
     recommendations: List[CycleRecommendationItem] = []
     personalization_notes: Optional[str] = None
 
 
-@app.get("/menstrual-recommendations/{user_id}", response_model=CycleRecommendationsResponse)
-def get_cycle_recommendations(user_id: str):
+cycle_results = CycleResultCache()
+
+
+def flow_log_version(data: Dict, entries: Dict) -> str:
+    """Version key for a flow log: the parent's updatedAt stamp, or a hash of the entries for older documents."""
+    if data.get("updatedAt"):
+        return str(data["updatedAt"])
+    return sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()
+
+
+@app.get("/menstrual-recommendations/{user_id}", response_model=CycleRecommendationsResponse, dependencies=[Depends(authorize_user)])
+def get_cycle_recommendations(
+    user_id: str,
+    use_ai: bool = False,
+):
     """
-    Get AI-powered cycle phase recommendations based on user's flow log.
-    
-    Returns current phase, cycle day, predicted next period onset,
-    personalized recommendations, and Benji's notes.
+    Get cycle phase recommendations based on user's flow log.
+
+    Phase, cycle day and the predicted onset range come from the local cycle
+    engine. With use_ai=true Benji writes the recommendations and notes;
+    otherwise (or if the model fails) phase-based defaults are returned.
+    Results are cached per flow-log version and day.
     """
     from backend.llm.tools import CycleRecommendationsAgentTool
-    
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Get menstrual flow log from Firestore
-    doc_ref = db.collection("MenstrualFlowLog").document(user_id)
-    snap = doc_ref.get()
-    
+
+    # Serve from cache on the parent's version stamp before reading any month documents
+    today = datetime.utcnow().date()
+    parent = doc_cache.get("MenstrualFlowLog", user_id) or {}
+    version = parent.get("updatedAt") if parent.get("sharded") else None
+    if version:
+        cached = cycle_results.get((user_id, version, today.isoformat(), use_ai))
+        if cached is not None:
+            return CycleRecommendationsResponse(**cached)
+
+    # The last year of the flow log is plenty for recent cycle statistics
+    data, entries = load_flow_entries(user_id, from_date=(today - timedelta(days=365)).isoformat())
+
     # Handle empty/missing flow log
-    if not snap.exists:
-        return CycleRecommendationsResponse(
-            user_id=user_id,
-            current_phase=None,
-            cycle_day=None,
-            predicted_period_onset=None,
-            recommendations=[],
-            personalization_notes="Log your flow on the calendar to get personalized phase and period predictions from Benji."
-        )
-    
-    data = snap.to_dict()
-    entries = data.get("entries", {})
-    
     if not entries:
         return CycleRecommendationsResponse(
             user_id=user_id,
@@ -1320,50 +1959,51 @@ def get_cycle_recommendations(user_id: str):
             cycle_day=None,
             predicted_period_onset=None,
             recommendations=[],
-            personalization_notes="Log your flow on the calendar to get personalized phase and period predictions from Benji."
+            personalization_notes=default_cycle_notes({})
         )
-    
-    # Call the CycleRecommendationsAgentTool
-    agent_result = CycleRecommendationsAgentTool(
-        flow_log_entries=entries,
-        model=benji.model
-    )
-    
-    # Handle fallback (LLM failed)
-    if agent_result.get("_fallback"):
-        return CycleRecommendationsResponse(
-            user_id=user_id,
-            current_phase=None,
-            cycle_day=None,
-            predicted_period_onset=None,
-            recommendations=[],
-            personalization_notes="I couldn't analyze your cycle data right now. Please try again later, or log more flow data for better predictions."
+
+    version = version or flow_log_version(data or {}, entries)
+    key = (user_id, version, today.isoformat(), use_ai)
+    cached = cycle_results.get(key)
+    if cached is not None:
+        return CycleRecommendationsResponse(**cached)
+
+    engine_key = (user_id, version, today.isoformat(), False)
+    cycle = (cycle_results.get(engine_key) or {}).get("_cycle") or analyze_cycle(entries, today)
+    result = {
+        "user_id": user_id,
+        "current_phase": cycle["current_phase"],
+        "cycle_day": cycle["cycle_day"],
+        "predicted_period_onset": cycle["predicted_period_onset"],
+        "recommendations": PHASE_RECOMMENDATIONS.get(cycle["current_phase"], []),
+        "personalization_notes": default_cycle_notes(cycle),
+    }
+    cycle_results.put(engine_key, {**result, "_cycle": cycle})
+
+    if use_ai and cycle["current_phase"]:
+        agent_result = CycleRecommendationsAgentTool(
+            flow_log_entries=entries,
+            model=benji.model,
+            cycle=cycle
         )
-    
-    # Build recommendations list from agent result
-    recommendations = []
-    for rec in agent_result.get("recommendations", []):
-        recommendations.append(CycleRecommendationItem(
-            icon=rec.get("icon"),
-            title=rec.get("title", ""),
-            text=rec.get("text", "")
-        ))
-    
-    return CycleRecommendationsResponse(
-        user_id=user_id,
-        current_phase=agent_result.get("current_phase"),
-        cycle_day=agent_result.get("cycle_day"),
-        predicted_period_onset=agent_result.get("predicted_period_onset"),
-        recommendations=recommendations,
-        personalization_notes=agent_result.get("personalization_notes")
-    )
+        # Keep the engine's defaults if the LLM failed (and don't cache, so a retry can succeed)
+        if agent_result.get("_fallback"):
+            return CycleRecommendationsResponse(**result)
+        result["recommendations"] = [
+            {"icon": rec.get("icon"), "title": rec.get("title", ""), "text": rec.get("text", "")}
+            for rec in agent_result.get("recommendations", [])
+        ]
+        result["personalization_notes"] = agent_result.get("personalization_notes") or result["personalization_notes"]
+        cycle_results.put(key, result)
+
+    return CycleRecommendationsResponse(**result)
 
 
 # ---------- Medication Schedule (structured) ----------
 class DetailedTimeSlot(BaseModel):
     time: str  # "HH:mm"
     label: str  # "8:00 AM"
-    slot: str  # "morning", "afternoon", "evening", "night"
+    slot: str  # "early_morning", "morning", "midday", "afternoon", "evening", "night"
     medications: List[str]
     foodNote: str  # Combined food instructions for meds in this slot
 
@@ -1377,27 +2017,87 @@ class MedicationScheduleResponse(BaseModel):
     personalizationNotes: Optional[str] = None  # AI-generated explanation (only when use_ai=true)
 
 
-@app.get("/medication-schedule/{user_id}", response_model=MedicationScheduleResponse)
-def get_medication_schedule(user_id: str, use_ai: bool = False):
+def parse_clock_time(value: str, field: str) -> str:
+    try:
+        return datetime.strptime(value, "%H:%M").strftime("%H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{field} must be HH:mm")
+
+
+SLEEP_FIELDS = ["waketime", "bedtime", "physical.waketime", "physical.bedtime"]
+DEFAULT_WAKE_TIME = "07:00"
+DEFAULT_SLEEP_TIME = "22:00"
+
+
+def usual_sleep_times(user_id: str, limit: int = 14) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (wake_time, sleep_time) "HH:mm" from the user's most recent check-ins that
+    recorded them; (None, None) when there are none or they don't form a usable day.
+    """
+    from backend.llm.scheduler import waking_window
+
+    try:
+        checkins = fetch_recent_checkins(user_id, limit=limit, fields=SLEEP_FIELDS)
+    except Exception as e:
+        print(f"Warning: failed to read sleep times for {user_id}: {e}")
+        return None, None
+
+    def latest(key: str) -> Optional[str]:
+        for checkin in checkins:
+            physical = checkin.get("physical") if isinstance(checkin.get("physical"), dict) else {}
+            value = checkin.get(key) or physical.get(key)
+            try:
+                return datetime.strptime(str(value), "%H:%M").strftime("%H:%M")
+            except ValueError:
+                continue
+        return None
+
+    wake_time, sleep_time = latest("waketime"), latest("bedtime")
+    try:
+        waking_window(wake_time or DEFAULT_WAKE_TIME, sleep_time or DEFAULT_SLEEP_TIME)
+    except ValueError:
+        return None, None
+    return wake_time, sleep_time
+
+
+@app.get("/medication-schedule/{user_id}", response_model=MedicationScheduleResponse, dependencies=[Depends(authorize_user)])
+def get_medication_schedule(
+    user_id: str,
+    use_ai: bool = False,
+    wake_time: Optional[str] = None,
+    sleep_time: Optional[str] = None,
+):
     """
     Generate a structured medication schedule with contraindication warnings.
     
     Args:
         user_id: User ID to fetch medications for
-        use_ai: If True, use AI agent for personalized scheduling; if False, use rule-based tool
-    
-    Uses MedicationScheduleTool (rule-based) or MedicationScheduleAgentTool (AI) from tools.py.
+        use_ai: If True, add AI personalizationNotes explaining the schedule
+        wake_time / sleep_time: The user's day ("HH:mm"); doses are placed between them.
+            When omitted, the latest waketime/bedtime recorded in check-ins is used,
+            else 07:00 / 22:00. A sleep time before the wake time wraps past midnight.
+    
+    Dose times come from backend.llm.scheduler.solve_schedule (deterministic: parsed
+    frequency, food instructions and interaction spacing); MedicationScheduleNotesTool only writes
+    the notes, so the times are the same with or without use_ai.
     """
-    from backend.llm.tools import MedicationScheduleTool, ContraindicationCheckTool, MedicationScheduleAgentTool
-    
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
+    from backend.llm.tools import ContraindicationCheckTool, MedicationScheduleNotesTool
+    from backend.llm.frequency import parse_frequency
+    from backend.llm.scheduler import food_instruction, solve_schedule, waking_window
+    
+    if wake_time is None or sleep_time is None:
+        usual_wake, usual_sleep = usual_sleep_times(user_id)
+        wake_time = wake_time or usual_wake or DEFAULT_WAKE_TIME
+        sleep_time = sleep_time or usual_sleep or DEFAULT_SLEEP_TIME
+    wake_time = parse_clock_time(wake_time, "wake_time")
+    sleep_time = parse_clock_time(sleep_time, "sleep_time")
+    try:
+        waking_window(wake_time, sleep_time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Get medications from Firestore
-    doc_ref = db.collection("Medications").document(user_id)
-    snap = doc_ref.get()
+    data = doc_cache.get("Medications", user_id)
     
     empty_response = MedicationScheduleResponse(
         timeSlots={"morning": [], "afternoon": [], "evening": [], "night": []},
@@ -1407,26 +2107,22 @@ def get_medication_schedule(user_id: str, use_ai: bool = False):
         personalizationNotes=None
     )
     
-    if not snap.exists:
+    if data is None:
         return empty_response
     
-    data = snap.to_dict()
-    medications = data.get("list", [])
+    medications = medication_list(data)
     
     if not medications:
         return empty_response
     
-    # Build facts dict for the tools
-    facts = {"medications": medications}
-    
-    # Get contraindication warnings from tool (used in both paths)
-    contraindication_result = ContraindicationCheckTool(facts)
+    # Get contraindication warnings from tool
+    contraindication_result = ContraindicationCheckTool({"medications": medications})
     warnings = contraindication_result.get("warnings", [])
     
-    # Build food_instructions from medication foodInstruction field
+    # Build food_instructions from medication foodInstruction field, else the frequency text ("with meals")
     food_instructions = []
     for med in medications:
-        food_inst = med.get("foodInstruction")
+        food_inst = food_instruction(med, parse_frequency(med.get("frequency", "")))
         name = med.get("name", "Unknown")
         if food_inst == "with_food":
             instruction = f"{name}: Take with food"
@@ -1437,173 +2133,34 @@ def get_medication_schedule(user_id: str, use_ai: bool = False):
             if instruction not in food_instructions:
                 food_instructions.append(instruction)
     
-    personalization_notes = None
-    time_slots_detailed = []
-    spacing_notes = []
-    use_ai_time_slots = False  # Flag to track if we used AI's explicit time_slots
+    schedule = solve_schedule(medications, wake_time, sleep_time)
+    spacing_notes = list(schedule["spacing_notes"])
+    if schedule["as_needed"]:
+        spacing_notes.append(f"Not scheduled (take as needed): {', '.join(schedule['as_needed'])}")
+    if schedule["unparsed"]:
+        spacing_notes.append(
+            f"Not scheduled (couldn't read the frequency; check the label or ask your pharmacist): {', '.join(schedule['unparsed'])}"
+        )
     
+    personalization_notes = None
     if use_ai:
-        # --- AI Path: Use MedicationScheduleAgentTool ---
-        agent_result = MedicationScheduleAgentTool(
-            medications=medications,
+        notes_result = MedicationScheduleNotesTool(
+            time_slots=schedule["slots"],
+            spacing_notes=spacing_notes,
             contraindication_warnings=warnings,
-            food_instructions=food_instructions,
             model=benji.model
         )
-        
-        if agent_result.get("_fallback"):
-            # AI failed, fall back to rule-based
-            schedule_result = MedicationScheduleTool(facts)
-        elif agent_result.get("time_slots"):
-            # AI returned explicit time_slots (new format)
-            use_ai_time_slots = True
-            personalization_notes = agent_result.get("personalization_notes")
-            spacing_notes = agent_result.get("spacing_notes", [])
-            
-            # Build timeSlotsDetailed directly from AI's time_slots
-            for slot_data in agent_result["time_slots"]:
-                time_val = slot_data.get("time", "08:00")
-                label = slot_data.get("label", time_val)
-                meds = slot_data.get("medications", [])
-                food_note = slot_data.get("foodNote", "")
-                
-                if not meds:
-                    continue
-                
-                # Determine slot name from time for compatibility
-                try:
-                    hour = int(time_val.split(":")[0])
-                    if hour < 10:
-                        slot_name = "early_morning"
-                    elif hour < 12:
-                        slot_name = "morning"
-                    elif hour < 14:
-                        slot_name = "midday"
-                    elif hour < 17:
-                        slot_name = "afternoon"
-                    elif hour < 20:
-                        slot_name = "evening"
-                    else:
-                        slot_name = "night"
-                except:
-                    slot_name = "custom"
-                
-                time_slots_detailed.append(DetailedTimeSlot(
-                    time=time_val,
-                    label=label,
-                    slot=slot_name,
-                    medications=meds,
-                    foodNote=food_note
-                ))
-            
-            # Sort by time
-            time_slots_detailed.sort(key=lambda x: x.time)
-            
-            # Create schedule_result for backward compatibility (timeSlots dict)
-            schedule_result = {
-                "morning": [],
-                "afternoon": [],
-                "evening": [],
-                "night": [],
-                "spacing_notes": spacing_notes
-            }
-            # Populate the legacy timeSlots from AI result
-            for slot_data in agent_result["time_slots"]:
-                time_val = slot_data.get("time", "08:00")
-                meds = slot_data.get("medications", [])
-                try:
-                    hour = int(time_val.split(":")[0])
-                    if hour < 12:
-                        schedule_result["morning"].extend(meds)
-                    elif hour < 17:
-                        schedule_result["afternoon"].extend(meds)
-                    elif hour < 20:
-                        schedule_result["evening"].extend(meds)
-                    else:
-                        schedule_result["night"].extend(meds)
-                except:
-                    schedule_result["morning"].extend(meds)
+        if notes_result.get("_fallback"):
+            print("Warning: schedule notes unavailable, returning schedule without personalizationNotes")
         else:
-            # AI returned old format (morning/afternoon/evening/night) - use as-is
-            schedule_result = agent_result
-            personalization_notes = agent_result.get("personalization_notes")
-            spacing_notes = agent_result.get("spacing_notes", [])
-    else:
-        # --- Standard Path: Use rule-based MedicationScheduleTool ---
-        schedule_result = MedicationScheduleTool(facts)
-    
-    # Add food_instructions from rule-based tool if present
-    rule_food_instructions = schedule_result.get("food_instructions", [])
-    for instr in rule_food_instructions:
-        if instr not in food_instructions:
-            food_instructions.append(instr)
-    
-    # Build timeSlotsDetailed for calendar-style view (only if not already built from AI time_slots)
-    if not use_ai_time_slots:
-        slot_time_mapping = {
-            "morning": ("08:00", "8:00 AM"),
-            "afternoon": ("12:00", "12:00 PM"),
-            "evening": ("18:00", "6:00 PM"),
-            "night": ("21:00", "9:00 PM")
-        }
-        
-        for slot in ["morning", "afternoon", "evening", "night"]:
-            meds_in_slot = schedule_result.get(slot, [])
-            if not meds_in_slot:
-                continue
-            
-            time_val, label = slot_time_mapping[slot]
-            
-            # Build foodNote for this slot: match med names to food_instructions
-            with_food = []
-            empty_stomach = []
-            
-            for med_str in meds_in_slot:
-                # Extract med name from string like "Lisinopril 10 mg" or "Metformin 500 mg (1st dose)"
-                med_name_lower = med_str.split()[0].lower() if med_str else ""
-                
-                # Check food_instructions list
-                for instruction in food_instructions:
-                    instr_lower = instruction.lower()
-                    if med_name_lower and med_name_lower in instr_lower:
-                        if "with food" in instr_lower:
-                            med_display = med_str.split()[0]  # Just the name
-                            if med_display not in with_food:
-                                with_food.append(med_display)
-                        elif "empty stomach" in instr_lower:
-                            med_display = med_str.split()[0]
-                            if med_display not in empty_stomach:
-                                empty_stomach.append(med_display)
-            
-            # Build the foodNote string
-            food_note_parts = []
-            if with_food:
-                food_note_parts.append(f"With food: {', '.join(with_food)}")
-            if empty_stomach:
-                food_note_parts.append(f"On empty stomach: {', '.join(empty_stomach)}")
-            food_note = ". ".join(food_note_parts)
-            
-            time_slots_detailed.append(DetailedTimeSlot(
-                time=time_val,
-                label=label,
-                slot=slot,
-                medications=meds_in_slot,
-                foodNote=food_note
-            ))
-        
-        spacing_notes = schedule_result.get("spacing_notes", [])
+            personalization_notes = notes_result["personalization_notes"]
     
     return MedicationScheduleResponse(
-        timeSlots={
-            "morning": schedule_result.get("morning", []),
-            "afternoon": schedule_result.get("afternoon", []),
-            "evening": schedule_result.get("evening", []),
-            "night": schedule_result.get("night", [])
-        },
+        timeSlots=schedule["timeSlots"],
         foodInstructions=food_instructions,
         warnings=warnings,
         spacingNotes=spacing_notes,
-        timeSlotsDetailed=time_slots_detailed,
+        timeSlotsDetailed=[DetailedTimeSlot(**slot) for slot in schedule["slots"]],
         personalizationNotes=personalization_notes
     )
 
@@ -1611,7 +2168,7 @@ def get_medication_schedule(user_id: str, use_ai: bool = False):
 # ---------- Medication Compliance ----------
 class ComplianceEntry(BaseModel):
     medication_id: str
-    medication_name: Optional[str] = None
+    medication_name: Optional[str] = None  # sent by the client at save time (no Medications lookup)
     taken: bool
     time_taken: Optional[str] = None  # "HH:mm" format
 
@@ -1630,20 +2187,22 @@ class ComplianceResponse(BaseModel):
 
 class HealthHistoryResponse(BaseModel):
     days: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to load older days
 
 
-@app.get("/compliance/{user_id}")
-def get_compliance(user_id: str, date: Optional[str] = None, from_date: Optional[str] = None, to_date: Optional[str] = None):
+@app.get("/compliance/{user_id}", dependencies=[Depends(authorize_user)])
+def get_compliance(
+    user_id: str,
+    date: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+):
     """
     Get medication compliance for a specific date or date range.
     - If 'date' is provided, return compliance for that single day.
     - If 'from_date' and 'to_date' are provided, return compliance for that range.
     - If no date params, return today's compliance.
     """
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
     
     # Default to today if no date provided
     if not date and not from_date:
@@ -1685,74 +2244,213 @@ def get_compliance(user_id: str, date: Optional[str] = None, from_date: Optional
 
 
 @app.post("/compliance", response_model=ComplianceResponse)
-def save_compliance(payload: ComplianceRequest):
+def save_compliance(payload: ComplianceRequest, session_user_id: Optional[str] = Depends(session_user)):
     """Save/update medication compliance for a specific date."""
-    # Validate user exists
-    user_snap = db.collection("User").document(payload.user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
+    require_user(payload.user_id, session_user_id)
     
     # Document ID is user_id + date for easy lookup
     doc_id = f"{payload.user_id}_{payload.date}"
     
-    # Convert entries to dict list
+    # Convert entries to dict list; the client sends each medication's name with it
     entries_list = [entry.model_dump() for entry in payload.entries]
     
-    # Enrich entries with medication names from Medications collection if not provided
-    meds_doc = db.collection("Medications").document(payload.user_id).get()
-    if meds_doc.exists:
-        meds_data = meds_doc.to_dict()
-        meds_list = {m.get("id"): m.get("name", "Unknown") for m in meds_data.get("list", [])}
-        for entry in entries_list:
-            if not entry.get("medication_name"):
-                entry["medication_name"] = meds_list.get(entry.get("medication_id"), "Unknown")
-    
     # Upsert compliance document
     doc_ref = db.collection("MedicationCompliance").document(doc_id)
     doc_ref.set({
         "user_id": payload.user_id,
         "date": payload.date,
         "entries": entries_list,
-        "updatedAt": datetime.utcnow().isoformat() + "Z"
+        "updatedAt": utc_now_iso()
     })
+    update_user_context(db, payload.user_id, {"compliance": compliance_summary(payload.date, entries_list)})
+    record_compliance(db, payload.user_id, payload.date, entries_list)
     
     return ComplianceResponse(user_id=payload.user_id, date=payload.date, entries=entries_list)
 
 
-@app.get("/health-history/{user_id}", response_model=HealthHistoryResponse)
-def get_health_history(user_id: str, limit: int = 30):
+def load_adherence_months(user_id: str, from_month: str, to_month: str) -> list:
     """
-    Get health history (medication compliance) for the journal.
-    Returns the last N days of compliance data.
+    Adherence month documents in [from_month, to_month]. The first call for a
+    user who predates the bitset store folds their MedicationCompliance docs in.
     """
-    # Validate user exists
-    user_snap = db.collection("User").document(user_id).get()
-    if not user_snap.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Query compliance documents (uses composite index: user_id ASC, date DESC)
-    docs = db.collection("MedicationCompliance") \
+    if (adherence_ref(db, user_id).get().to_dict() or {}).get("complete"):
+        docs = adherence_months_ref(db, user_id) \
+            .where("month", ">=", from_month) \
+            .where("month", "<=", to_month) \
+            .stream()
+        return [doc.to_dict() or {} for doc in docs]
+
+    compliance = db.collection("MedicationCompliance") \
         .where("user_id", "==", user_id) \
-        .order_by("date", direction=firestore.Query.DESCENDING) \
-        .limit(limit) \
+        .select(["date", "entries"]) \
         .stream()
-    
+    months = build_adherence_months(doc.to_dict() or {} for doc in compliance)
+    writer = BatchWriter(db)
+    for month, month_doc in months.items():
+        writer.set(adherence_months_ref(db, user_id).document(month), month_doc)
+    writer.set(adherence_ref(db, user_id), {"complete": True, "builtAt": firestore.SERVER_TIMESTAMP})
+    writer.commit()
+    return [m for month, m in months.items() if from_month <= month <= to_month]
+
+
+@app.get("/adherence/{user_id}", dependencies=[Depends(authorize_user)])
+def get_adherence(
+    user_id: str,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+):
+    """
+    Medication adherence for a date range (default: the last 90 days):
+    overall and per-medication rates, streaks, and a per-day heatmap.
+    """
+
+    today = datetime.utcnow().date()
+    try:
+        end = datetime.strptime(to_date, "%Y-%m-%d").date() if to_date else today
+        start = datetime.strptime(from_date, "%Y-%m-%d").date() if from_date else end - timedelta(days=89)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    if start > end:
+        raise HTTPException(status_code=400, detail="from_date must be on or before to_date")
+    if (end - start).days > 5 * 366:
+        raise HTTPException(status_code=400, detail="Range is limited to 5 years")
+
+    months = load_adherence_months(user_id, start.isoformat()[:7], end.isoformat()[:7])
+    return {"user_id": user_id, **summarize(months, start, end, today=today)}
+
+
+@app.get("/health-history/{user_id}", response_model=HealthHistoryResponse, dependencies=[Depends(authorize_user)])
+def get_health_history(
+    user_id: str,
+    response: Response,
+    limit: int = 30,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+):
+    """
+    Get health history (medication compliance) for the journal.
+    Returns the last N days of compliance data, newest first.
+
+    - `cursor`: a date ("YYYY-MM-DD"); returns the N days before it.
+    - `since`: ISO timestamp; returns only days saved/updated after it, oldest
+      change first (uses composite index: user_id ASC, updatedAt ASC). While
+      more remain the X-Next-Cursor header is set; repeat the request with the
+      same `since` and ?cursor= it.
+    """
+
+    limit = max(1, min(limit, 366))
+    query = db.collection("MedicationCompliance").where("user_id", "==", user_id)
+
+    if since:
+        query = query.where("updatedAt", ">", since).order_by("updatedAt").order_by("__name__")
+        if cursor:
+            updated_at, _, doc_id = cursor.rpartition("|")
+            query = query.start_after({
+                "updatedAt": updated_at,
+                "__name__": db.collection("MedicationCompliance").document(doc_id),
+            })
+    else:
+        # Uses composite index: user_id ASC, date DESC
+        query = query.order_by("date", direction=firestore.Query.DESCENDING)
+        if cursor:
+            query = query.start_after({"date": cursor})
+
     days = []
-    for doc in docs:
+    last_id = None
+    for doc in query.limit(limit).stream():
         d = doc.to_dict()
+        last_id = doc.id
         days.append({
             "date": d.get("date"),
-            "entries": d.get("entries", [])
+            "entries": d.get("entries", []),
+            "updatedAt": d.get("updatedAt"),
         })
-    
-    return HealthHistoryResponse(days=days)
 
-# Add this endpoint after the delete_goal_entry endpoint (around line 1075)
+    next_cursor = None
+    if len(days) == limit:
+        if since:
+            # Delta pages run forward in updatedAt; the cursor travels in a header like /chat-history
+            response.headers["X-Next-Cursor"] = f"{days[-1].get('updatedAt') or ''}|{last_id}"
+        else:
+            next_cursor = days[-1]["date"]
+
+    return HealthHistoryResponse(days=days, next_cursor=next_cursor)
+
+def goal_checkins_ref(goal_id: str):
+    """Goal check-ins live in Goals/{goal_id}/CheckIns, one document per check-in."""
+    return db.collection("Goals").document(goal_id).collection("CheckIns")
+
+
+def _checkin_id_timestamp(check_in_id: str) -> Optional[str]:
+    """Recover createdAt from ids like checkin_20250115_083000_ab12cd34."""
+    try:
+        stamp = datetime.strptime("_".join(check_in_id.split("_")[1:3]), "%Y%m%d_%H%M%S")
+        return stamp.isoformat(timespec="microseconds") + "Z"
+    except (ValueError, IndexError):
+        return None
+
+
+@firestore.transactional
+def _finish_goal_checkin_migration(transaction, goal_ref, moved: int) -> None:
+    """Drop the legacy field and set CheckInCount from the goal as read in this transaction."""
+    snap = goal_ref.get(transaction=transaction)
+    data = snap.to_dict() or {}
+    if "CheckIn" not in data:
+        # Another request already finished this migration
+        return
+    transaction.update(goal_ref, {
+        "CheckIn": firestore.DELETE_FIELD,
+        "CheckInCount": (data.get("CheckInCount") or 0) + moved,
+    })
+
+
+def migrate_goal_checkins(goal_id: str, goal_data: dict) -> int:
+    """
+    Move a goal's legacy `CheckIn` JSON-string array into its CheckIns
+    subcollection and drop the field. Returns the number of check-ins moved.
+
+    Entries without a check_in_id get one derived from their position and
+    content, so a retried or concurrent migration rewrites the same documents.
+    A field that doesn't parse as JSON is left in place.
+    """
+    raw = goal_data.get("CheckIn")
+    if not raw or not isinstance(raw, str):
+        return 0
+    try:
+        entries = json.loads(raw)
+    except json.JSONDecodeError:
+        print(f"Warning: legacy CheckIn on goal {goal_id} is not valid JSON; leaving it in place")
+        return 0
+    if not isinstance(entries, list):
+        entries = [entries]
+
+    goal_ref = db.collection("Goals").document(goal_id)
+    checkins_ref = goal_checkins_ref(goal_id)
+    writer = BatchWriter(db)
+    moved = 0
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        check_in_id = entry.get("check_in_id")
+        if not check_in_id:
+            digest = sha256(json.dumps(entry, sort_keys=True, default=str).encode()).hexdigest()[:8]
+            check_in_id = f"checkin_legacy_{i:04d}_{digest}"
+        entry["check_in_id"] = check_in_id
+        entry.setdefault("createdAt", _checkin_id_timestamp(check_in_id) or utc_now_iso())
+        writer.set(checkins_ref.document(check_in_id), entry)
+        moved += 1
+    # BatchWriter chunks commit independently, so the legacy field is only
+    # dropped once every copy has been written (commit() raises otherwise).
+    writer.commit()
+    _finish_goal_checkin_migration(db.transaction(), goal_ref, moved)
+    return moved
+
+
 @app.post("/goals/{goal_id}/checkins", response_model=AddCheckInResponse)
-def add_check_in_to_goal(goal_id: str, payload: AddCheckInRequest):
+def add_check_in_to_goal(goal_id: str, payload: AddCheckInRequest, session_user_id: Optional[str] = Depends(session_user)):
     """
-    Add a check-in to a specific goal. Stores check-ins as a JSON string array
-    in the CheckIn field.
+    Add a check-in to a specific goal. Each check-in is its own document in
+    Goals/{goal_id}/CheckIns, so an append is O(1) and safe under concurrency.
     """
     # Verify goal exists
     goal_ref = db.collection("Goals").document(goal_id)
@@ -1760,32 +2458,27 @@ def add_check_in_to_goal(goal_id: str, payload: AddCheckInRequest):
     
     if not goal_snap.exists:
         raise HTTPException(status_code=404, detail=f"Goal with ID '{goal_id}' not found")
+    goal_data = goal_snap.to_dict() or {}
+    require_user(goal_data.get("UserID", ""), session_user_id)
     
-    goal_data = goal_snap.to_dict()
+    # Convert any legacy JSON-string check-ins before appending
+    migrate_goal_checkins(goal_id, goal_data)
     
     # Generate check-in ID
     check_in_id = f"checkin_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid4().hex[:8]}"
     
     # Add check_in_id to the data
     payload.check_in_data["check_in_id"] = check_in_id
-    
-    # Get existing check-ins
-    existing_checkins = []
-    if "CheckIn" in goal_data and goal_data["CheckIn"]:
-        try:
-            existing_checkins = json.loads(goal_data["CheckIn"])
-            if not isinstance(existing_checkins, list):
-                existing_checkins = []
-        except json.JSONDecodeError:
-            existing_checkins = []
-    
-    # Append new check-in
-    existing_checkins.append(payload.check_in_data)
-    
-    # Update goal with JSON string
-    goal_ref.update({
-        "CheckIn": json.dumps(existing_checkins)
+    payload.check_in_data["createdAt"] = utc_now_iso()
+    
+    # One batch: the new check-in document plus the goal's running count
+    writer = BatchWriter(db)
+    writer.set(goal_checkins_ref(goal_id).document(check_in_id), payload.check_in_data)
+    writer.update(goal_ref, {
+        "CheckInCount": firestore.Increment(1),
+        "LastCheckInAt": payload.check_in_data["createdAt"],
     })
+    writer.commit()
     
     return AddCheckInResponse(
         goal_id=goal_id,
@@ -1794,15 +2487,25 @@ def add_check_in_to_goal(goal_id: str, payload: AddCheckInRequest):
     )
 
 @app.get("/goals/{goal_id}/checkins", response_model=GetCheckInsResponse)
-def get_check_ins_for_goal(goal_id: str):
+def get_check_ins_for_goal(
+    goal_id: str,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session_user_id: Optional[str] = Depends(session_user),
+):
     """
-    Retrieve all check-ins for a specific goal.
+    Retrieve check-ins for a specific goal, oldest first.
     
     Args:
         goal_id: The ID of the goal to retrieve check-ins from
+        from_date / to_date: Optional "YYYY-MM-DD" (or ISO timestamp) bounds on createdAt
+        limit: Page size (max 500)
+        cursor: next_cursor from the previous page
     
     Returns:
-        GetCheckInsResponse with the goal_id and list of check-ins
+        GetCheckInsResponse with the goal_id, a page of check-ins and next_cursor
     """
     # Verify goal exists
     goal_ref = db.collection("Goals").document(goal_id)
@@ -1810,24 +2513,40 @@ def get_check_ins_for_goal(goal_id: str):
     
     if not goal_snap.exists:
         raise HTTPException(status_code=404, detail=f"Goal with ID '{goal_id}' not found")
+    goal_data = goal_snap.to_dict() or {}
+    require_user(goal_data.get("UserID", ""), session_user_id)
+    
+    migrate_goal_checkins(goal_id, goal_data)
+    
+    limit = max(1, min(limit, 500))
+    query = goal_checkins_ref(goal_id)
+    if from_date:
+        query = query.where("createdAt", ">=", from_date)
+    if to_date:
+        # A bare date includes the whole day
+        to_bound = f"{to_date}T23:59:59.999999Z" if len(to_date) == 10 else to_date
+        query = query.where("createdAt", "<=", to_bound)
+    query = query.order_by("createdAt").order_by("__name__")
+    if cursor:
+        created_at, _, doc_id = cursor.rpartition("|")
+        query = query.start_after({
+            "createdAt": created_at,
+            "__name__": goal_checkins_ref(goal_id).document(doc_id),
+        })
     
-    goal_data = goal_snap.to_dict()
-    
-    # Get CheckIn field and parse it
     check_ins = []
-    if "CheckIn" in goal_data and goal_data["CheckIn"]:
-        try:
-            check_ins = json.loads(goal_data["CheckIn"])
-            # Ensure it's a list
-            if not isinstance(check_ins, list):
-                check_ins = [check_ins]
-        except json.JSONDecodeError:
-            # If CheckIn is not valid JSON, return empty list
-            check_ins = []
+    for doc in query.limit(limit).stream():
+        check_ins.append(doc.to_dict())
+    
+    next_cursor = None
+    if len(check_ins) == limit:
+        last = check_ins[-1]
+        next_cursor = f"{last.get('createdAt', '')}|{last.get('check_in_id', '')}"
     
     return GetCheckInsResponse(
         goal_id=goal_id,
-        check_ins=check_ins
+        check_ins=check_ins,
+        next_cursor=next_cursor
     )
 
 # Favicon: avoid 404 when browser requests /favicon.ico
@@ -0,0 +1,78 @@
+"""
+Medications/{user_id} storage: one map entry per medication.
+
+    UserID     "abc"
+    items      {med_id: {id, name, strength, frequency, foodInstruction, notes, position}}
+    updatedAt  ISO timestamp
+
+Keying by medication id lets the item routes (POST/PATCH/DELETE
+/medications/{user_id}/{med_id}) write a single entry or field with a field
+path (items.`med_id`.name) instead of rewriting the whole list. `position`
+keeps the user's list order.
+
+Older documents hold a `list` array instead; medication_list() reads both,
+and the first item-level write converts a document to the map layout.
+"""
+from typing import Dict, List, Optional
+
+from google.cloud import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+
+
+def medications_ref(db, user_id: str):
+    return db.collection("Medications").document(user_id)
+
+
+def item_field(med_id: str, *fields: str) -> str:
+    """Field path for one medication (or one of its fields), quoted for ids with special characters."""
+    return FieldPath("items", med_id, *fields).to_api_repr()
+
+
+def medication_list(data: Optional[Dict]) -> List[Dict]:
+    """The medication list, in the user's order, from either storage layout."""
+    if not data:
+        return []
+    items = data.get("items")
+    if items is None:
+        return list(data.get("list") or [])
+    ordered = sorted(items.values(), key=lambda m: (m.get("position", 0), m.get("name") or ""))
+    return [{k: v for k, v in m.items() if k != "position"} for m in ordered]
+
+
+def items_from_list(meds: List[Dict]) -> Dict[str, Dict]:
+    return {m["id"]: {**m, "position": i} for i, m in enumerate(meds) if m.get("id")}
+
+
+def next_position(data: Optional[Dict]) -> int:
+    items = (data or {}).get("items") or {}
+    return max((m.get("position", 0) for m in items.values()), default=-1) + 1
+
+
+def ensure_items(db, user_id: str, data: Optional[Dict]) -> Optional[Dict]:
+    """Convert a legacy `list` document to the map layout; returns the (possibly converted) data."""
+    if data is None or data.get("items") is not None:
+        return data
+    items = items_from_list(data.get("list") or [])
+    medications_ref(db, user_id).set({"items": items, "list": firestore.DELETE_FIELD}, merge=True)
+    return {**{k: v for k, v in data.items() if k != "list"}, "items": items}
+
+
+@firestore.transactional
+def create_item(transaction, ref, user_id: str, item: Dict, updated_at: str) -> Optional[Dict]:
+    """
+    Add one medication unless its id is already taken, checked against the
+    document as read inside the transaction (not a cached copy). Sets the
+    item's position. Returns the document data after the write, or None.
+    """
+    snap = ref.get(transaction=transaction)
+    data = (snap.to_dict() or {}) if snap.exists else {"UserID": user_id}
+    items = data.get("items") or {}
+    if item["id"] in items:
+        return None
+    item = {**item, "position": next_position(data)}
+    transaction.set(
+        ref,
+        {"UserID": user_id, "items": {item["id"]: item}, "updatedAt": updated_at},
+        merge=["UserID", item_field(item["id"]), "updatedAt"],
+    )
+    return {**data, "items": {**items, item["id"]: item}, "updatedAt": updated_at}
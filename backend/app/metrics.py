@@ -0,0 +1,64 @@
+"""
+Check-in metrics, defined once for CheckInStats, CheckInSeries and /insights.
+
+Each metric has a short name (CheckInStats buckets, rolling aggregates and
+the /insights report use it), the column it is stored under in the
+CheckInSeries month documents, and the check-in fields it is read from: the
+first of those with a numeric value wins. Booleans, empty strings and
+anything float() rejects count as missing.
+"""
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+# name -> (CheckInSeries column, check-in fields it is read from)
+METRICS = {
+    "sleep": ("sleepScore", ("sleepScore", "sleep")),
+    "stress": ("stress", ("stress",)),
+    "mood": ("mood", ("mood",)),
+    "dayScore": ("dayScore", ("dayScore",)),
+    "fitnessScore": ("fitnessScore", ("fitnessScore", "fitness")),
+    "drinkScore": ("drinkScore", ("drinkScore",)),
+    "eatScore": ("eatScore", ("eatScore",)),
+    "wellnessScore": ("wellnessScore", ("wellnessScore",)),
+}
+
+# name -> CheckInSeries column
+COLUMNS = {name: column for name, (column, _) in METRICS.items()}
+# CheckInSeries column -> check-in fields
+SERIES_COLUMNS = {column: fields for column, fields in METRICS.values()}
+
+
+def to_number(value) -> Optional[float]:
+    if isinstance(value, bool) or value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def first_number(checkin: Dict, fields: Iterable[str]) -> Optional[float]:
+    """First numeric value among `fields` of a check-in, else None."""
+    return next((v for v in (to_number(checkin.get(f)) for f in fields) if v is not None), None)
+
+
+def checkin_values(checkin: Dict) -> Dict[str, float]:
+    """{metric name: value} for the metrics the check-in has a number for."""
+    out = {}
+    for name, (_, fields) in METRICS.items():
+        value = first_number(checkin, fields)
+        if value is not None:
+            out[name] = value
+    return out
+
+
+def checkin_day(checkin: Dict) -> Optional[str]:
+    """YYYY-MM-DD the check-in counts for: its local `date`, else its createdAt day."""
+    day = str(checkin.get("date") or checkin.get("createdAt") or "")[:10]
+    if len(day) != 10 or day[4] != "-" or day[7] != "-":
+        return None
+    try:
+        date.fromisoformat(day)
+    except ValueError:
+        return None
+    return day
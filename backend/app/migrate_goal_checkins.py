@@ -0,0 +1,25 @@
+"""
+One-off migration: convert every goal's legacy `CheckIn` JSON string into
+documents in Goals/{goal_id}/CheckIns.
+
+Run from the repo root:  python -m backend.app.migrate_goal_checkins
+Safe to re-run; goals without a `CheckIn` string are skipped.
+"""
+from backend.app.main import db, migrate_goal_checkins
+
+
+def main():
+    goals_seen = 0
+    goals_migrated = 0
+    checkins_moved = 0
+    for doc in db.collection("Goals").stream():
+        goals_seen += 1
+        moved = migrate_goal_checkins(doc.id, doc.to_dict() or {})
+        if moved:
+            goals_migrated += 1
+            checkins_moved += moved
+    print(f"Scanned {goals_seen} goals; migrated {checkins_moved} check-ins across {goals_migrated} goals.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Columnar check-in time series: CheckInSeries/{user_id}/Months/{YYYY-MM}.
+
+Each month document stores parallel arrays, one slot per check-in, sorted by day:
+
+    month   "2026-10"
+    day     [1, 1, 3, ...]          day of month
+    ids     ["abc", "def", ...]     CheckIns document ids (dedupe key)
+    sleepScore, stress, mood, dayScore, fitnessScore,
+    drinkScore, eatScore, wellnessScore: [3, null, 4, ...]
+
+POST /checkins appends to the current month in a small transaction. Analyses
+read one document per month (a year is 12 reads) and get typed columns
+without re-parsing free-form check-in dicts.
+
+The parent CheckInSeries/{user_id} document is marked `complete` once the
+user's existing check-ins have been copied in. Until then,
+load_checkin_series() in main.py reads the CheckIns collection once and
+writes the months itself; python -m backend.app.backfill_checkin_series
+does the same for every user ahead of time.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from google.cloud import firestore
+
+from backend.app.metrics import SERIES_COLUMNS, checkin_day, first_number
+
+SOURCE_FIELDS = sorted({f for fields in SERIES_COLUMNS.values() for f in fields} | {"date", "createdAt"})
+
+
+def series_ref(db, user_id: str):
+    return db.collection("CheckInSeries").document(user_id)
+
+
+def months_ref(db, user_id: str):
+    return series_ref(db, user_id).collection("Months")
+
+
+def checkin_row(checkin: Dict) -> Optional[Dict]:
+    """{"month", "day", column: value...} for one check-in; None without a usable date."""
+    day = checkin_day(checkin)
+    if day is None:
+        return None
+    row = {"month": day[:7], "day": int(day[8:])}
+    for column, fields in SERIES_COLUMNS.items():
+        row[column] = first_number(checkin, fields)
+    return row
+
+
+def empty_month(month: str) -> Dict:
+    return {"month": month, "day": [], "ids": [], **{c: [] for c in SERIES_COLUMNS}}
+
+
+def insert_row(month_doc: Dict, checkin_id: str, row: Dict) -> bool:
+    """Insert one row into a month document in day order; False if the id is already there."""
+    if checkin_id in month_doc["ids"]:
+        return False
+    # Insert after existing rows for the same day (bisect_right on day)
+    pos = len(month_doc["day"])
+    while pos > 0 and month_doc["day"][pos - 1] > row["day"]:
+        pos -= 1
+    month_doc["day"].insert(pos, row["day"])
+    month_doc["ids"].insert(pos, checkin_id)
+    for column in SERIES_COLUMNS:
+        month_doc.setdefault(column, [None] * (len(month_doc["day"]) - 1)).insert(pos, row[column])
+    return True
+
+
+@firestore.transactional
+def _append(transaction, ref, checkin_id: str, row: Dict) -> None:
+    snap = ref.get(transaction=transaction)
+    month_doc = (snap.to_dict() or {}) if snap.exists else empty_month(row["month"])
+    if insert_row(month_doc, checkin_id, row):
+        month_doc["updatedAt"] = firestore.SERVER_TIMESTAMP
+        transaction.set(ref, month_doc)
+
+
+def append_checkin(db, user_id: str, checkin_id: str, checkin: Dict) -> None:
+    row = checkin_row(checkin)
+    if row is None:
+        return
+    try:
+        _append(db.transaction(), months_ref(db, user_id).document(row["month"]), checkin_id, row)
+    except Exception as e:
+        print(f"Warning: failed to append check-in to CheckInSeries for {user_id}: {e}")
+
+
+def build_months(checkins: Iterable) -> Dict[str, Dict]:
+    """Month documents from (checkin_id, checkin) pairs."""
+    months: Dict[str, Dict] = {}
+    for checkin_id, checkin in checkins:
+        row = checkin_row(checkin)
+        if row is None:
+            continue
+        month_doc = months.setdefault(row["month"], empty_month(row["month"]))
+        insert_row(month_doc, checkin_id, row)
+    return months
+
+
+def read_months(db, user_id: str, from_month: Optional[str] = None, to_month: Optional[str] = None) -> List[Dict]:
+    """Month documents in [from_month, to_month] (YYYY-MM), oldest first: one read per month."""
+    query = months_ref(db, user_id)
+    if from_month:
+        query = query.where("month", ">=", from_month)
+    if to_month:
+        query = query.where("month", "<=", to_month)
+    docs = [doc.to_dict() or {} for doc in query.stream()]
+    return sorted(docs, key=lambda d: d.get("month", ""))
+
+
+def month_rows(month_docs: List[Dict]) -> List[Dict]:
+    """Expand month documents into per-check-in dicts ({"date", "id", column: value})."""
+    rows = []
+    for m in month_docs:
+        for i, day in enumerate(m.get("day") or []):
+            row = {"date": f"{m['month']}-{day:02d}", "id": m["ids"][i]}
+            for column in SERIES_COLUMNS:
+                values = m.get(column) or []
+                row[column] = values[i] if i < len(values) else None
+            rows.append(row)
+    return rows
@@ -0,0 +1,127 @@
+"""
+UserContext/{user_id}: one denormalized document with everything the LLM
+routes need about a user.
+
+    profile          {BenjiFacts, Height, Weight}
+    goals            {goal_id: compact goal}   (new-format goal documents)
+    legacy_goals     accepted goals from the legacy Goals/{user_id} doc
+    recent_checkins  newest-first list, at most RECENT_CHECKINS entries
+    medications      [{id, name, strength, frequency}]
+    menstrual        {loggedDays, lastLoggedDate}
+    compliance       {date, taken, total} for the last saved day
+    complete         True once the document was built from all sources
+
+The write routes update their own slice with merge writes, so reading the
+context is a single get instead of 4-5 queries. A document only becomes
+authoritative once it is `complete`; until then the LLM routes read the
+source collections and build it with build_user_context().
+"""
+from typing import Dict, List, Optional, Tuple
+
+from google.cloud import firestore
+
+RECENT_CHECKINS = 7
+
+GOAL_FIELDS = ("Specific", "Measurable", "Time_Bound", "type", "EndDate", "Description")
+
+
+def user_context_ref(db, user_id: str):
+    return db.collection("UserContext").document(user_id)
+
+
+def compact_profile(profile: Optional[Dict]) -> Optional[Dict]:
+    if profile is None:
+        return None
+    return {k: profile.get(k) for k in ("BenjiFacts", "Height", "Weight") if k in profile}
+
+
+def compact_goal(goal: Dict) -> Dict:
+    return {k: goal[k] for k in GOAL_FIELDS if goal.get(k) is not None}
+
+
+def compact_checkin(checkin_id: str, checkin: Dict, fields: List[str]) -> Dict:
+    entry = {k: checkin[k] for k in fields if checkin.get(k) is not None}
+    entry["id"] = checkin_id
+    return entry
+
+
+def medication_summary(meds: List[Dict]) -> List[Dict]:
+    return [
+        {k: m.get(k) for k in ("id", "name", "strength", "frequency") if m.get(k) is not None}
+        for m in meds or []
+    ]
+
+
+def menstrual_summary(entries: Dict) -> Dict:
+    logged = sorted(d for d, e in (entries or {}).items() if e)
+    return {"loggedDays": len(logged), "lastLoggedDate": logged[-1] if logged else None}
+
+
+def compliance_summary(date: str, entries: List[Dict]) -> Dict:
+    return {"date": date, "taken": sum(1 for e in entries if e.get("taken")), "total": len(entries)}
+
+
+def update_user_context(db, user_id: str, fields: Dict, replace: bool = False) -> None:
+    """
+    Merge one slice (e.g. {"profile": {...}}) into the user's context document.
+    With replace=True each given top-level field is overwritten as a whole
+    (nested keys missing from `fields` are dropped); other fields are kept.
+    """
+    data = {**fields, "updatedAt": firestore.SERVER_TIMESTAMP}
+    try:
+        user_context_ref(db, user_id).set(data, merge=list(data) if replace else True)
+    except Exception as e:
+        # The context is derived data; never fail the originating write over it.
+        print(f"Warning: failed to update UserContext for {user_id}: {e}")
+
+
+@firestore.transactional
+def _push_checkin(transaction, ref, entry: Dict) -> None:
+    snap = ref.get(transaction=transaction)
+    current = []
+    if snap.exists:
+        current = (snap.to_dict() or {}).get("recent_checkins") or []
+    recent = [entry] + [c for c in current if c.get("id") != entry["id"]]
+    transaction.set(
+        ref,
+        {"recent_checkins": recent[:RECENT_CHECKINS], "updatedAt": firestore.SERVER_TIMESTAMP},
+        merge=True,
+    )
+
+
+def push_recent_checkin(db, user_id: str, entry: Dict) -> None:
+    """Prepend a new check-in to recent_checkins, keeping the newest RECENT_CHECKINS."""
+    try:
+        _push_checkin(db.transaction(), user_context_ref(db, user_id), entry)
+    except Exception as e:
+        print(f"Warning: failed to push check-in to UserContext for {user_id}: {e}")
+
+
+def build_user_context(profile, goals: List[Dict], legacy_goals: List, checkins: List[Dict], medications: List[Dict]) -> Dict:
+    """Full context document from source data; goals carry goal_id, check-ins are already compact."""
+    return {
+        "profile": compact_profile(profile),
+        "goals": {g["goal_id"]: compact_goal(g) for g in goals if g.get("goal_id")},
+        "legacy_goals": legacy_goals or [],
+        "recent_checkins": checkins[:RECENT_CHECKINS],
+        "medications": medication_summary(medications),
+        "complete": True,
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def context_facts(ctx: Dict) -> Tuple[Dict, List[Dict]]:
+    """(user_facts, recent_checkins) from a context document, in the shape the LLM helpers expect."""
+    user_facts = {}
+    profile = ctx.get("profile")
+    if profile is not None:
+        user_facts = {
+            "benji_facts": profile.get("BenjiFacts"),
+            "height": profile.get("Height"),
+            "weight": profile.get("Weight"),
+        }
+    goals = [{**g, "goal_id": goal_id} for goal_id, g in (ctx.get("goals") or {}).items()]
+    goals_array = goals or ctx.get("legacy_goals") or []
+    if goals_array:
+        user_facts["goals"] = goals_array
+    return user_facts, list(ctx.get("recent_checkins") or [])
@@ -0,0 +1,71 @@
+"""
+Microbenchmark for the drug interaction index and the drug-name resolver.
+
+    python -m backend.llm.bench_interactions [--repeat N]
+
+Times index compilation, then InteractionIndex.check() on medication lists
+of increasing size built from index terms mixed with doses and unknown
+names. Matching is cached per name, so "cold" (first sight of each name)
+and "warm" (repeat check of the same list) are reported separately.
+Finally times DrugNameResolver.resolve() (uncached) on brand names, salts
+and typos.
+"""
+import argparse
+import random
+import time
+
+from backend.llm.drug_names import DrugNameResolver
+from backend.llm.interactions import InteractionIndex
+
+SIZES = (5, 20, 100, 500)
+RESOLVE_SAMPLES = ("Lipitor 20mg", "atorvastatin calcium", "metformin ER 500 mg", "metfromin", "Bactrim DS", "Fish oil")
+
+
+def _med_list(terms, size: int, rng: random.Random):
+    names = []
+    for k in range(size):
+        if rng.random() < 0.7:
+            names.append(f"{rng.choice(terms).title()} {rng.choice((5, 10, 20, 50, 100, 500))} mg")
+        else:
+            names.append(f"Unlisted Supplement {k}")
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = InteractionIndex.load()
+    compile_ms = (time.perf_counter() - start) * 1000
+    pairs = sum(len(p) for p in index.partners.values()) // 2
+    print(f"compiled {len(index.terms)} terms / {pairs} interacting pairs in {compile_ms:.1f} ms")
+
+    rng = random.Random(0)
+    terms = sorted(index.terms)
+    print(f"{'meds':>6} {'found':>6} {'cold us':>10} {'warm us':>10}")
+    for size in SIZES:
+        names = _med_list(terms, size, rng)
+        index._matches.clear()
+        start = time.perf_counter()
+        found = index.check(names)
+        cold_us = (time.perf_counter() - start) * 1e6
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            index.check(names)
+        warm_us = (time.perf_counter() - start) * 1e6 / args.repeat
+        print(f"{size:>6} {len(found):>6} {cold_us:>10.1f} {warm_us:>10.1f}")
+
+    resolver = DrugNameResolver.load()
+    print(f"\n{'name':<24} {'ingredients':<32} {'us':>8}")
+    for text in RESOLVE_SAMPLES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            ids = resolver.resolve(text)
+        us = (time.perf_counter() - start) * 1e6 / args.repeat
+        print(f"{text:<24} {', '.join(ids) or '-':<32} {us:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Semantic response cache for BenjiLLM.chat.
+
+Near-duplicate general questions ("how much water should I drink?",
+"what should I eat before a run") are answered from memory instead of
+calling Gemini again. Questions are turned into sparse hashed vectors
+(word unigrams/bigrams + character trigrams), and a lookup returns the
+closest cached answer whose cosine similarity clears the threshold.
+
+Only turns that do not depend on personal facts should ever be stored here;
+use is_generic_question() to decide that before calling lookup()/store().
+"""
+import math
+import re
+import threading
+import time
+import zlib
+from hashlib import sha256
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+N_FEATURES = 2 ** 14
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "be", "to", "of", "in", "on", "for",
+    "and", "or", "do", "does", "did", "can", "could", "should", "would", "will",
+    "i", "you", "it", "that", "this", "what", "how", "much", "many", "some",
+    "any", "with", "about", "if", "at", "by", "as", "so", "there", "please",
+    "benji", "hey", "hi",
+}
+
+# Anything that points at the user's own data, history, or current situation
+# makes the answer personal and therefore not shareable across users. This
+# fails closed: any first-person word, or any mention of a condition, drug
+# use or diet, keeps the turn out of the cache.
+PERSONAL_PATTERN = re.compile(
+    r"\b(i|i'm|im|i've|ive|i'd|i'll|my|mine|me|myself|"
+    r"we|we're|we've|us|our|ours|ourselves|"
+    r"yesterday|today|tonight|this week|last week|"
+    r"goal|goals|check-?in|check-?ins|score|scores|progress|streak|"
+    r"schedule|medication|medications|meds|dose|cycle|period|weight|bmi|"
+    r"take|taking|took|prescribed|diagnosed|condition|disease|disorder|surgery|"
+    r"pregnant|pregnancy|breastfeeding|nursing|allergic|allergy|allergies|"
+    r"diabetes|diabetic|insulin|hypertension|blood pressure|asthma|kidney|liver|heart|"
+    r"vegan|vegetarian|celiac|gluten|lactose)\b",
+    re.IGNORECASE,
+)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def is_generic_question(user_input: str, history: list = None) -> bool:
+    """True if the answer to this turn should not depend on who is asking."""
+    if history:
+        # Follow-ups are interpreted against the conversation so far.
+        return False
+    text = (user_input or "").strip()
+    if not text or len(text) > 300:
+        return False
+    return PERSONAL_PATTERN.search(text) is None
+
+
+def _tokens(text: str) -> list:
+    words = _TOKEN_PATTERN.findall(text.lower())
+    return [w.strip("'") for w in words if w.strip("'") and w.strip("'") not in STOPWORDS]
+
+
+def _bucket(feature: str) -> tuple:
+    h = zlib.crc32(feature.encode("utf-8"))
+    sign = 1.0 if (h >> 31) & 1 else -1.0
+    return h % N_FEATURES, sign
+
+
+def vectorize(text: str) -> Dict[int, float]:
+    """Hashing-vectorizer embedding: sparse, L2-normalised {index: weight}."""
+    words = _tokens(text)
+    features = []
+    features.extend(f"w:{w}" for w in words)
+    features.extend(f"b:{a}_{b}" for a, b in zip(words, words[1:]))
+    for w in words:
+        padded = f"#{w}#"
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+
+    vec: Dict[int, float] = {}
+    for feature in features:
+        idx, sign = _bucket(feature)
+        vec[idx] = vec.get(idx, 0.0) + sign
+
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    if not norm:
+        return {}
+    return {k: v / norm for k, v in vec.items() if v}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class SemanticResponseCache:
+    """
+    Bounded in-process cache of (question vector -> answer).
+
+    Entries expire after ttl_seconds and the least recently used entry is
+    evicted once max_entries is reached. Each entry tracks its own hit count.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 512, ttl_seconds: int = 24 * 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _expire(self, now: float) -> None:
+        expired = [k for k, e in self._entries.items() if now - e["created_at"] > self.ttl_seconds]
+        for k in expired:
+            del self._entries[k]
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Return the cached answer for the closest matching question, if any."""
+        vec = vectorize(question)
+        if not vec:
+            return None
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            best_key, best_sim = None, 0.0
+            for key, entry in self._entries.items():
+                sim = cosine(vec, entry["vector"])
+                if sim > best_sim:
+                    best_key, best_sim = key, sim
+            if best_key is None or best_sim < self.threshold:
+                self.misses += 1
+                return None
+            entry = self._entries[best_key]
+            entry["hits"] += 1
+            entry["last_hit_at"] = now
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return entry["answer"]
+
+    def store(self, question: str, answer: str) -> None:
+        vec = vectorize(question)
+        if not vec or not answer:
+            return
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[self._next_id] = {
+                "question": question,
+                "answer": answer,
+                "vector": vec,
+                "created_at": now,
+                "last_hit_at": None,
+                "hits": 0,
+            }
+            self._next_id += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Global hit/miss counters plus per-entry hit stats (most used first).
+        Entries are identified by a hash of the question, never its text:
+        cached questions come from other users.
+        """
+        with self._lock:
+            entries = [
+                {
+                    "question_hash": sha256(e["question"].encode("utf-8")).hexdigest()[:12],
+                    "hits": e["hits"],
+                    "created_at": e["created_at"],
+                    "last_hit_at": e["last_hit_at"],
+                }
+                for e in self._entries.values()
+            ]
+            total = self.hits + self.misses
+            return {
+                "size": len(entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "threshold": self.threshold,
+                "entries": sorted(entries, key=lambda e: e["hits"], reverse=True),
+            }
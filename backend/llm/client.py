@@ -11,10 +11,16 @@ from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 
 from backend.llm.tools import MANDATORY_TOOLS, OPTIONAL_TOOLS, BenjiGoalsTool, UpcomingPlanTool
 from backend.llm.instructions import format_agent_instructions, get_system_prompt_base
+from backend.llm.cache import SemanticResponseCache, is_generic_question
+from backend.llm.questions import QUESTION_CATALOG, select_questions
 
 # Base prompt; full personality/scope/constraints come from instructions.py (MCP-style)
 SYSTEM_PROMPT = get_system_prompt_base()
 
+# How much retrieved user history goes into a chat prompt
+RETRIEVAL_TOP_K = int(os.getenv("BENJI_RETRIEVAL_TOP_K", "6"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("BENJI_RETRIEVAL_TOKEN_BUDGET", "400"))
+
 def format_user_facts(user_facts: dict) -> str:
     if not user_facts:
         return "No background facts provided."
@@ -59,8 +65,15 @@ def format_user_facts(user_facts: dict) -> str:
         if latest.get("fitnessNotes"):
             lines.append(f"  - Fitness Notes: {latest['fitnessNotes']}")
     
+    # Retrieved history snippets (replace the goals/check-in dump when present)
+    relevant = user_facts.get("relevant_history")
+    if relevant:
+        lines.append("\nRelevant history (most related to the question first):")
+        for snippet in relevant:
+            lines.append(f"  - {snippet}")
+
     # Note about check-in awareness
-    if latest or goals:
+    if latest or goals or relevant:
         lines.append("\nNote: Reference the user's goals and recent check-in data when relevant (e.g., 'your sleep score', 'your Run 5K goal').")
     
     return "User background facts:\n" + "\n".join(lines)
@@ -77,6 +90,15 @@ class BenjiLLM:
         self.mandatory_tools = MANDATORY_TOOLS
         self.optional_tools = OPTIONAL_TOOLS
         self.history = []
+
+        # Opt-in semantic cache for generic (non-personal) chat turns
+        self.response_cache = None
+        if os.getenv("BENJI_SEMANTIC_CACHE", "").lower() in ("1", "true", "yes"):
+            self.response_cache = SemanticResponseCache(
+                threshold=float(os.getenv("BENJI_SEMANTIC_CACHE_THRESHOLD", "0.8")),
+                max_entries=int(os.getenv("BENJI_SEMANTIC_CACHE_SIZE", "512")),
+                ttl_seconds=int(os.getenv("BENJI_SEMANTIC_CACHE_TTL", str(24 * 3600))),
+            )
     
     def select_optional_tools(self, user_input: str) -> list:
         """
@@ -186,14 +208,14 @@ class BenjiLLM:
                 # Fallback: pass user_facts (tool will use defaults)
                 return tool(self.user_facts)
 
-            elif name == "trend_analysis":
-                # Use checkin_history from user_facts if available
+            elif name in ("trend_analysis", "weekly_recap", "emotion_eval"):
+                # Rolling aggregates (CheckInStats) first; raw check-in history as fallback
+                trends = self.user_facts.get("checkin_trends")
                 history = self.user_facts.get("checkin_history") or self.user_facts.get("recent_checkins")
+                mapped_history = []
                 if history and isinstance(history, list):
                     mapped_history = [self._map_checkin_to_tool_format(c) for c in history]
-                    return tool(mapped_history)
-                # Fallback: pass empty list
-                return tool([])
+                return tool(mapped_history, trends)
 
             else:
                 return tool(self.user_facts)
@@ -351,8 +373,30 @@ class BenjiLLM:
 
         return plan
     
-    def chat(self, user_input: str, history: list = None, user_facts: dict = None):
-        history = history or []
+    def _prepare_chat(self, user_input: str, history: list, user_facts: dict, history_index):
+        """
+        Build the prompt for one chat turn.
+
+        Returns (cached_reply, messages, cacheable). cached_reply is set when the
+        semantic cache already answered the turn, in which case messages is None.
+        """
+        # Generic questions are answered without personal facts so the reply can be shared
+        cacheable = self.response_cache is not None and is_generic_question(user_input, history)
+        if cacheable:
+            cached = self.response_cache.lookup(user_input)
+            if cached is not None:
+                return cached, None, cacheable
+            user_facts = None
+        elif history_index is not None and user_facts:
+            user_facts = {
+                k: v for k, v in user_facts.items()
+                if k not in ("goals", "latest_checkin", "recent_checkins", "checkin_history")
+            }
+            user_facts["relevant_history"] = history_index.search(
+                user_input,
+                k=RETRIEVAL_TOP_K,
+                token_budget=RETRIEVAL_TOKEN_BUDGET,
+            )
 
         # Structured Agent Protocols: personality, scope, and constraints from instructions.py
         agent_instructions = format_agent_instructions()
@@ -364,15 +408,52 @@ class BenjiLLM:
             *history,
             HumanMessage(content=user_input),
         ]
+        return None, messages, cacheable
 
-        response = self.model.invoke(messages)
-
+    def _finish_chat(self, user_input: str, reply: str, cacheable: bool) -> None:
         # Save to internal memory if needed
         self.history.append(HumanMessage(content=user_input))
-        self.history.append(AIMessage(content=response.content))
+        self.history.append(AIMessage(content=reply))
 
+        if cacheable:
+            self.response_cache.store(user_input, reply)
+
+    def chat(self, user_input: str, history: list = None, user_facts: dict = None, history_index=None):
+        """
+        Answer one chat turn.
+
+        If a per-user HistoryIndex is passed, only the top-k snippets relevant to
+        user_input (within a token budget) are put in the prompt instead of every
+        goal and the latest check-in.
+        """
+        history = history or []
+        cached, messages, cacheable = self._prepare_chat(user_input, history, user_facts, history_index)
+        if cached is not None:
+            return cached
+
+        response = self.model.invoke(messages)
+        self._finish_chat(user_input, response.content, cacheable)
         return response.content
 
+    def chat_stream(self, user_input: str, history: list = None, user_facts: dict = None, history_index=None):
+        """
+        Same as chat(), but yields the reply in chunks as Gemini produces them.
+        Used by the WebSocket chat session.
+        """
+        history = history or []
+        cached, messages, cacheable = self._prepare_chat(user_input, history, user_facts, history_index)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        for chunk in self.model.stream(messages):
+            text = chunk.content if isinstance(chunk.content, str) else ""
+            if text:
+                parts.append(text)
+                yield text
+        self._finish_chat(user_input, "".join(parts), cacheable)
+
     def checkin_recommendations(self, user_facts: dict, user_message: str = None) -> str:
         """
         Generate personalized check-in focus areas based on user profile, goals, and optional message.
@@ -482,47 +563,9 @@ Format example:
     def categorize_questions(self) -> Dict[str, list[str]]:
         """
         Define all possible questions mapped to categories/goals.
-        This mirrors the JS payload structure.
+        This mirrors the JS payload structure (catalog lives in backend/llm/questions.py).
         """
-        return {
-            "overall_day": [
-                "How would you rate your day from 1-10?",
-                "Any notes about your day?",
-                "What tags describe your day?",
-                "Rate your eating, drinking, and sleep today."
-            ],
-            "fitness": [
-                "Rate your overall fitness today.",
-                "Any notes on your fitness?",
-                "Rate your fitness goal performance."
-            ],
-            "wellness": [
-                "Rate your wellness today.",
-                "Any notes on wellness?",
-                "Rate your stress level.",
-                "How is your mood today?"
-            ],
-            "menstrual": [
-                "When did your last period start?",
-                "What is your current flow?",
-                "Which symptoms are present?",
-                "Rate your cramp pain.",
-                "Do you have any unusual discharge?",
-                "Are you taking oral contraceptives?",
-                "Which type of OCP?"
-            ],
-            # Goal-specific questions
-            "weight-loss": ["Calories consumed?", "Training type?", "Current weight?"],
-            "weight-gain": ["Calories consumed?", "Current weight?"],
-            "body-recomp": ["Calories?", "Protein?", "Hydration?", "Carbs?", "Fats?", "Fiber?", "Weight?"],
-            "strength": ["Calories?", "Protein?", "Carbs?", "Fat?", "Hydration?", "Weight?"],
-            "cardio": ["Activity type?", "Volume?", "Distance?", "Pace?", "Intensity?"],
-            "general": ["Activity?", "Method?", "Weight?"],
-            "mobility": ["Sessions?", "Tightness?", "Stiffness?", "Soreness?", "Looseness?", "Pain level?", "Pain location?", "ROM notes?"],
-            "injury": ["Pain intensity?", "Pain location?", "Pain type?", "Pain frequency?", "Stiffness?", "Function score?", "Activity tolerance?"],
-            "rehab": ["Training minutes?", "Sessions?", "After effects?", "Any flare-ups?", "Flare-up triggers?", "Flare-up description?"],
-            "performance": ["Minutes trained?", "Intensity?", "Difficulty?", "Soreness?", "Fatigue?"]
-        }
+        return {category: list(questions) for category, questions in QUESTION_CATALOG.items()}
 
     def select_relevant_questions(
             self,
@@ -530,72 +573,19 @@ Format example:
             user_facts: Optional[Dict] = None
         ) -> Dict[str, list[str]]:
         """
-            Generate relevant check-in questions for a user based on their active goals and context.
+            Relevant check-in questions for a user based on their active goals and context.
+
+            Selection is deterministic (backend.llm.questions.select_questions); no model call.
 
             Args:
-                facts: Existing user facts/context (optional)
-                active_goals: List of user's active goals
-                model: LLM object with `invoke(messages)` method
+                active_goals: List of user's active goals (catalog keys or goal text)
+                user_facts: Existing user facts/context (optional; benji_facts, goals)
 
             Returns:
                 Dict mapping category -> list of questions (JSON)
             """
-        questions = self.categorize_questions()
-        relevant_questions = {}
-        
-        facts_str = json.dumps(user_facts, indent=2)
-        if len(facts_str) > 2000:
-            facts_str = facts_str[:2000] + " … truncated …"
-
-        questions_str = json.dumps(questions, indent=2)
-        if len(questions_str) > 2000:
-            questions_str = questions_str[:2000] + " … truncated …"
-            # Build the prompt
-        prompt = (
-            "You are a professional fitness and wellness coach.\n\n"
-            "Your task is to generate relevant check-in questions for a user.\n"
-            "Consider their active goals and any known user facts/context.\n\n"
-            "Rules:\n"
-            "- Include at least the core categories: overall_day, fitness, wellness, menstrual.\n"
-            "- Include goal-specific questions only for the user's active goals.\n"
-            "- Return STRICT JSON ONLY, in the same format as the example below.\n\n"
-            f"EXAMPLE FORMAT:\n{json.dumps({k: [] for k in questions.keys()}, indent=2)}\n\n"
-            "Only output valid JSON, nothing else.\n\n"
-            f"USER ACTIVE GOALS:\n{json.dumps(active_goals, indent=2)}\n\n"
-            f"USER FACTS (if any):\n{facts_str}\n\n"
-            f"POSSIBLE QUESTIONS TO CHOOSE FROM:\n{questions_str}"
-        )
-        # Build the message structure
-        messages = [
-            SystemMessage(content="Output only valid JSON."),
-            HumanMessage(content=prompt)
-        ]
-
-        
-        # Invoke the model
-        response = self.model.invoke(messages)
-        raw = response.content.strip()
-
-        print(raw)
-        # Remove markdown fences if present
-        if raw.startswith("```"):
-            lines = raw.split("\n")[1:-1]
-            raw = "\n".join(lines)
-
-        # Parse JSON
-        try:
-            questions_json = json.loads(raw)
-        except json.JSONDecodeError:
-            # fallback: return empty lists for each category
-            questions_json = {
-                "overall_day": [],
-                "fitness": [],
-                "wellness": [],
-                "menstrual": [],
-                **{goal: [] for goal in active_goals}
-            }
-
-        return questions_json
+        questions, _ = select_questions(active_goals, user_facts)
+        return {category: list(qs) for category, qs in questions.items()}
 
     def checkin_sense(self, checkin_data: dict, user_facts: dict, recent_checkins: list = None) -> list:
         """
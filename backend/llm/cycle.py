@@ -0,0 +1,205 @@
+"""
+Deterministic menstrual cycle engine.
+
+Phase, cycle day and the next-period estimate are plain date arithmetic
+over the flow log, so they are computed here rather than asked of the LLM:
+
+- A period starts on a flow day (light/medium/heavy/clots) that comes more
+  than PERIOD_GAP_DAYS after the previous flow day.
+- Cycle length is the gap between consecutive starts; the user's mean and
+  standard deviation over their last few plausible cycles drive both the
+  onset range and the phase boundaries (ovulation ~14 days before the
+  next period).
+
+CycleRecommendationsAgentTool only writes the recommendation wording around
+these numbers, and the endpoint caches results per flow-log version.
+"""
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+FLOW_LEVELS = {"light", "medium", "heavy", "clots"}
+PERIOD_GAP_DAYS = 5
+DEFAULT_CYCLE_LENGTH = 28.0
+DEFAULT_CYCLE_STD = 2.0
+DEFAULT_PERIOD_LENGTH = 5
+MIN_CYCLE, MAX_CYCLE = 15, 60
+RECENT_CYCLES = 6
+LUTEAL_LENGTH = 14
+
+PHASE_RECOMMENDATIONS = {
+    "Menstrual": [
+        {"icon": "fa-mug-hot", "title": "Warmth and Rest", "text": "A heating pad or warm tea can ease cramps. Keep movement gentle today."},
+        {"icon": "fa-droplet", "title": "Hydrate", "text": "Drink water steadily through the day to help with bloating and fatigue."},
+        {"icon": "fa-carrot", "title": "Iron-Rich Foods", "text": "Leafy greens, beans and lean proteins help replace iron lost during your period."},
+    ],
+    "Follicular": [
+        {"icon": "fa-dumbbell", "title": "Build Intensity", "text": "Energy often rises this week, a good time for strength or interval sessions."},
+        {"icon": "fa-apple-whole", "title": "Fresh, Light Meals", "text": "Lean proteins, vegetables and fermented foods support your rising energy."},
+        {"icon": "fa-brain", "title": "Start Something New", "text": "Focus tends to be sharp now; schedule planning or learning tasks."},
+    ],
+    "Ovulation": [
+        {"icon": "fa-fire", "title": "Peak Energy", "text": "If you feel strong, this is a good window for your hardest workouts."},
+        {"icon": "fa-people-group", "title": "Connect", "text": "Social energy is often high; plan time with friends or team activities."},
+        {"icon": "fa-droplet", "title": "Stay Hydrated", "text": "Body temperature can rise slightly; keep a water bottle nearby."},
+    ],
+    "Luteal": [
+        {"icon": "fa-spa", "title": "Wind Down Gradually", "text": "Energy may dip as your period approaches; yoga, walks and mobility work fit well."},
+        {"icon": "fa-moon", "title": "Prioritize Sleep", "text": "Aim for a consistent bedtime and limit caffeine after noon."},
+        {"icon": "fa-wheat-awn", "title": "Complex Carbs", "text": "Cravings are common; whole grains and magnesium-rich foods help keep energy steady."},
+    ],
+}
+
+DISCLAIMER = "This is an estimate; cycles can vary. Talk to a healthcare provider about any concerns."
+
+
+def flow_days(entries: Dict) -> List[date]:
+    days = []
+    for day, entry in (entries or {}).items():
+        if not isinstance(entry, dict) or str(entry.get("flow") or "").lower() not in FLOW_LEVELS:
+            continue
+        try:
+            days.append(date.fromisoformat(day))
+        except ValueError:
+            continue
+    return sorted(days)
+
+
+def period_starts(days: List[date]) -> List[date]:
+    starts = []
+    previous = None
+    for d in days:
+        if previous is None or (d - previous).days > PERIOD_GAP_DAYS:
+            starts.append(d)
+        previous = d
+    return starts
+
+
+def _period_lengths(days: List[date], starts: List[date]) -> List[int]:
+    """Length of each period (first to last flow day before the next start)."""
+    lengths = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else None
+        in_period = [d for d in days if d >= start and (end is None or d < end)]
+        lengths.append((in_period[-1] - start).days + 1)
+    return lengths
+
+
+def phase_for_day(cycle_day: int, cycle_length: float, period_length: int) -> str:
+    ovulation_day = max(period_length + 2, round(cycle_length) - LUTEAL_LENGTH)
+    if cycle_day <= period_length:
+        return "Menstrual"
+    if cycle_day < ovulation_day - 1:
+        return "Follicular"
+    if cycle_day <= ovulation_day + 1:
+        return "Ovulation"
+    return "Luteal"
+
+
+def analyze_cycle(entries: Dict, today: Optional[date] = None) -> Dict:
+    """
+    Cycle statistics and today's position. Keys:
+    current_phase, cycle_day, predicted_period_onset ("A to B" range),
+    predicted_onset_earliest/latest, last_period_start, cycle_length_mean,
+    cycle_length_std, cycles_observed, period_length, overdue_days.
+    """
+    today = today or date.today()
+    days = flow_days(entries)
+    starts = [s for s in period_starts(days) if s <= today]
+    result = {
+        "current_phase": None,
+        "cycle_day": None,
+        "predicted_period_onset": None,
+        "predicted_onset_earliest": None,
+        "predicted_onset_latest": None,
+        "last_period_start": None,
+        "cycle_length_mean": None,
+        "cycle_length_std": None,
+        "cycles_observed": 0,
+        "period_length": None,
+        "overdue_days": 0,
+    }
+    if not starts:
+        return result
+
+    lengths = [(b - a).days for a, b in zip(starts, starts[1:])]
+    lengths = [n for n in lengths if MIN_CYCLE <= n <= MAX_CYCLE][-RECENT_CYCLES:]
+    if lengths:
+        mean = sum(lengths) / len(lengths)
+        std = math.sqrt(sum((n - mean) ** 2 for n in lengths) / len(lengths)) if len(lengths) > 1 else DEFAULT_CYCLE_STD
+    else:
+        mean, std = DEFAULT_CYCLE_LENGTH, DEFAULT_CYCLE_STD
+    spread = max(1, round(std))
+
+    period_lengths = _period_lengths([d for d in days if d <= today], starts)[-RECENT_CYCLES:]
+    period_length = round(sum(period_lengths) / len(period_lengths)) if period_lengths else DEFAULT_PERIOD_LENGTH
+    period_length = min(max(period_length, 2), 8)
+
+    last_start = starts[-1]
+    elapsed = (today - last_start).days
+    cycle_length = round(mean)
+    predicted = last_start + timedelta(days=cycle_length)
+    overdue = max(0, (today - (predicted + timedelta(days=spread))).days)
+    if overdue:
+        # Late or unlogged period: project forward whole cycles so the estimate stays in the future
+        skipped = elapsed // cycle_length
+        predicted = last_start + timedelta(days=cycle_length * (skipped + 1))
+        cycle_day = elapsed - cycle_length * skipped + 1
+    else:
+        cycle_day = elapsed + 1
+
+    earliest = predicted - timedelta(days=spread)
+    latest = predicted + timedelta(days=spread)
+    result.update({
+        "current_phase": phase_for_day(cycle_day, mean, period_length),
+        "cycle_day": cycle_day,
+        "predicted_period_onset": f"{earliest.isoformat()} to {latest.isoformat()}",
+        "predicted_onset_earliest": earliest.isoformat(),
+        "predicted_onset_latest": latest.isoformat(),
+        "last_period_start": last_start.isoformat(),
+        "cycle_length_mean": round(mean, 1),
+        "cycle_length_std": round(std, 1),
+        "cycles_observed": len(lengths),
+        "period_length": period_length,
+        "overdue_days": overdue,
+    })
+    return result
+
+
+def default_notes(cycle: Dict) -> str:
+    if not cycle.get("current_phase"):
+        return "Log your flow on the calendar to get personalized phase and period predictions from Benji."
+    basis = (
+        f"your average cycle of {cycle['cycle_length_mean']:g} days"
+        if cycle.get("cycles_observed") else "a typical 28-day cycle"
+    )
+    return (
+        f"You appear to be in the {cycle['current_phase']} phase (day {cycle['cycle_day']}), "
+        f"based on {basis}. Your next period is expected around {cycle['predicted_period_onset']}. "
+        + DISCLAIMER
+    )
+
+
+class CycleResultCache:
+    """Small LRU of computed results keyed by (user_id, log version, day)."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value: Dict) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
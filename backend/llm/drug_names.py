@@ -0,0 +1,169 @@
+"""
+Drug-name resolver: free text ("Lipitor 20mg", "atorvastatin calcium",
+"metformin ER", "metfromin") -> canonical ingredient ids ("atorvastatin").
+
+data/drug_names.json maps each ingredient id (its normalized generic name)
+to synonyms and brand names, plus brand combinations that contain several
+ingredients. Resolution walks the normalized tokens left to right:
+
+1. Longest exact phrase match (up to 3 words) against every known name.
+2. Salt words right after a match are part of it ("losartan potassium"),
+   so they are not read as a separate potassium supplement.
+3. Otherwise a token of 4+ letters may be a typo of a single-word name:
+   trigram similarity (Dice) shortlists candidates, and one is accepted only
+   if it is within MAX_EDITS edits (1 for tokens under 6 letters) and no other
+   name is as close. A drug missing from the data usually shares a stem with
+   a known one (azithromycin / clarithromycin, pravastatin / lovastatin), so
+   similarity alone is not enough to call it a match.
+
+Dose numbers, units and formulation words ("ER", "tablet") never match.
+The medication routes store the result on each item as `ingredientIds`, so
+tools only resolve names for documents written before that field existed.
+"""
+import json
+import os
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+from backend.llm.interactions import normalize_name
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "drug_names.json")
+MAX_NAME_WORDS = 3
+MIN_FUZZY_LENGTH = 4
+MIN_SIMILARITY = 0.4  # shortlist only; the edit-distance check decides
+MAX_EDITS = 2
+
+NOISE_WORDS = {
+    "tablet", "tablets", "capsule", "capsules", "oral", "extended", "release", "delayed",
+    "chewable", "solution", "suspension", "injection", "daily", "units", "dose", "generic",
+    "strength", "supplement", "vitamin",
+}
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (an adjacent transposition is one edit),
+    or limit + 1 once it is certain to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+class DrugNameResolver:
+    def __init__(self, names: Dict[str, List[str]], salts: Set[str], timing: Optional[Dict[str, str]] = None):
+        self.names = names
+        self.salts = salts
+        self.timing = timing or {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, List[str]] = {}
+        for name in names:
+            if " " in name:
+                continue
+            grams = trigrams(name)
+            self._grams[name] = grams
+            for g in grams:
+                self._postings.setdefault(g, []).append(name)
+
+    @classmethod
+    def from_data(cls, data: Dict) -> "DrugNameResolver":
+        names: Dict[str, List[str]] = {}
+        for ingredient, synonyms in (data.get("ingredients") or {}).items():
+            ingredient_id = " ".join(normalize_name(ingredient))
+            for name in [ingredient] + list(synonyms):
+                names.setdefault(" ".join(normalize_name(name)), [ingredient_id])
+        for name, ingredients in (data.get("combinations") or {}).items():
+            names[" ".join(normalize_name(name))] = [" ".join(normalize_name(i)) for i in ingredients]
+        salts = {" ".join(normalize_name(s)) for s in data.get("salts") or []}
+        return cls(names, salts, data.get("timing"))
+
+    @classmethod
+    def load(cls, path: str = DATA_PATH) -> "DrugNameResolver":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_data(json.load(f))
+
+    def _fuzzy(self, token: str) -> Optional[str]:
+        grams = trigrams(token)
+        shared = Counter(name for g in grams for name in self._postings.get(g, ()))
+        limit = MAX_EDITS if len(token) >= 6 else 1
+        best, best_distance, tied = None, limit + 1, False
+        for name, count in shared.items():
+            if 2 * count / (len(grams) + len(self._grams[name])) < MIN_SIMILARITY:
+                continue
+            distance = edit_distance(token, name, limit)
+            if distance < best_distance:
+                best, best_distance, tied = name, distance, False
+            elif distance == best_distance and distance <= limit and self.names[name] != self.names[best]:
+                tied = True
+        # Two different ingredients equally close: too ambiguous to guess
+        return None if tied else best
+
+    def resolve(self, text: str) -> List[str]:
+        """Ingredient ids found in `text`, in order of appearance, without duplicates."""
+        tokens = normalize_name(text)
+        found: List[str] = []
+        after_match = False
+        i = 0
+        while i < len(tokens):
+            if after_match and tokens[i] in self.salts:
+                i += 1
+                continue
+            for n in range(min(MAX_NAME_WORDS, len(tokens) - i), 0, -1):
+                ids = self.names.get(" ".join(tokens[i:i + n]))
+                if ids:
+                    found.extend(ids)
+                    i += n
+                    after_match = True
+                    break
+            else:
+                token = tokens[i]
+                match = None
+                if len(token) >= MIN_FUZZY_LENGTH and token.isalpha() and token not in NOISE_WORDS:
+                    match = self._fuzzy(token)
+                if match:
+                    found.extend(self.names[match])
+                after_match = bool(match)
+                i += 1
+        return list(dict.fromkeys(found))
+
+    def timing_hint(self, ingredient_ids: List[str]) -> Optional[str]:
+        """Usual time-of-day slot for the first ingredient that has one (e.g. levothyroxine -> morning)."""
+        return next((self.timing[i] for i in ingredient_ids if i in self.timing), None)
+
+
+@lru_cache(maxsize=1)
+def get_resolver() -> DrugNameResolver:
+    return DrugNameResolver.load()
+
+
+@lru_cache(maxsize=4096)
+def _resolve_cached(text: str) -> tuple:
+    return tuple(get_resolver().resolve(text))
+
+
+def resolve_name(text: str) -> List[str]:
+    return list(_resolve_cached(text or ""))
+
+
+def ingredient_ids(med: Dict) -> List[str]:
+    """A medication's stored ingredientIds, or resolved from its name for older items."""
+    stored = med.get("ingredientIds")
+    return list(stored) if stored is not None else resolve_name(med.get("name", ""))
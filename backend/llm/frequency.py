@@ -0,0 +1,229 @@
+"""
+Frequency-phrase parser for medication timing.
+
+Turns the free-text frequency on a medication ("BID", "q8h", "every 12
+hours", "twice daily with breakfast and dinner", "1 tab at 9pm", "PRN",
+"twice a week") into a dose spec:
+
+    {"count": 2, "interval_hours": None, "anchors": ["breakfast", "dinner"],
+     "times": [], "food": "with_food", "as_needed": False, "every_n_days": 1,
+     "parsed": True}
+
+- count: doses on each dosing day
+- interval_hours: fixed spacing ("q8h", "every 8 hours"), else None
+- anchors: meal / time-of-day names in the order they appear (wake, breakfast,
+  morning, lunch, midday, afternoon, dinner, evening, bedtime, night)
+- times: explicit clock times in minutes after midnight ("at 9pm" -> 1260)
+- food: "with_food" / "empty_stomach" when the phrase says so, else None
+- every_n_days: days between dosing days: 2 for "every other day" / "q48h",
+  7 for "weekly", 4 for "twice a week", 14 for "every 2 weeks", 90 for
+  "every 3 months"
+- parsed: False when the phrase says something the parser can't turn into a
+  schedule ("every 1.5 days", "yearly", "2 tablets"); count is then 0, so
+  callers must not place any doses for it. An empty frequency means once a day.
+
+A count ("3 times", "twice", "2x", "BID") is per day only when no period is
+given or the period is a day; "twice a week" / "3x monthly" become one dose
+every round(7 / n) / round(30 / n) days. Durations ("for 7 days", "x 10
+days") are ignored.
+
+The patterns are compiled once. Text is normalized first (lowercase, dots in
+"b.i.d." / "a.m." dropped, punctuation to spaces), and results are cached
+per normalized phrase, so each distinct phrase is parsed once per process.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "once": 1, "twice": 2, "thrice": 3}
+LATIN_COUNTS = {"qd": 1, "od": 1, "qday": 1, "daily": 1, "bid": 2, "tid": 3, "qid": 4}
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 30}
+PERIOD_WORDS = {
+    "daily": "day", "d": "day", "weekly": "week", "wk": "week", "monthly": "month", "mo": "month",
+}
+
+_DOTS = re.compile(r"(?<!\d)\.|\.(?!\d)")
+_PUNCT = re.compile(r"[^a-z0-9:\-./ ]+")
+_SPACES = re.compile(r"\s+")
+
+_AS_NEEDED = re.compile(r"\b(?:prn|as needed|when needed|if needed|as required)\b")
+_INTERVAL = re.compile(
+    r"\b(?:q\s*(\d+(?:\.\d+)?)\s*h(?:rs?|ours?)?"
+    r"|every\s+(\d+(?:\.\d+)?)(?:\s*(?:-|to)\s*(\d+(?:\.\d+)?))?\s*(?:h|hrs?|hours?))\b"
+)
+# "3 times", "2x", "twice"; a bare "2 daily" is a tablet count, not a frequency
+_TIMES = re.compile(r"\b(\d+|one|two|three|four|five|six)\s*(?:x|times?)\b|\b(once|twice|thrice)\b")
+_LATIN = re.compile(r"\b(qd|od|qday|daily|bid|tid|qid)\b")
+# The period a count applies to: "a day", "per week", "/day", "monthly"
+_PERIOD = re.compile(
+    r"(?:\b(?:a|an|per|each|every)\s+|/\s*)(day|week|month|year)\b"
+    r"|/\s*(d|wk|mo)\b|\b(daily|weekly|monthly)\b"
+)
+_EVERY_N = re.compile(
+    r"\b(every other day|alternate days|qod)\b"
+    r"|\bevery\s+(\d+|two|three|four|five|six)\s+(days?|weeks?|months?)\b"
+)
+_DURATION = re.compile(r"\b(?:for|x)\s+(?:a|an|one|two|three|four|five|six|seven|ten|\d+)\s+(?:days?|weeks?|months?)\b")
+# Phrases that would otherwise fall back to a daily dose
+_UNREADABLE = re.compile(r"\bevery\s+\d+\.\d+\s*(?:days?|weeks?|months?)\b|\b(?:years?|yearly|annually)\b")
+_CLOCK = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b")
+_ANCHORS = (
+    ("wake", re.compile(r"\b(?:on|upon|after) waking\b|\bwhen (?:you )?wake\b|\bfirst thing\b")),
+    ("breakfast", re.compile(r"\bbreakfast\b")),
+    ("morning", re.compile(r"\bmornings?\b|\bqam\b|\bin the am\b|\bam\b")),
+    ("lunch", re.compile(r"\blunch\b")),
+    ("midday", re.compile(r"\bnoon\b|\bmidday\b|\bmid day\b")),
+    ("afternoon", re.compile(r"\bafternoons?\b")),
+    ("dinner", re.compile(r"\bdinner\b|\bsupper\b")),
+    ("evening", re.compile(r"\bevenings?\b|\bqpm\b|\bin the pm\b|\bpm\b")),
+    ("bedtime", re.compile(r"\bbedtime\b|\bbefore (?:bed|sleep)\b|\bqhs\b|\bhs\b|\bat bed\b")),
+    ("night", re.compile(r"\bnight(?:ly)?\b")),
+)
+_ALL_MEALS = re.compile(r"\b(?:with|after|before) (?:each |every |all )?meals\b|\bwith each meal\b|\bac\b|\bpc\b")
+_EMPTY_STOMACH = re.compile(r"\bempty stomach\b|\bwithout food\b|\bbefore (?:food|eating|meals?|breakfast|lunch|dinner)\b|\bac\b")
+_WITH_FOOD = re.compile(
+    r"\bwith (?:food|a meal|meals?|each meal|milk|breakfast|lunch|dinner|supper)\b"
+    r"|\bafter (?:food|eating|meals?|breakfast|lunch|dinner)\b|\bpc\b"
+)
+
+
+def normalize_frequency(text: str) -> str:
+    text = _DOTS.sub("", (text or "").lower())
+    return _SPACES.sub(" ", _PUNCT.sub(" ", text)).strip()
+
+
+def _number(word: str) -> int:
+    return int(word) if word.isdigit() else NUMBER_WORDS[word]
+
+
+def _count(text: str) -> Optional[int]:
+    match = _TIMES.search(text)
+    if match:
+        return _number(match.group(1) or match.group(2))
+    match = _LATIN.search(text)
+    return LATIN_COUNTS[match.group(1)] if match else None
+
+
+def _period(text: str) -> Optional[str]:
+    match = _PERIOD.search(text)
+    if not match:
+        return None
+    word = match.group(1) or match.group(2) or match.group(3)
+    return PERIOD_WORDS.get(word, word)
+
+
+def _interval(text: str) -> Optional[float]:
+    match = _INTERVAL.search(text)
+    if not match:
+        return None
+    # "every 4-6 hours" -> the longer spacing
+    hours = [float(g) for g in match.groups() if g]
+    return max(hours) if hours else None
+
+
+def _every_n_days(text: str, interval: Optional[float]) -> Optional[int]:
+    """Spacing from "every other day" / "every 3 weeks" / "q48h", else None."""
+    match = _EVERY_N.search(text)
+    if match:
+        if match.group(1):
+            return 2
+        unit = match.group(3).rstrip("s")
+        return max(_number(match.group(2)), 1) * PERIOD_DAYS[unit]
+    if interval and interval >= 24:
+        # "q48h", "every 72 hours"
+        return max(1, round(interval / 24))
+    return None
+
+
+def _clock_times(text: str) -> List[int]:
+    times = []
+    for match in _CLOCK.finditer(text):
+        if match.group(3):
+            hour, minute = int(match.group(1)) % 12, int(match.group(2) or 0)
+            if match.group(3) == "pm":
+                hour += 12
+        else:
+            hour, minute = int(match.group(4)), int(match.group(5))
+        if hour < 24 and minute < 60:
+            times.append(hour * 60 + minute)
+    return sorted(set(times))
+
+
+def _anchors(text: str) -> List[str]:
+    # Clock times ("9 pm") are not time-of-day anchors
+    text = _CLOCK.sub(" ", text)
+    found = []
+    for name, pattern in _ANCHORS:
+        match = pattern.search(text)
+        if match:
+            found.append((match.start(), name))
+    anchors = [name for _, name in sorted(found)]
+    if not anchors and _ALL_MEALS.search(text):
+        anchors = ["breakfast", "lunch", "dinner"]
+    return anchors
+
+
+def _food(text: str) -> Optional[str]:
+    if _EMPTY_STOMACH.search(text):
+        return "empty_stomach"
+    if _WITH_FOOD.search(text) or _ALL_MEALS.search(text):
+        return "with_food"
+    return None
+
+
+def _unparsed(text: str, as_needed: bool) -> tuple:
+    return (0, None, (), (), _food(text), as_needed, 1, False)
+
+
+@lru_cache(maxsize=2048)
+def _parse_cached(text: str) -> tuple:
+    text = _SPACES.sub(" ", _DURATION.sub(" ", text)).strip()
+    as_needed = bool(_AS_NEEDED.search(text))
+    if _UNREADABLE.search(text):
+        return _unparsed(text, as_needed)
+    period = _period(text)
+    if period == "year":
+        return _unparsed(text, as_needed)
+    interval = _interval(text)
+    times = _clock_times(text)
+    anchors = _anchors(text)
+    count = _count(text)
+    every_n_days = _every_n_days(text, interval)
+
+    if period in ("week", "month"):
+        # "twice a week" -> one dose every 4 days; "weekly" / "every month" -> every 7 / 30
+        every_n_days = max(1, round(PERIOD_DAYS[period] / count)) if count else PERIOD_DAYS[period]
+        count = 1
+
+    if count is None:
+        if interval:
+            count = max(1, round(24 / interval))
+        elif times or anchors:
+            count = max(len(times), len(anchors))
+        elif every_n_days or period == "day" or as_needed or not text:
+            count = 1
+        else:
+            return _unparsed(text, as_needed)
+    if interval and interval >= 24:
+        # A day or more apart is a once-daily dose on every_n_days, not an intra-day spacing
+        interval = None
+        count = 1
+    if len(anchors) > count and set(anchors) >= {"breakfast", "lunch", "dinner"}:
+        # "twice daily with meals"
+        anchors = ["breakfast", "dinner"] if count == 2 else anchors[:count]
+    return (count, interval, tuple(anchors), tuple(times), _food(text), as_needed, every_n_days or 1, True)
+
+
+def parse_frequency(text: str) -> Dict:
+    """Dose spec for a frequency phrase (see module docstring)."""
+    count, interval, anchors, times, food, as_needed, every_n_days, parsed = _parse_cached(normalize_frequency(text))
+    return {
+        "count": count,
+        "interval_hours": interval,
+        "anchors": list(anchors),
+        "times": list(times),
+        "food": food,
+        "as_needed": as_needed,
+        "every_n_days": every_n_days,
+        "parsed": parsed,
+    }
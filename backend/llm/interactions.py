@@ -0,0 +1,122 @@
+"""
+Drug interaction index for ContraindicationCheckTool.
+
+data/drug_interactions.json lists drug classes (class -> member names) and
+interaction rules between classes or single drugs. Absorption interactions
+also carry spacing_minutes (how far apart the doses must be taken; 0 when
+spacing doesn't help), which the medication scheduler enforces. The file is
+compiled once per process into a term -> {partner term: rule} map, so
+checking a list is one dictionary probe per pair of matched terms instead of
+a scan over every rule with substring tests.
+
+Medication names are matched on normalized tokens: lowercased, punctuation
+dropped, then every 1-3 word run is looked up ("Potassium Chloride ER 10 mEq"
+matches both "potassium" and "potassium chloride"). Dose numbers and units
+never match a term, so they need no special handling.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "drug_interactions.json")
+MAX_TERM_WORDS = 3
+SEVERITY_RANK = {"major": 0, "moderate": 1, "minor": 2}
+
+_APOSTROPHES = re.compile(r"['’]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> List[str]:
+    """Lowercase word tokens of a drug name ("St. John's Wort" -> ["st", "johns", "wort"])."""
+    return _NON_ALNUM.sub(" ", _APOSTROPHES.sub("", (name or "").lower())).split()
+
+
+def _term(name: str) -> str:
+    return " ".join(normalize_name(name))
+
+
+class InteractionIndex:
+    def __init__(self, partners: Dict[str, Dict[str, Dict]]):
+        self.partners = partners
+        self.terms = frozenset(partners)
+        self._matches: Dict[str, FrozenSet[str]] = {}
+
+    @classmethod
+    def from_data(cls, data: Dict) -> "InteractionIndex":
+        classes = {name: {_term(m) for m in members} for name, members in (data.get("classes") or {}).items()}
+
+        def expand(refs: Iterable[str]) -> set:
+            # A reference is a class name, or else a single drug name
+            out = set()
+            for ref in refs:
+                out |= classes.get(ref, {_term(ref)})
+            return out
+
+        partners: Dict[str, Dict[str, Dict]] = {}
+        for rule in data.get("interactions") or []:
+            info = {
+                "severity": rule.get("severity", "moderate"),
+                "reason": rule.get("reason", ""),
+                "spacing_minutes": int(rule.get("spacing_minutes") or 0),
+            }
+            for a in expand(rule.get("a") or []):
+                for b in expand(rule.get("b") or []):
+                    if a == b:
+                        continue
+                    for x, y in ((a, b), (b, a)):
+                        current = partners.setdefault(x, {}).get(y)
+                        # Keep the most severe rule for a pair
+                        if current is None or SEVERITY_RANK.get(info["severity"], 9) < SEVERITY_RANK.get(current["severity"], 9):
+                            partners[x][y] = info
+        return cls(partners)
+
+    @classmethod
+    def load(cls, path: str = DATA_PATH) -> "InteractionIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_data(json.load(f))
+
+    def match(self, name: str) -> FrozenSet[str]:
+        """Index terms found in a medication name."""
+        cached = self._matches.get(name)
+        if cached is not None:
+            return cached
+        tokens = normalize_name(name)
+        found = set()
+        for n in range(1, MAX_TERM_WORDS + 1):
+            for i in range(len(tokens) - n + 1):
+                term = " ".join(tokens[i:i + n])
+                if term in self.terms:
+                    found.add(term)
+        result = frozenset(found)
+        if len(self._matches) < 10000:
+            self._matches[name] = result
+        return result
+
+    def check(self, names: List[str]) -> List[Tuple[int, int, Dict]]:
+        """(i, j, rule) for every interacting pair of list positions, i < j, most severe rule per pair."""
+        return self.check_terms([self.match(n) for n in names])
+
+    def check_terms(self, term_sets: List[Iterable[str]]) -> List[Tuple[int, int, Dict]]:
+        """Same as check(), for already matched terms (e.g. stored ingredient ids) per list position."""
+        matched = [(i, [t for t in terms if t in self.terms]) for i, terms in enumerate(term_sets)]
+        matched = [(i, terms) for i, terms in matched if terms]
+        found = []
+        for (i, terms_i), (j, terms_j) in combinations(matched, 2):
+            best: Optional[Dict] = None
+            for a in terms_i:
+                partners = self.partners[a]
+                for b in terms_j:
+                    rule = partners.get(b)
+                    if rule is not None and (best is None or SEVERITY_RANK.get(rule["severity"], 9) < SEVERITY_RANK.get(best["severity"], 9)):
+                        best = rule
+            if best is not None:
+                found.append((i, j, best))
+        return found
+
+
+@lru_cache(maxsize=1)
+def get_index() -> InteractionIndex:
+    return InteractionIndex.load()
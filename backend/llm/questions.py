@@ -0,0 +1,165 @@
+"""
+Deterministic check-in question selection for /relevant-questions.
+
+The catalog is fixed, so choosing a subset is a lookup rather than an LLM
+call:
+
+- Core categories (overall_day, fitness, wellness) are always included;
+  menstrual is included unless the profile says the user is male or doesn't
+  track their cycle.
+- Goal-specific categories come from the active goals sent by the page,
+  the user's goal documents (a `type` that is already a catalog key, or the
+  goal text of fitness goals) and the onboarding goal in BenjiFacts. Free
+  text is classified with FitnessGoalTypeTool.
+
+A bundle (questions + ETag) is built once per category combination and then
+served from memory, so repeat requests only cost the profile read.
+"""
+import json
+import threading
+from functools import lru_cache
+from hashlib import sha256
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.llm.tools import FitnessGoalTypeTool
+
+QUESTION_CATALOG = {
+    "overall_day": [
+        "How would you rate your day from 1-10?",
+        "Any notes about your day?",
+        "What tags describe your day?",
+        "Rate your eating, drinking, and sleep today."
+    ],
+    "fitness": [
+        "Rate your overall fitness today.",
+        "Any notes on your fitness?",
+        "Rate your fitness goal performance."
+    ],
+    "wellness": [
+        "Rate your wellness today.",
+        "Any notes on wellness?",
+        "Rate your stress level.",
+        "How is your mood today?"
+    ],
+    "menstrual": [
+        "When did your last period start?",
+        "What is your current flow?",
+        "Which symptoms are present?",
+        "Rate your cramp pain.",
+        "Do you have any unusual discharge?",
+        "Are you taking oral contraceptives?",
+        "Which type of OCP?"
+    ],
+    # Goal-specific questions
+    "weight-loss": ["Calories consumed?", "Training type?", "Current weight?"],
+    "weight-gain": ["Calories consumed?", "Current weight?"],
+    "body-recomp": ["Calories?", "Protein?", "Hydration?", "Carbs?", "Fats?", "Fiber?", "Weight?"],
+    "strength": ["Calories?", "Protein?", "Carbs?", "Fat?", "Hydration?", "Weight?"],
+    "cardio": ["Activity type?", "Volume?", "Distance?", "Pace?", "Intensity?"],
+    "general": ["Activity?", "Method?", "Weight?"],
+    "mobility": ["Sessions?", "Tightness?", "Stiffness?", "Soreness?", "Looseness?", "Pain level?", "Pain location?", "ROM notes?"],
+    "injury": ["Pain intensity?", "Pain location?", "Pain type?", "Pain frequency?", "Stiffness?", "Function score?", "Activity tolerance?"],
+    "rehab": ["Training minutes?", "Sessions?", "After effects?", "Any flare-ups?", "Flare-up triggers?", "Flare-up description?"],
+    "performance": ["Minutes trained?", "Intensity?", "Difficulty?", "Soreness?", "Fatigue?"]
+}
+
+CORE_CATEGORIES = ("overall_day", "fitness", "wellness")
+GOAL_CATEGORIES = tuple(k for k in QUESTION_CATALOG if k not in CORE_CATEGORIES and k != "menstrual")
+
+# FitnessGoalTypeTool goal_type -> catalog categories
+GOAL_TYPE_CATEGORIES = {
+    "weight_loss": ("weight-loss",),
+    "weight_gain": ("weight-gain",),
+    "body_recomposition": ("body-recomp",),
+    "muscle_strength": ("strength",),
+    "cardio_endurance": ("cardio",),
+    "mobility": ("mobility",),
+    "injury_recovery": ("injury", "rehab"),
+    "sport_performance": ("performance",),
+    "general_fitness": ("general",),
+}
+NO_CYCLE_TRACKING = {"no", "not applicable"}
+
+
+def _parse_facts(benji_facts) -> Dict:
+    if isinstance(benji_facts, dict):
+        return benji_facts
+    if isinstance(benji_facts, str):
+        try:
+            parsed = json.loads(benji_facts)
+            return parsed if isinstance(parsed, dict) else {}
+        except json.JSONDecodeError:
+            return {}
+    return {}
+
+
+@lru_cache(maxsize=1024)
+def classify_goal(text: str) -> Tuple[str, ...]:
+    """Catalog categories for one goal: a catalog key as-is, else FitnessGoalTypeTool on the text."""
+    key = "-".join((text or "").lower().replace("_", " ").split())
+    if key in GOAL_CATEGORIES:
+        return (key,)
+    if not key:
+        return ()
+    return GOAL_TYPE_CATEGORIES.get(FitnessGoalTypeTool({"goal": text})["goal_type"], ())
+
+
+def select_categories(active_goals: Optional[List[str]], user_facts: Optional[Dict]) -> Tuple[str, ...]:
+    """Sorted catalog categories for a user (core + menstrual when relevant + goal categories)."""
+    user_facts = user_facts or {}
+    facts = _parse_facts(user_facts.get("benji_facts"))
+    categories = set(CORE_CATEGORIES)
+
+    gender = str(facts.get("gender") or "").lower()
+    tracking = str(facts.get("cycleTracking") or "").lower()
+    if gender != "male" and tracking not in NO_CYCLE_TRACKING:
+        categories.add("menstrual")
+
+    goal_texts = [g for g in active_goals or [] if isinstance(g, str)]
+    for goal in user_facts.get("goals") or []:
+        if not isinstance(goal, dict):
+            continue
+        goal_type = goal.get("type") or goal.get("goalType") or ""
+        if goal_type in GOAL_CATEGORIES:
+            goal_texts.append(goal_type)
+        elif goal_type == "fitness":
+            goal_texts.append(goal.get("Specific") or goal.get("Description") or "")
+    if facts.get("goal"):
+        goal_texts.append(str(facts["goal"]))
+
+    found = set()
+    for text in goal_texts:
+        found.update(classify_goal(text))
+    # "general" only when nothing more specific matched
+    if len(found) > 1:
+        found.discard("general")
+    return tuple(sorted(categories | found))
+
+
+class QuestionBundles:
+    """Question subsets and their ETags, built once per category combination."""
+
+    def __init__(self, catalog: Dict[str, List[str]] = QUESTION_CATALOG):
+        self.catalog = catalog
+        self._bundles: Dict[Tuple[str, ...], Tuple[Dict[str, List[str]], str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, categories: Iterable[str]) -> Tuple[Dict[str, List[str]], str]:
+        key = tuple(sorted(set(categories)))
+        bundle = self._bundles.get(key)
+        if bundle is None:
+            # Catalog order, so the same combination always serializes the same way
+            questions = {cat: list(qs) for cat, qs in self.catalog.items() if cat in key}
+            etag = '"' + sha256(json.dumps(questions, sort_keys=True).encode("utf-8")).hexdigest()[:20] + '"'
+            bundle = (questions, etag)
+            with self._lock:
+                self._bundles.setdefault(key, bundle)
+        return bundle
+
+
+bundles = QuestionBundles()
+
+
+def select_questions(active_goals: Optional[List[str]], user_facts: Optional[Dict]) -> Tuple[Dict[str, List[str]], str]:
+    """(questions by category, ETag) for a user."""
+    return bundles.get(select_categories(active_goals, user_facts))
@@ -0,0 +1,225 @@
+"""
+Per-user retrieval over check-in notes, goals and past chat turns.
+
+Instead of dumping every goal and the latest check-in into the chat prompt,
+BenjiLLM.chat asks the user's HistoryIndex for the top-k snippets that relate
+to the question and fits them into a small token budget. Snippets are embedded
+with the same hashing vectorizer as the semantic response cache, so this stays
+local and dependency-free.
+
+Indexes are kept in memory per user (LRU + TTL) and updated incrementally when
+new check-ins or chat turns are written, so a warm user costs no extra reads.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from backend.llm.cache import cosine, vectorize
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def checkin_snippet(checkin: dict) -> Optional[str]:
+    """Compact text for one check-in; None if it carries nothing worth retrieving."""
+    if not checkin:
+        return None
+    date = (checkin.get("date") or str(checkin.get("createdAt") or ""))[:10]
+    scores = []
+    if checkin.get("dayScore"):
+        scores.append(f"day {checkin['dayScore']}/10")
+    if checkin.get("sleepScore"):
+        scores.append(f"sleep {checkin['sleepScore']}/5")
+    if checkin.get("fitnessScore"):
+        scores.append(f"fitness {checkin['fitnessScore']}/5")
+    if checkin.get("stress"):
+        scores.append(f"stress {checkin['stress']}/5")
+    if checkin.get("mood"):
+        scores.append(f"mood {checkin['mood']}/5")
+    parts = [f"Check-in {date}".strip()]
+    if scores:
+        parts.append(", ".join(scores))
+    if checkin.get("recoveryDay"):
+        parts.append("recovery day")
+    if checkin.get("tags"):
+        parts.append("tags: " + ", ".join(str(t) for t in checkin["tags"]))
+    if checkin.get("dayNotes"):
+        parts.append(f"day notes: {checkin['dayNotes']}")
+    if checkin.get("fitnessNotes"):
+        parts.append(f"fitness notes: {checkin['fitnessNotes']}")
+    if len(parts) == 1:
+        return None
+    return "; ".join(parts)
+
+
+def goal_snippet(goal) -> Optional[str]:
+    if isinstance(goal, dict):
+        label = goal.get("Specific") or goal.get("label") or goal.get("goal") or goal.get("specific") or goal.get("Description")
+        if not label:
+            return None
+        text = f"Goal [{goal.get('type', 'wellness')}]: {label}"
+        measurable = goal.get("Measurable") or goal.get("measurable")
+        if measurable:
+            text += f" (target: {measurable})"
+        return text
+    return f"Goal: {goal}" if goal else None
+
+
+def chat_snippet(message: dict) -> Optional[str]:
+    content = (message or {}).get("content")
+    if not content:
+        return None
+    speaker = "User" if message.get("role") == "user" else "Benji"
+    date = str(message.get("ts") or "")[:10]
+    if len(content) > 400:
+        content = content[:400] + "…"
+    return f"Past chat {date} - {speaker}: {content}".replace("  ", " ")
+
+
+class HistoryIndex:
+    """
+    In-memory snippet index for one user.
+
+    Scores are cosine similarity to the query plus small priors: goals are
+    always somewhat relevant and recent items beat old ones on ties.
+    """
+
+    GOAL_PRIOR = 0.15
+    RECENCY_WEIGHT = 0.1
+
+    def __init__(self):
+        self._docs: "OrderedDict[str, dict]" = OrderedDict()
+        self._seq = 0
+        self._lock = threading.Lock()  # write routes and chat turns update it from threadpool workers
+        self.built_at = time.time()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str):
+        return doc_id in self._docs
+
+    def add(self, doc_id: str, text: Optional[str], kind: str) -> None:
+        """Add a snippet, or replace it if the text under doc_id changed (edited goal)."""
+        if not text:
+            return
+        with self._lock:
+            current = self._docs.get(doc_id)
+            if current is not None and current["text"] == text:
+                return
+        vec = vectorize(text)
+        if not vec:
+            self.remove(doc_id)
+            return
+        with self._lock:
+            self._seq += 1
+            self._docs.pop(doc_id, None)
+            self._docs[doc_id] = {"text": text, "kind": kind, "vector": vec, "seq": self._seq}
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._docs.pop(doc_id, None)
+
+    def add_checkin(self, doc_id: str, checkin: dict) -> None:
+        self.add(f"checkin:{doc_id}", checkin_snippet(checkin), "checkin")
+
+    def add_goal(self, doc_id: str, goal) -> None:
+        self.add(f"goal:{doc_id}", goal_snippet(goal), "goal")
+
+    def remove_goal(self, doc_id: str) -> None:
+        self.remove(f"goal:{doc_id}")
+
+    def sync_goals(self, goals: List) -> None:
+        """Make the goal snippets match the user's current goals: add new, replace edited, drop deleted."""
+        keep = set()
+        for i, goal in enumerate(goals or []):
+            goal_id = (goal.get("goal_id") if isinstance(goal, dict) else None) or str(i)
+            keep.add(f"goal:{goal_id}")
+            self.add_goal(goal_id, goal)
+        with self._lock:
+            stale = [doc_id for doc_id, doc in self._docs.items() if doc["kind"] == "goal" and doc_id not in keep]
+            for doc_id in stale:
+                del self._docs[doc_id]
+
+    def add_chat_message(self, doc_id: str, message: dict) -> None:
+        self.add(f"chat:{doc_id}", chat_snippet(message), "chat")
+
+    def search(self, query: str, k: int = 6, token_budget: int = 400) -> List[str]:
+        """Top-k snippets for the query, most relevant first, within token_budget."""
+        qvec = vectorize(query)
+        with self._lock:
+            docs = list(self._docs.values())
+            newest = self._seq or 1
+        if not docs:
+            return []
+        scored = []
+        for doc in docs:
+            score = cosine(qvec, doc["vector"]) if qvec else 0.0
+            if doc["kind"] == "goal":
+                score += self.GOAL_PRIOR
+            score += self.RECENCY_WEIGHT * math.exp(-(newest - doc["seq"]) / 20.0)
+            scored.append((score, doc["text"]))
+        scored.sort(key=lambda x: x[0], reverse=True)
+
+        selected, used = [], 0
+        for _, text in scored:
+            if len(selected) >= k:
+                break
+            cost = estimate_tokens(text)
+            if used + cost > token_budget:
+                continue
+            selected.append(text)
+            used += cost
+        return selected
+
+
+class HistoryIndexRegistry:
+    """Bounded LRU of per-user HistoryIndex objects with a rebuild TTL."""
+
+    def __init__(self, max_users: int = 256, ttl_seconds: int = 15 * 60):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._indexes: "OrderedDict[str, HistoryIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[HistoryIndex]:
+        """Return a live index for the user, or None if it must be (re)built."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                return None
+            if time.time() - index.built_at > self.ttl_seconds:
+                del self._indexes[user_id]
+                return None
+            self._indexes.move_to_end(user_id)
+            return index
+
+    def put(self, user_id: str, index: HistoryIndex) -> None:
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+
+def build_history_index(checkins: List[Dict], goals: List, messages: List[Dict]) -> HistoryIndex:
+    """
+    Build an index from raw Firestore data. Items are added oldest first so the
+    recency prior favours the newest check-ins and chat turns.
+    """
+    index = HistoryIndex()
+    index.sync_goals(goals)
+    ordered = sorted(checkins or [], key=lambda c: str(c.get("createdAt", "")))
+    for i, c in enumerate(ordered):
+        index.add_checkin(c.get("id") or str(c.get("createdAt") or i), c)
+    for m in messages or []:
+        index.add_chat_message(f"{m.get('ts', '')}:{m.get('role', '')}", m)
+    return index
@@ -0,0 +1,324 @@
+"""
+Deterministic medication scheduler for /medication-schedule.
+
+Turns the medication list into concrete HH:mm dose times inside the user's
+waking hours:
+
+- Each medication gets a dose spec from its frequency text
+  (backend.llm.frequency: doses per day, interval, meal / time-of-day
+  anchors, clock times) and, when the text gives no time of day, the
+  ingredient's usual timing (levothyroxine -> morning).
+- Every dose gets an ideal time (its anchor, or evenly spread across the
+  day), then is placed on a 15-minute grid by a greedy pass plus a few
+  local-improvement sweeps. Cost = distance from ideal + food penalties
+  (with_food away from a meal, empty_stomach too close to one) - a small
+  bonus for sharing a time with other doses.
+- Hard constraints: medications with an absorption interaction (rules with
+  spacing_minutes in the interaction index) keep that far apart, and repeat doses of one medication keep
+  a minimum gap. If no grid time satisfies them the least-violating time is
+  used and a spacing note says so.
+
+A sleep time at or before the wake time means the waking day runs past
+midnight (night shifts): internally minutes then run past 24:00 and are
+wrapped back for display. Days shorter than MIN_WAKING_HOURS are rejected
+with ValueError rather than replaced with defaults.
+
+No model call is involved; a 20-medication list solves in a few milliseconds.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from backend.llm.drug_names import get_resolver, ingredient_ids
+from backend.llm.frequency import parse_frequency
+from backend.llm.interactions import get_index as get_interaction_index
+
+STEP_MINUTES = 15
+DEFAULT_WAKE = "07:00"
+DEFAULT_SLEEP = "22:00"
+DAY_MINUTES = 24 * 60
+MIN_WAKING_HOURS = 6
+MEAL_WINDOW = 30            # with_food: within this many minutes of a meal
+EMPTY_BEFORE_MEAL = 30      # empty_stomach: at least this long before a meal...
+EMPTY_AFTER_MEAL = 120      # ...or this long after one
+FOOD_PENALTY = 240
+SHARED_TIME_BONUS = 10
+IMPROVEMENT_SWEEPS = 3
+ORDINALS = {1: "1st", 2: "2nd", 3: "3rd"}
+EVERY_N_DAYS_LABELS = {2: "every other day", 7: "weekly", 14: "every 2 weeks", 30: "monthly"}
+
+
+def to_minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def to_hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def time_label(minutes: int) -> str:
+    hours, mins = divmod(minutes, 60)
+    suffix = "AM" if hours < 12 else "PM"
+    return f"{(hours % 12) or 12}:{mins:02d} {suffix}"
+
+
+def slot_name(minutes: int) -> str:
+    """Display bucket for timeSlotsDetailed (same buckets as the AI schedule)."""
+    hour = minutes // 60
+    if hour < 10:
+        return "early_morning"
+    if hour < 12:
+        return "morning"
+    if hour < 14:
+        return "midday"
+    if hour < 17:
+        return "afternoon"
+    if hour < 20:
+        return "evening"
+    return "night"
+
+
+def legacy_slot(minutes: int) -> str:
+    """morning / afternoon / evening / night bucket for the timeSlots dict."""
+    hour = minutes // 60
+    if hour < 12:
+        return "morning"
+    if hour < 17:
+        return "afternoon"
+    if hour < 20:
+        return "evening"
+    return "night"
+
+
+# Time-of-day anchor -> legacy timeSlots bucket
+ANCHOR_SLOTS = {
+    "wake": "morning", "breakfast": "morning", "morning": "morning",
+    "lunch": "afternoon", "midday": "afternoon", "afternoon": "afternoon",
+    "dinner": "evening", "evening": "evening",
+    "bedtime": "night", "night": "night",
+}
+
+
+def day_anchors(wake: int, sleep: int) -> Dict[str, int]:
+    """Meal and time-of-day anchors (minutes after midnight) for a waking window."""
+    breakfast = wake + 30
+    dinner = min(max(to_minutes("18:30"), breakfast + 8 * 60), sleep - 2 * 60)
+    lunch = min(max(to_minutes("12:30"), breakfast + 4 * 60), dinner - 3 * 60)
+    bedtime = sleep - 30
+    return {
+        "wake": wake,
+        "breakfast": breakfast,
+        "morning": breakfast,
+        "lunch": lunch,
+        "midday": lunch,
+        "afternoon": (lunch + dinner) // 2,
+        "dinner": dinner,
+        "evening": dinner,
+        "bedtime": bedtime,
+        "night": bedtime,
+    }
+
+
+def food_instruction(med: Dict, spec: Dict) -> Optional[str]:
+    """The medication's foodInstruction, else what its frequency text says ("with meals")."""
+    return med.get("foodInstruction") or spec.get("food")
+
+
+def waking_window(wake_time: str, sleep_time: str) -> Tuple[int, int]:
+    """(wake, sleep) in minutes; sleep is past DAY_MINUTES when the day wraps past midnight."""
+    wake, sleep = to_minutes(wake_time), to_minutes(sleep_time)
+    if sleep <= wake:
+        sleep += DAY_MINUTES
+    if sleep - wake < MIN_WAKING_HOURS * 60:
+        raise ValueError(
+            f"wake_time {wake_time} to sleep_time {sleep_time} leaves under {MIN_WAKING_HOURS} waking hours"
+        )
+    return wake, sleep
+
+
+def _in_window(t: int, wake: int, sleep: int) -> int:
+    """A clock time (minutes after midnight) moved onto the waking window, clamped to it."""
+    if t < wake and t + DAY_MINUTES <= sleep:
+        t += DAY_MINUTES
+    return min(max(t, wake), sleep)
+
+
+def _ideal_times(spec: Dict, hint: Optional[str], anchors: Dict[str, int], wake: int, sleep: int) -> List[int]:
+    count = spec["count"]
+    named = [_in_window(t, wake, sleep) for t in spec.get("times", [])]
+    named += [anchors[a] for a in spec["anchors"] if a in anchors]
+    if len(named) >= count:
+        return sorted(named[:count])
+    if spec.get("interval_hours"):
+        start = named[0] if named else anchors["breakfast"]
+        return [min(start + round(k * spec["interval_hours"] * 60), anchors["bedtime"]) for k in range(count)]
+    if count == 1:
+        return [anchors.get(hint or "morning", anchors["breakfast"])]
+    if count == 2:
+        return [anchors["breakfast"], anchors["dinner"]]
+    if count == 3:
+        return [anchors["breakfast"], anchors["lunch"], anchors["dinner"]]
+    first, last = anchors["breakfast"], anchors["bedtime"]
+    return [first + round(k * (last - first) / (count - 1)) for k in range(count)]
+
+
+def _food_penalty(t: int, food: Optional[str], meals: List[int]) -> int:
+    if food == "with_food":
+        return 0 if any(abs(t - m) <= MEAL_WINDOW for m in meals) else FOOD_PENALTY
+    if food == "empty_stomach":
+        near = any(-EMPTY_BEFORE_MEAL < t - m < EMPTY_AFTER_MEAL for m in meals)
+        return FOOD_PENALTY if near else 0
+    return 0
+
+
+def solve_schedule(
+    medications: List[Dict],
+    wake_time: str = DEFAULT_WAKE,
+    sleep_time: str = DEFAULT_SLEEP,
+) -> Dict:
+    """
+    Returns {"slots": [{"time", "label", "slot", "medications", "foodNote"}],
+             "timeSlots": {morning, afternoon, evening, night}, "spacing_notes": [...],
+             "as_needed": [...], "unparsed": [...]}.
+    Medications whose frequency couldn't be read are listed in "unparsed", not scheduled.
+    Raises ValueError when the waking day is shorter than MIN_WAKING_HOURS.
+    """
+    wake, sleep = waking_window(wake_time, sleep_time)
+    anchors = day_anchors(wake, sleep)
+    meals = [anchors["breakfast"], anchors["lunch"], anchors["dinner"]]
+    grid = list(range(wake, sleep + 1, STEP_MINUTES))
+    resolver = get_resolver()
+    index = get_interaction_index()
+
+    # doses: (med index, dose number, ideal minute); pinned = the time of day
+    # comes from the frequency text or the ingredient's usual timing
+    specs, foods, doses, as_needed, unparsed, pinned = [], [], [], [], [], set()
+    for i, med in enumerate(medications):
+        spec = parse_frequency(med.get("frequency", ""))
+        specs.append(spec)
+        foods.append(food_instruction(med, spec))
+        if not spec["parsed"]:
+            unparsed.append(i)
+            continue
+        if spec.get("as_needed"):
+            as_needed.append(i)
+            continue
+        hint = resolver.timing_hint(ingredient_ids(med))
+        if spec["anchors"] or spec["times"] or (hint and spec["count"] == 1):
+            pinned.add(i)
+        for k, ideal in enumerate(_ideal_times(spec, hint, anchors, wake, sleep)):
+            doses.append((i, k, ideal))
+
+    # Pairwise spacing between medications: {(i, j): minutes}, i < j
+    terms = [ingredient_ids(med) or index.match(med.get("name", "")) for med in medications]
+    spacing: Dict[Tuple[int, int], Dict] = {
+        (i, j): rule for i, j, rule in index.check_terms(terms) if rule.get("spacing_minutes")
+    }
+    partners: Dict[int, List[Tuple[int, int]]] = {}
+    for (i, j), rule in spacing.items():
+        partners.setdefault(i, []).append((j, rule["spacing_minutes"]))
+        partners.setdefault(j, []).append((i, rule["spacing_minutes"]))
+
+    def min_gap(i: int) -> int:
+        spec = specs[i]
+        if spec.get("interval_hours"):
+            return int(spec["interval_hours"] * 60 * 0.75)
+        return int((sleep - wake) / max(spec["count"], 1) * 0.5)
+
+    placed: Dict[Tuple[int, int], int] = {}
+    times_of: Dict[int, Dict[int, int]] = {}   # med index -> {dose number: minute}
+    occupancy: Dict[int, int] = {}             # minute -> doses placed there
+
+    def place(i: int, k: int, t: int):
+        old = placed.pop((i, k), None)
+        if old is not None:
+            occupancy[old] -= 1
+            del times_of[i][k]
+        placed[(i, k)] = t
+        times_of.setdefault(i, {})[k] = t
+        occupancy[t] = occupancy.get(t, 0) + 1
+
+    def cost(dose, t: int) -> Tuple[int, int]:
+        i, k, ideal = dose
+        own = times_of.get(i, {})
+        violation = sum(max(0, min_gap(i) - abs(t - tj)) for kj, tj in own.items() if kj != k)
+        for j, gap in partners.get(i, []):
+            violation += sum(max(0, gap - abs(t - tj)) for tj in times_of.get(j, {}).values())
+        shared = occupancy.get(t, 0) - sum(1 for tj in own.values() if tj == t)
+        soft = abs(t - ideal) + _food_penalty(t, foods[i], meals) - SHARED_TIME_BONUS * min(shared, 3)
+        return violation, soft
+
+    # Pinned doses first (single daily doses before multi-dose ones, which have
+    # more ways to move), then the most constrained, then by name for determinism
+    def priority(dose):
+        i = dose[0]
+        count = specs[i]["count"] if i in pinned else -specs[i]["count"]
+        return (i not in pinned, count, -len(partners.get(i, [])), medications[i].get("name", ""), dose[1])
+
+    order = sorted(doses, key=priority)
+    for dose in order:
+        place(dose[0], dose[1], min(grid, key=lambda t: cost(dose, t)))
+    for _ in range(IMPROVEMENT_SWEEPS):
+        changed = False
+        for dose in order:
+            current = placed[(dose[0], dose[1])]
+            best = min(grid, key=lambda t: cost(dose, t))
+            if cost(dose, best) < cost(dose, current):
+                place(dose[0], dose[1], best)
+                changed = True
+        if not changed:
+            break
+
+    # Spacing notes (satisfied and violated pairs)
+    spacing_notes = []
+    for (i, j), rule in sorted(spacing.items()):
+        if not times_of.get(i) or not times_of.get(j):
+            continue
+        gap = min(abs(ti - tj) for ti in times_of[i].values() for tj in times_of[j].values())
+        a, b = medications[i].get("name", "Unknown"), medications[j].get("name", "Unknown")
+        hours = rule["spacing_minutes"] / 60
+        span = f"{hours:g} hour{'' if hours == 1 else 's'}"
+        if gap >= rule["spacing_minutes"]:
+            spacing_notes.append(f"{a} and {b} are scheduled at least {span} apart ({rule['reason']}).")
+        else:
+            spacing_notes.append(
+                f"Couldn't keep {a} and {b} {span} apart within your waking hours; ask your pharmacist about timing."
+            )
+
+    # Group doses into time slots
+    by_time: Dict[int, List[Tuple[int, int]]] = {}
+    for (i, k), t in placed.items():
+        by_time.setdefault(t, []).append((i, k))
+    slots, legacy = [], {"morning": [], "afternoon": [], "evening": [], "night": []}
+    for t in sorted(by_time):
+        entries, with_food, empty = [], [], []
+        for i, k in sorted(by_time[t], key=lambda d: (medications[d[0]].get("name", ""), d[1])):
+            med = medications[i]
+            name = med.get("name", "Unknown")
+            label = f"{name} {med.get('strength', '')}".strip()
+            if specs[i]["count"] > 1:
+                label += f" ({ORDINALS.get(k + 1, f'{k + 1}th')} dose)"
+            every = specs[i]["every_n_days"]
+            if every > 1:
+                label += f" ({EVERY_N_DAYS_LABELS.get(every, f'every {every} days')})"
+            entries.append(label)
+            if foods[i] == "with_food" and name not in with_food:
+                with_food.append(name)
+            elif foods[i] == "empty_stomach" and name not in empty:
+                empty.append(name)
+        food_note = ". ".join(
+            part for part in (
+                f"With food: {', '.join(with_food)}" if with_food else "",
+                f"On empty stomach: {', '.join(empty)}" if empty else "",
+            ) if part
+        )
+        clock = t % DAY_MINUTES
+        slots.append({"time": to_hhmm(clock), "label": time_label(clock), "slot": slot_name(clock), "medications": entries, "foodNote": food_note})
+        legacy[legacy_slot(clock)].extend(entries)
+
+    return {
+        "slots": slots,
+        "timeSlots": legacy,
+        "spacing_notes": spacing_notes,
+        "as_needed": [medications[i].get("name", "Unknown") for i in as_needed],
+        "unparsed": [medications[i].get("name", "Unknown") for i in unparsed],
+    }
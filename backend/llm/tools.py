@@ -1,8 +1,13 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from langchain_core.messages import SystemMessage, HumanMessage
 import json
 
+from backend.llm.drug_names import get_resolver, ingredient_ids
+from backend.llm.frequency import parse_frequency
+from backend.llm.interactions import get_index as get_interaction_index
+from backend.llm.scheduler import ANCHOR_SLOTS, legacy_slot
+
 
 # -----------------------------
 # PROFILE / GOAL TOOLS
@@ -21,6 +26,7 @@ def FitnessGoalTypeTool(facts: Dict) -> Dict:
         "muscle": "muscle_strength",
         "strength": "muscle_strength",
         "cardio": "cardio_endurance",
+        "endurance": "cardio_endurance",
         "run": "cardio_endurance",
         "mobility": "mobility",
         "injury": "injury_recovery",
@@ -95,26 +101,55 @@ def RecoveryStatusTool(checkin: Dict) -> Dict:
 # TREND ANALYSIS
 # -----------------------------
 
-def AnalyzeTrendTool(history: List[Dict]) -> Dict:
-    if not history:
-        return {"insights": []}
+def _window_avg(trends: Optional[Dict], window: str, metric: str) -> Optional[float]:
+    """Average of one metric over a rolling window from CheckInStats aggregates."""
+    if not trends:
+        return None
+    return ((trends.get("windows") or {}).get(window) or {}).get(metric, {}).get("avg")
+
 
-    avg_sleep = sum(d.get("sleep", 3) for d in history) / len(history)
-    avg_stress = sum(d.get("stress", 3) for d in history) / len(history)
+def AnalyzeTrendTool(history: List[Dict], trends: Optional[Dict] = None) -> Dict:
+    """
+    Sleep/stress trend. Prefers the rolling aggregates (`trends`, see
+    backend/app/checkin_stats.py) and falls back to averaging `history`.
+    """
+    avg_sleep = _window_avg(trends, "7d", "sleep")
+    avg_stress = _window_avg(trends, "7d", "stress")
+    if avg_sleep is None and history:
+        avg_sleep = sum(d.get("sleep", 3) for d in history) / len(history)
+    if avg_stress is None and history:
+        avg_stress = sum(d.get("stress", 3) for d in history) / len(history)
+    if avg_sleep is None and avg_stress is None:
+        return {"insights": []}
 
     insights = []
 
-    if avg_sleep < 3:
+    if avg_sleep is not None and avg_sleep < 3:
         insights.append("Sleep has been low recently.")
-    if avg_stress > 3.5:
+    if avg_stress is not None and avg_stress > 3.5:
         insights.append("Stress levels are elevated.")
 
-    return {
-        "avg_sleep": round(avg_sleep, 2),
-        "avg_stress": round(avg_stress, 2),
+    result = {
+        "avg_sleep": round(avg_sleep, 2) if avg_sleep is not None else None,
+        "avg_stress": round(avg_stress, 2) if avg_stress is not None else None,
         "insights": insights
     }
 
+    if trends:
+        sleep_30 = _window_avg(trends, "30d", "sleep")
+        stress_30 = _window_avg(trends, "30d", "stress")
+        if avg_sleep is not None and sleep_30 is not None and avg_sleep < sleep_30 - 0.5:
+            insights.append("Sleep this week is below your 30-day average.")
+        if avg_stress is not None and stress_30 is not None and avg_stress > stress_30 + 0.5:
+            insights.append("Stress this week is above your 30-day average.")
+        result["avg_sleep_30d"] = sleep_30
+        result["avg_stress_30d"] = stress_30
+        result["avg_sleep_90d"] = _window_avg(trends, "90d", "sleep")
+        result["avg_stress_90d"] = _window_avg(trends, "90d", "stress")
+        result["current_streak"] = trends.get("current_streak", 0)
+
+    return result
+
 
 # -----------------------------
 # PLANNING
@@ -203,11 +238,23 @@ def InjurySafetyTool(facts: Dict, checkin: Dict) -> Dict:
 # RECAP
 # -----------------------------
 
-def WeeklyFitnessRecapTool(history: List[Dict]) -> Dict:
+def WeeklyFitnessRecapTool(history: List[Dict], trends: Optional[Dict] = None) -> Dict:
+    week = ((trends or {}).get("windows") or {}).get("7d")
+    if week and week.get("days_logged"):
+        avg = _window_avg(trends, "7d", "dayScore")
+        return {
+            "avg_score": avg if avg is not None else 5,
+            "avg_fitness": _window_avg(trends, "7d", "fitnessScore"),
+            "days_logged": week["days_logged"],
+            "current_streak": trends.get("current_streak", 0),
+            "longest_streak": trends.get("longest_streak", 0),
+            "summary": "Consistent effort this week."
+        }
+
     if not history:
         return {}
 
-    avg = sum(d.get("day_score", 5) for d in history) / len(history)
+    avg = sum(d.get("day_score") or 5 for d in history) / len(history)
 
     return {
         "avg_score": round(avg, 2),
@@ -216,14 +263,23 @@ def WeeklyFitnessRecapTool(history: List[Dict]) -> Dict:
     }
 
 
-def WellnessEmotionEvalTool(history: List[Dict]) -> Dict:
-    moods = [d.get("mood", 3) for d in history]
-    avg = sum(moods) / len(moods) if moods else 3
+def WellnessEmotionEvalTool(history: List[Dict], trends: Optional[Dict] = None) -> Dict:
+    avg = _window_avg(trends, "7d", "mood")
+    if avg is None:
+        moods = [d.get("mood", 3) for d in history]
+        avg = sum(moods) / len(moods) if moods else 3
 
-    return {
-        "mood_trend": "down" if avg < 3 else "stable",
+    # Compare the week against the user's own 30-day baseline when known
+    baseline = _window_avg(trends, "30d", "mood")
+    down = avg < 3 or (baseline is not None and avg < baseline - 0.5)
+
+    result = {
+        "mood_trend": "down" if down else "stable",
         "avg_mood": round(avg, 2)
     }
+    if baseline is not None:
+        result["avg_mood_30d"] = baseline
+    return result
     
     
 def UpcomingPlanTool(facts: Dict, smart_goals: list, model) -> Dict:
@@ -393,40 +449,40 @@ def MedicationScheduleTool(facts: Dict) -> Dict:
         "spacing_notes": []
     }
     
-    # Common timing patterns
-    morning_keywords = ["morning", "am", "breakfast", "wake"]
-    afternoon_keywords = ["afternoon", "lunch", "noon", "midday"]
-    evening_keywords = ["evening", "dinner", "pm"]
-    night_keywords = ["night", "bedtime", "sleep", "before bed"]
-    
-    # Parse frequency and assign time slots
-    # For demo: when frequency is unclear, alternate between morning and evening (8 AM / 6 PM)
+    # Frequency text is parsed once per distinct phrase (backend/llm/frequency.py)
+    # For demo: when frequency gives no time of day, alternate between morning and evening (8 AM / 6 PM)
     default_slot_cycle = ["morning", "evening"]
     default_slot_index = [0]  # use list so we can mutate inside loop
+    default_slots = {2: ["morning", "evening"], 3: ["morning", "afternoon", "evening"], 4: ["morning", "afternoon", "evening", "night"]}
+    ordinals = ["1st", "2nd", "3rd", "4th"]
 
     for med in medications:
         name = med.get("name", "Unknown")
         strength = med.get("strength", "")
-        frequency = med.get("frequency", "").lower()
+        spec = parse_frequency(med.get("frequency", ""))
         
         med_info = f"{name} {strength}"
-        
-        # Determine time slot based on frequency
-        if any(kw in frequency for kw in morning_keywords):
-            schedule["morning"].append(med_info)
-        elif any(kw in frequency for kw in night_keywords):
-            schedule["night"].append(med_info)
-        elif any(kw in frequency for kw in evening_keywords):
-            schedule["evening"].append(med_info)
-        elif any(kw in frequency for kw in afternoon_keywords):
-            schedule["afternoon"].append(med_info)
-        elif "twice" in frequency or "2x" in frequency:
-            schedule["morning"].append(f"{med_info} (1st dose)")
-            schedule["evening"].append(f"{med_info} (2nd dose)")
-        elif "three times" in frequency or "3x" in frequency:
-            schedule["morning"].append(f"{med_info} (1st dose)")
-            schedule["afternoon"].append(f"{med_info} (2nd dose)")
-            schedule["evening"].append(f"{med_info} (3rd dose)")
+        if not spec["parsed"]:
+            # Never guess a daily dose for a frequency we couldn't read
+            schedule["spacing_notes"].append(f"{name}: couldn't read the frequency; not scheduled")
+            continue
+        
+        # Determine time slots from clock times / anchors, else from the dose count
+        # One entry per slot ("every morning before breakfast" is one morning dose), at most count of them
+        slots = list(dict.fromkeys(
+            [legacy_slot(t) for t in spec["times"]] + [ANCHOR_SLOTS[a] for a in spec["anchors"]]
+        ))
+        if spec["count"] > 1:
+            slots += [slot for slot in default_slots.get(min(spec["count"], 4), []) if slot not in slots]
+        slots = slots[:min(spec["count"], 4)]
+        if len(slots) > 1:
+            for k, slot in enumerate(slots):
+                schedule[slot].append(f"{med_info} ({ordinals[k]} dose)")
+        elif slots:
+            schedule[slots[0]].append(med_info)
+        elif get_resolver().timing_hint(ingredient_ids(med)):
+            # Usual time of day for the ingredient (e.g. levothyroxine in the morning)
+            schedule[get_resolver().timing_hint(ingredient_ids(med))].append(med_info)
         else:
             # Distribute between morning and evening for demo (avoid stacking all at 8 AM)
             slot = default_slot_cycle[default_slot_index[0] % len(default_slot_cycle)]
@@ -434,9 +490,9 @@ def MedicationScheduleTool(facts: Dict) -> Dict:
             schedule[slot].append(med_info)
         
         # Food instructions
-        if "with food" in frequency or "with meal" in frequency:
+        if spec["food"] == "with_food":
             schedule["food_instructions"].append(f"{name}: Take with food")
-        elif "empty stomach" in frequency or "without food" in frequency:
+        elif spec["food"] == "empty_stomach":
             schedule["food_instructions"].append(f"{name}: Take on empty stomach")
     
     return schedule
@@ -454,41 +510,17 @@ def ContraindicationCheckTool(facts: Dict) -> Dict:
     
     warnings = []
     
-    # Extract medication names (lowercase for comparison)
-    med_names = [med.get("name", "").lower() for med in medications]
-    
-    # Common contraindication patterns (simplified for MVP)
-    contraindications = {
-        "warfarin": ["aspirin", "ibuprofen", "naproxen", "nsaid"],
-        "aspirin": ["warfarin", "ibuprofen", "naproxen"],
-        "lisinopril": ["potassium", "spironolactone"],
-        "metformin": ["alcohol"],
-        "simvastatin": ["grapefruit"],
-        "atorvastatin": ["grapefruit"],
-        "levothyroxine": ["calcium", "iron"],
-        "omeprazole": ["clopidogrel"],
-    }
-    
-    # Check for interactions
-    for i, med1 in enumerate(med_names):
-        for med2 in med_names[i+1:]:
-            # Check if med1 has known interactions with med2
-            for drug, interacts_with in contraindications.items():
-                if drug in med1:
-                    if any(interaction in med2 for interaction in interacts_with):
-                        warnings.append(
-                            f"CAUTION: Potential interaction between {medications[i].get('name')} "
-                            f"and {medications[med_names.index(med2)].get('name')}. "
-                            f"Space doses apart and consult your doctor."
-                        )
-                
-                if drug in med2:
-                    if any(interaction in med1 for interaction in interacts_with):
-                        warnings.append(
-                            f"CAUTION: Potential interaction between {medications[med_names.index(med2)].get('name')} "
-                            f"and {medications[i].get('name')}. "
-                            f"Space doses apart and consult your doctor."
-                        )
+    # Known pairs come from the precompiled index (backend/llm/data/drug_interactions.json),
+    # matched on each medication's ingredient ids; names the resolver doesn't know are matched directly
+    index = get_interaction_index()
+    names = [med.get("name", "") for med in medications]
+    term_sets = [ingredient_ids(med) or index.match(name) for med, name in zip(medications, names)]
+    for i, j, rule in index.check_terms(term_sets):
+        reason = f" ({rule['reason']})" if rule.get("reason") else ""
+        warnings.append(
+            f"CAUTION: Potential interaction between {names[i]} and {names[j]}{reason}. "
+            f"Space doses apart and consult your doctor."
+        )
     
     # General timing recommendations if multiple medications
     if len(medications) >= 2 and not warnings:
@@ -503,136 +535,66 @@ def ContraindicationCheckTool(facts: Dict) -> Dict:
     }
 
 
-def MedicationScheduleAgentTool(
-    medications: List[Dict],
+def MedicationScheduleNotesTool(
+    time_slots: List[Dict],
+    spacing_notes: List[str],
     contraindication_warnings: List[str],
-    food_instructions: List[str],
     model
 ) -> Dict:
     """
-    Generate a personalized medication schedule using LLM with explicit time slots.
-    
+    Explain an already solved medication schedule using LLM.
+
+    The times come from backend.llm.scheduler.solve_schedule; the model only
+    writes personalization_notes around them.
+
     Args:
-        medications: List of medication dicts with name, strength, frequency, foodInstruction, notes
+        time_slots: Solved slots ({time, label, medications, foodNote})
+        spacing_notes: Spacing notes from the scheduler
         contraindication_warnings: Pre-computed warnings from ContraindicationCheckTool
-        food_instructions: List of food instruction strings
         model: ChatGoogleGenerativeAI instance
-    
+
     Returns:
-        Dict with time_slots (explicit times 6 AM - 10 PM), spacing_notes, personalization_notes
+        Dict with personalization_notes
         Or {"_fallback": True} if LLM fails
     """
-    if not medications:
+    if not time_slots:
         return {"_fallback": True}
-    
-    # Build list of medication names for validation
-    med_names = [f"{m.get('name', 'Unknown')} {m.get('strength', '')}".strip() for m in medications]
-    
-    # Build the prompt with explicit time slots (6 AM - 10 PM)
+
+    schedule_lines = "\n".join(
+        f"- {slot.get('label')}: {', '.join(slot.get('medications', []))}"
+        + (f" ({slot['foodNote']})" if slot.get("foodNote") else "")
+        for slot in time_slots
+    )
+
     prompt = (
-        "You are a medication scheduling assistant. Your role is to recommend SPECIFIC TIMES "
-        "between 6:00 AM and 10:00 PM to take each medication.\n\n"
-        
+        "You are a medication scheduling assistant. The user's daily medication times have already been "
+        "worked out from their frequencies, food instructions and interaction spacing rules:\n\n"
+        f"{schedule_lines}\n\n"
+        f"SPACING NOTES:\n{json.dumps(spacing_notes, indent=2)}\n\n"
+        f"CONTRAINDICATION WARNINGS:\n{json.dumps(contraindication_warnings, indent=2)}\n\n"
+
+        "Write a brief, friendly personalization_notes summary (2-4 sentences) explaining why the schedule "
+        "is laid out this way. Use the times exactly as given; do not move medications or suggest other times.\n\n"
+
         "IMPORTANT RULES:\n"
         "- Do NOT give dosing or medical advice.\n"
-        "- Only recommend WHEN (specific time of day) to take each medication.\n"
-        "- Always recommend consulting a healthcare provider for medical decisions.\n"
-        "- You MUST use specific times, NOT generic slots like 'morning' or 'evening'.\n\n"
-        
-        "AVAILABLE TIME SLOTS (use any of these, or times in between):\n"
-        "- 06:00 (6:00 AM) - Early morning, before breakfast\n"
-        "- 07:00 (7:00 AM) - Morning, before or with breakfast\n"
-        "- 08:00 (8:00 AM) - With breakfast\n"
-        "- 10:00 (10:00 AM) - Mid-morning\n"
-        "- 12:00 (12:00 PM) - With lunch\n"
-        "- 14:00 (2:00 PM) - Afternoon\n"
-        "- 18:00 (6:00 PM) - With dinner\n"
-        "- 20:00 (8:00 PM) - Evening\n"
-        "- 21:00 (9:00 PM) - Before bed\n"
-        "- 22:00 (10:00 PM) - Bedtime\n\n"
-        
-        "SCHEDULING GUIDELINES:\n"
-        "1. **SPACING**: Medications with contraindications or interactions MUST be placed at least 2 hours apart.\n"
-        "   - If two medications interact, put them at different times (e.g., 6:00 AM and 8:00 AM).\n"
-        "   - Document this in spacing_notes.\n\n"
-        "2. **EMPTY STOMACH medications** (foodInstruction='empty_stomach'):\n"
-        "   - Schedule at 6:00 AM or 7:00 AM (30-60 min before breakfast)\n"
-        "   - OR at 21:00 or 22:00 (before bed, 2+ hours after dinner)\n"
-        "   - Set foodNote to 'Take on empty stomach'\n\n"
-        "3. **WITH FOOD medications** (foodInstruction='with_food'):\n"
-        "   - Schedule at meal times: 08:00 (breakfast), 12:00 (lunch), or 18:00 (dinner)\n"
-        "   - Set foodNote to 'Take with food'\n\n"
-        "4. **FREQUENCY**:\n"
-        "   - 'once daily': Pick the single best time based on medication type and food requirements\n"
-        "   - 'twice daily': Space at least 10-12 hours apart (e.g., 07:00 and 19:00)\n"
-        "   - 'three times daily': Space 5-6 hours apart (e.g., 07:00, 13:00, 19:00)\n\n"
-        "5. **COMMON MEDICATION KNOWLEDGE**:\n"
-        "   - Levothyroxine: 06:00 AM on empty stomach (30-60 min before food)\n"
-        "   - Metformin: with meals (08:00, 12:00, 18:00) to reduce GI side effects\n"
-        "   - Blood pressure meds (lisinopril, amlodipine): morning (07:00 or 08:00)\n"
-        "   - Statins (simvastatin, atorvastatin): evening/night (20:00 or 21:00)\n"
-        "   - Proton pump inhibitors (omeprazole): 06:00-07:00 AM before breakfast\n"
-        "   - Calcium/Iron supplements: space 2+ hours from thyroid meds\n\n"
-        
-        f"MEDICATIONS TO SCHEDULE:\n{json.dumps(medications, indent=2)}\n\n"
-        
-        f"CONTRAINDICATION WARNINGS (MUST respect spacing):\n{json.dumps(contraindication_warnings, indent=2)}\n\n"
-        
-        f"FOOD INSTRUCTIONS:\n{json.dumps(food_instructions, indent=2)}\n\n"
-        
+        "- Always recommend consulting a healthcare provider for medical decisions.\n\n"
+
         "OUTPUT FORMAT - Return STRICT JSON only, no markdown:\n"
-        "{\n"
-        '  "time_slots": [\n'
-        '    {\n'
-        '      "time": "06:00",\n'
-        '      "label": "6:00 AM",\n'
-        '      "medications": ["Levothyroxine 50 mcg"],\n'
-        '      "foodNote": "Take on empty stomach, 30-60 min before breakfast"\n'
-        '    },\n'
-        '    {\n'
-        '      "time": "08:00",\n'
-        '      "label": "8:00 AM",\n'
-        '      "medications": ["Metformin 500 mg (1st dose)", "Lisinopril 10 mg"],\n'
-        '      "foodNote": "Take with breakfast"\n'
-        '    },\n'
-        '    {\n'
-        '      "time": "18:00",\n'
-        '      "label": "6:00 PM",\n'
-        '      "medications": ["Metformin 500 mg (2nd dose)"],\n'
-        '      "foodNote": "Take with dinner"\n'
-        '    },\n'
-        '    {\n'
-        '      "time": "21:00",\n'
-        '      "label": "9:00 PM",\n'
-        '      "medications": ["Atorvastatin 20 mg"],\n'
-        '      "foodNote": ""\n'
-        '    }\n'
-        '  ],\n'
-        '  "spacing_notes": [\n'
-        '    "Levothyroxine at 6:00 AM, Metformin at 8:00 AM - spaced 2 hours apart as thyroid meds should be taken separately."\n'
-        '  ],\n'
-        '  "personalization_notes": "This schedule spaces thyroid medication from other meds, aligns Metformin with meals to reduce GI issues, and places the statin at night for optimal effectiveness."\n'
-        "}\n\n"
-        
-        "CRITICAL REQUIREMENTS:\n"
-        "1. Assign EVERY medication to at least one time slot. Do not skip any.\n"
-        "2. Use specific times (HH:mm format) between 06:00 and 22:00.\n"
-        "3. Each time_slot must have: time, label, medications (array), foodNote (string).\n"
-        "4. Sort time_slots by time (earliest first).\n"
-        "5. Include spacing_notes explaining any timing decisions for interactions.\n"
-        "6. Include personalization_notes summarizing the overall schedule rationale.\n"
+        '{ "personalization_notes": "Levothyroxine is first thing in the morning, four hours before your calcium, '
+        'so it is absorbed well. Metformin is paired with breakfast and dinner to ease stomach upset." }\n\n'
         "Only output JSON. No explanations outside the JSON."
     )
-    
+
     messages = [
-        SystemMessage(content="You are a medication scheduling assistant that outputs only valid JSON with specific times. Do not give medical advice, only timing recommendations. Use times between 06:00 and 22:00."),
+        SystemMessage(content="You are a medication scheduling assistant that outputs only valid JSON. Do not give medical advice, only explain the given timing."),
         HumanMessage(content=prompt)
     ]
-    
+
     try:
         response = model.invoke(messages)
         raw = response.content.strip()
-        
+
         # Strip markdown code blocks if model adds them
         if raw.startswith("```"):
             lines = raw.split("\n")
@@ -641,166 +603,96 @@ def MedicationScheduleAgentTool(
             if lines[-1].startswith("```"):
                 lines = lines[:-1]
             raw = "\n".join(lines)
-        
+
         data = json.loads(raw)
-        
-        # Validate time_slots exists and is a list
-        if "time_slots" not in data or not isinstance(data.get("time_slots"), list):
-            print("MedicationScheduleAgentTool: Missing or invalid time_slots")
+        notes = data.get("personalization_notes")
+        if not isinstance(notes, str) or not notes.strip():
+            print("MedicationScheduleNotesTool: Missing personalization_notes")
             return {"_fallback": True}
-        
-        time_slots = data["time_slots"]
-        
-        # Validate each time slot has required fields
-        for slot in time_slots:
-            if not isinstance(slot, dict):
-                print("MedicationScheduleAgentTool: time_slot is not a dict")
-                return {"_fallback": True}
-            if "time" not in slot or "medications" not in slot:
-                print("MedicationScheduleAgentTool: time_slot missing time or medications")
-                return {"_fallback": True}
-            if not isinstance(slot.get("medications"), list):
-                print("MedicationScheduleAgentTool: medications is not a list")
-                return {"_fallback": True}
-            # Ensure label exists
-            if "label" not in slot:
-                # Generate label from time
-                time_str = slot["time"]
-                try:
-                    hour = int(time_str.split(":")[0])
-                    minute = time_str.split(":")[1] if ":" in time_str else "00"
-                    if hour < 12:
-                        slot["label"] = f"{hour}:{minute} AM"
-                    elif hour == 12:
-                        slot["label"] = f"12:{minute} PM"
-                    else:
-                        slot["label"] = f"{hour - 12}:{minute} PM"
-                except:
-                    slot["label"] = time_str
-            # Ensure foodNote exists
-            if "foodNote" not in slot:
-                slot["foodNote"] = ""
-        
-        # Check that at least some medications were assigned
-        total_assigned = sum(len(slot.get("medications", [])) for slot in time_slots)
-        if total_assigned == 0 and len(medications) > 0:
-            print("MedicationScheduleAgentTool: No medications assigned")
-            return {"_fallback": True}
-        
-        # Sort time_slots by time
-        try:
-            time_slots.sort(key=lambda x: x.get("time", "99:99"))
-        except:
-            pass  # If sorting fails, keep original order
-        
-        # Ensure spacing_notes and personalization_notes exist
-        if "spacing_notes" not in data:
-            data["spacing_notes"] = []
-        if "personalization_notes" not in data:
-            data["personalization_notes"] = None
-        
-        return data
-        
+
+        return {"personalization_notes": notes.strip()}
+
     except (json.JSONDecodeError, Exception) as e:
-        # Return fallback sentinel on any error
-        print(f"MedicationScheduleAgentTool error: {e}")
+        print(f"MedicationScheduleNotesTool error: {e}")
         return {"_fallback": True}
 
 
 def CycleRecommendationsAgentTool(
     flow_log_entries: Dict,
-    model
+    model,
+    cycle: Optional[Dict] = None
 ) -> Dict:
     """
-    Generate personalized cycle phase recommendations using LLM.
-    
+    Write phase recommendations around the cycle engine's numbers using LLM.
+
+    Phase, cycle day and the onset range come from backend.llm.cycle.analyze_cycle
+    (pass `cycle` to reuse an already computed result); the model only writes
+    the recommendations and personalization_notes.
+
     Args:
         flow_log_entries: Dict of date strings to entry objects
             e.g. { "2025-01-15": { "flow": "medium", "symptoms": ["cramps"], "crampPain": 5, "discharge": "none" }, ... }
         model: ChatGoogleGenerativeAI instance
-    
+        cycle: Optional analyze_cycle() result
+
     Returns:
         Dict with current_phase, cycle_day, predicted_period_onset, recommendations, personalization_notes
         Or {"_fallback": True} if LLM fails
     """
-    from datetime import datetime, timedelta
-    
+    from backend.llm.cycle import analyze_cycle
+
     if not flow_log_entries:
         return {"_fallback": True}
-    
-    # Get today's date for context
-    today_str = datetime.utcnow().strftime("%Y-%m-%d")
-    
-    # Build the prompt
+
+    if cycle is None:
+        cycle = analyze_cycle(flow_log_entries)
+
+    # Only recent entries matter for symptom-aware wording
+    recent = dict(sorted(flow_log_entries.items())[-14:])
+
     prompt = (
-        "You are a wellness assistant helping users track their menstrual cycle. Your role is to:\n"
-        "1. Infer the user's current cycle phase and cycle day from their flow log\n"
-        "2. Predict their next period onset date (as an estimate)\n"
-        "3. Provide 3-5 short wellness recommendations for the current phase\n\n"
-        
+        "You are a wellness assistant helping users track their menstrual cycle. "
+        "The user's cycle position has already been calculated from their flow log:\n\n"
+        f"- Current phase: {cycle.get('current_phase') or 'unknown'}\n"
+        f"- Cycle day: {cycle.get('cycle_day') or 'unknown'}\n"
+        f"- Average cycle length: {cycle.get('cycle_length_mean') or 28} days "
+        f"({cycle.get('cycles_observed', 0)} cycles observed)\n"
+        f"- Predicted next period: {cycle.get('predicted_period_onset') or 'unknown'}\n\n"
+        f"RECENT FLOW LOG ENTRIES:\n{json.dumps(recent, indent=2)}\n\n"
+
+        "Write 3-5 short wellness recommendations for this phase, taking any logged symptoms into account, "
+        "and a brief friendly personalization_notes summary that mentions the phase, the prediction and relevant symptoms. "
+        "Use the numbers above as given; do not recalculate them.\n\n"
+
         "IMPORTANT RULES:\n"
         "- Do NOT give medical or diagnostic advice.\n"
         "- Do NOT predict fertility or give pregnancy advice.\n"
-        "- Only provide tracking support, phase awareness, and general wellness recommendations.\n"
         "- Always recommend consulting a healthcare provider for medical concerns.\n"
-        "- Predictions are estimates only; include this disclaimer.\n\n"
-        
-        "CYCLE PHASE LOGIC (use this to derive phase):\n"
-        "- A period starts when flow is logged (light/medium/heavy/clots) after a gap of >5 days from the previous flow.\n"
-        "- Typical cycle length is 28 days (can vary 21-35 days).\n"
-        "- Phases based on cycle day (day 1 = first day of period):\n"
-        "  - Menstrual: Days 1-5 (bleeding phase)\n"
-        "  - Follicular: Days 6-13 (post-period, before ovulation)\n"
-        "  - Ovulation: Days 14-16 (most fertile window)\n"
-        "  - Luteal: Days 17-28 (post-ovulation, before next period)\n\n"
-        
-        f"TODAY'S DATE: {today_str}\n\n"
-        
-        f"USER'S FLOW LOG (dates with logged data):\n{json.dumps(flow_log_entries, indent=2)}\n\n"
-        
-        "ANALYSIS STEPS:\n"
-        "1. Find the most recent period start (first day of consecutive flow days after a gap >5 days).\n"
-        "2. Calculate cycle day = (today - period_start) % 28 + 1.\n"
-        "3. Determine current phase from cycle day.\n"
-        "4. Predict next period onset = last_period_start + 28 days (give a range of 2-3 days for variability).\n"
-        "5. Generate 3-5 wellness recommendations based on current phase and any logged symptoms.\n\n"
-        
+        "- Predictions are estimates only; include this disclaimer in personalization_notes.\n\n"
+
         "OUTPUT FORMAT - Return STRICT JSON only, no markdown:\n"
         "{\n"
-        '  "current_phase": "Luteal",\n'
-        '  "cycle_day": 22,\n'
-        '  "predicted_period_onset": "2025-02-15 to 2025-02-17",\n'
         '  "recommendations": [\n'
-        '    { "icon": "fa-spa", "title": "Wind Down Gradually", "text": "Energy may be lower as your period approaches. Focus on gentle exercise like yoga or walking." },\n'
-        '    { "icon": "fa-moon", "title": "Prioritize Sleep", "text": "Progesterone levels are high. Aim for 8 hours and avoid caffeine after noon." },\n'
-        '    { "icon": "fa-wheat-awn", "title": "Complex Carbs", "text": "Cravings are common. Choose whole grains, sweet potatoes, and magnesium-rich foods." }\n'
+        '    { "icon": "fa-spa", "title": "Wind Down Gradually", "text": "Energy may be lower as your period approaches. Focus on gentle exercise like yoga or walking." }\n'
         '  ],\n'
-        '  "personalization_notes": "Based on your logged data, you appear to be in the Luteal phase (day 22). Your next period is predicted around Feb 15-17. I noticed you logged cramps recently—consider gentle stretching and warmth for comfort. This is an estimate; cycles can vary."\n'
+        '  "personalization_notes": "You appear to be in the Luteal phase (day 22) and your next period is expected around Feb 15-17. This is an estimate; cycles can vary."\n'
         "}\n\n"
-        
+
         "ICON OPTIONS (use Font Awesome solid icons):\n"
         "- fa-mug-hot, fa-bowl-food, fa-droplet, fa-bed, fa-dumbbell, fa-carrot, fa-brain, fa-people-group\n"
         "- fa-fire, fa-apple-whole, fa-heart-pulse, fa-comments, fa-spa, fa-wheat-awn, fa-moon, fa-hand-holding-heart\n\n"
-        
-        "CRITICAL REQUIREMENTS:\n"
-        "1. current_phase must be one of: 'Menstrual', 'Follicular', 'Ovulation', 'Luteal', or null if unknown.\n"
-        "2. cycle_day must be an integer 1-28, or null if unknown.\n"
-        "3. predicted_period_onset should be a date or short range (e.g. '2025-02-15' or '2025-02-15 to 2025-02-17'), or null.\n"
-        "4. recommendations must be an array of objects with icon, title, and text.\n"
-        "5. personalization_notes should be a brief, friendly summary mentioning the phase, prediction, and any relevant logged symptoms.\n"
-        "6. If there's not enough data to determine phase, set current_phase to null and provide generic wellness advice.\n"
         "Only output JSON. No explanations outside the JSON."
     )
-    
+
     messages = [
-        SystemMessage(content="You are a menstrual cycle wellness assistant that outputs only valid JSON. Do not give medical advice, fertility predictions, or diagnoses. Only provide phase tracking, period onset estimates, and general wellness recommendations."),
+        SystemMessage(content="You are a menstrual cycle wellness assistant that outputs only valid JSON. Do not give medical advice, fertility predictions, or diagnoses. Only provide general wellness recommendations."),
         HumanMessage(content=prompt)
     ]
-    
+
     try:
         response = model.invoke(messages)
         raw = response.content.strip()
-        
+
         # Strip markdown code blocks if model adds them
         if raw.startswith("```"):
             lines = raw.split("\n")
@@ -809,22 +701,13 @@ def CycleRecommendationsAgentTool(
             if lines[-1].startswith("```"):
                 lines = lines[:-1]
             raw = "\n".join(lines)
-        
+
         data = json.loads(raw)
-        
-        # Validate required fields exist
-        if "current_phase" not in data:
-            data["current_phase"] = None
-        if "cycle_day" not in data:
-            data["cycle_day"] = None
-        if "predicted_period_onset" not in data:
-            data["predicted_period_onset"] = None
+
         if "recommendations" not in data or not isinstance(data.get("recommendations"), list):
             print("CycleRecommendationsAgentTool: Missing or invalid recommendations")
             return {"_fallback": True}
-        if "personalization_notes" not in data:
-            data["personalization_notes"] = None
-        
+
         # Validate recommendations structure
         for rec in data["recommendations"]:
             if not isinstance(rec, dict):
@@ -836,26 +719,15 @@ def CycleRecommendationsAgentTool(
             # Ensure icon exists (default if missing)
             if "icon" not in rec:
                 rec["icon"] = "fa-heart-pulse"
-        
-        # Validate current_phase if present
-        valid_phases = ["Menstrual", "Follicular", "Ovulation", "Luteal", None]
-        if data["current_phase"] not in valid_phases:
-            # Try to normalize
-            phase_lower = str(data["current_phase"]).lower() if data["current_phase"] else None
-            phase_map = {"menstrual": "Menstrual", "follicular": "Follicular", "ovulation": "Ovulation", "luteal": "Luteal"}
-            data["current_phase"] = phase_map.get(phase_lower, None)
-        
-        # Validate cycle_day if present
-        if data["cycle_day"] is not None:
-            try:
-                data["cycle_day"] = int(data["cycle_day"])
-                if data["cycle_day"] < 1 or data["cycle_day"] > 35:
-                    data["cycle_day"] = None
-            except (ValueError, TypeError):
-                data["cycle_day"] = None
-        
-        return data
-        
+
+        return {
+            "current_phase": cycle.get("current_phase"),
+            "cycle_day": cycle.get("cycle_day"),
+            "predicted_period_onset": cycle.get("predicted_period_onset"),
+            "recommendations": data["recommendations"],
+            "personalization_notes": data.get("personalization_notes"),
+        }
+
     except (json.JSONDecodeError, Exception) as e:
         # Return fallback sentinel on any error
         print(f"CycleRecommendationsAgentTool error: {e}")
@@ -885,6 +757,6 @@ OPTIONAL_TOOLS = {
     "emotion_eval": WellnessEmotionEvalTool,
     "medication_schedule": MedicationScheduleTool,
     "contraindication_check": ContraindicationCheckTool,
-    "medication_schedule_agent": MedicationScheduleAgentTool,
+    "medication_schedule_notes": MedicationScheduleNotesTool,
     "cycle_recommendations_agent": CycleRecommendationsAgentTool,
 }
@@ -0,0 +1,35 @@
+"""Which chat turns may be answered from the shared semantic cache."""
+import pytest
+
+from backend.llm.cache import SemanticResponseCache, is_generic_question
+
+
+@pytest.mark.parametrize("text", [
+    "How much water should an adult drink a day?",
+    "What are good sources of protein?",
+    "Is stretching before running useful?",
+])
+def test_generic_questions(text):
+    assert is_generic_question(text)
+
+
+@pytest.mark.parametrize("text", [
+    "I am pregnant, can I drink coffee?",
+    "I have type 1 diabetes, what should I eat before a run?",
+    "I take lisinopril, is ibuprofen ok?",
+    "We are vegan, where do we get B12?",
+    "Is it safe to run with asthma?",
+    "Can pregnant women eat sushi?",
+    "What's a good dinner for our family?",
+    "How is my streak going?",
+])
+def test_personal_questions_are_not_cached(text):
+    assert not is_generic_question(text)
+
+
+def test_follow_ups_are_not_cached():
+    assert not is_generic_question("What about protein?", history=[{"role": "user", "content": "hi"}])
+
+
+def test_default_threshold_matches_client_default():
+    assert SemanticResponseCache().threshold == 0.8
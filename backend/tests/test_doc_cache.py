@@ -0,0 +1,91 @@
+"""DocumentCache against a fake Firestore whose reads the test can interleave with writes."""
+import pytest
+
+from backend.app.doc_cache import DocumentCache
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDoc:
+    def __init__(self, db, key):
+        self.db = db
+        self.key = key
+
+    def get(self):
+        self.db.reads += 1
+        if self.db.during_read:
+            self.db.during_read()
+        return FakeSnapshot(self.db.docs.get(self.key))
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    def document(self, doc_id):
+        return FakeDoc(self.db, (self.name, doc_id))
+
+
+class FakeDB:
+    def __init__(self, docs=None):
+        self.docs = docs or {}
+        self.reads = 0
+        self.during_read = None
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+
+def test_hits_after_first_read():
+    db = FakeDB({("ProfileInfo", "u1"): {"Height": 180}})
+    cache = DocumentCache(db)
+    assert cache.get("ProfileInfo", "u1") == {"Height": 180}
+    assert cache.get("ProfileInfo", "u1") == {"Height": 180}
+    assert db.reads == 1
+
+
+def test_invalidate_during_read_skips_the_fill():
+    db = FakeDB({("ProfileInfo", "u1"): {"Height": 180}})
+    cache = DocumentCache(db)
+
+    def write():
+        db.docs[("ProfileInfo", "u1")] = {"Height": 181}
+        cache.invalidate("ProfileInfo", "u1")
+
+    db.during_read = write
+    cache.get("ProfileInfo", "u1")
+    db.during_read = None
+    assert cache.get("ProfileInfo", "u1") == {"Height": 181}
+    assert db.reads == 2
+
+
+def test_generations_do_not_outlive_reads():
+    db = FakeDB()
+    cache = DocumentCache(db, max_entries=10)
+    for i in range(100):
+        cache.get("Medications", f"u{i}")
+        cache.invalidate("Medications", f"u{i}")
+    assert cache._generations == {}
+    assert cache._readers == {}
+
+
+def test_failed_read_releases_the_key():
+    db = FakeDB()
+    cache = DocumentCache(db)
+
+    def fail():
+        raise RuntimeError("unavailable")
+
+    db.during_read = fail
+    with pytest.raises(RuntimeError):
+        cache.get("Goals", "u1")
+    assert cache._readers == {}
+    assert cache.stats()["size"] == 0
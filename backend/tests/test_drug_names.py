@@ -0,0 +1,41 @@
+"""Drug-name resolution, in particular that fuzzy matching doesn't map unknown drugs onto known ones."""
+import pytest
+
+from backend.llm.drug_names import edit_distance, resolve_name
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Lipitor 20mg", ["atorvastatin"]),
+    ("atorvastatin calcium", ["atorvastatin"]),
+    ("metformin ER", ["metformin"]),
+    # typos
+    ("metfromin", ["metformin"]),
+    ("atorvastatn", ["atorvastatin"]),
+    ("lisinoprl", ["lisinopril"]),
+    ("ibuprofin", ["ibuprofen"]),
+    ("warfarn", ["warfarin"]),
+])
+def test_resolves_known_names_and_typos(text, expected):
+    assert resolve_name(text) == expected
+
+
+# Drugs that are not in the data but share a stem with one that is
+@pytest.mark.parametrize("text, wrong", [
+    ("Azithromycin", "clarithromycin"),
+    ("Nadolol", "acetaminophen"),
+    ("Buspirone", "spironolactone"),
+    ("Clonidine", "quinidine"),
+    ("Tizanidine", "quinidine"),
+    ("Aripiprazole", "omeprazole"),
+    ("Pravastatin", "lovastatin"),
+    ("Buprenorphine", "morphine"),
+    ("Vortioxetine", "duloxetine"),
+    ("Bisoprolol", "metoprolol"),
+])
+def test_unknown_drugs_do_not_fuzzy_match(text, wrong):
+    assert wrong not in resolve_name(text)
+
+
+def test_edit_distance_counts_transpositions_once():
+    assert edit_distance("metfromin", "metformin", 2) == 1
+    assert edit_distance("pravastatin", "lovastatin", 2) == 3
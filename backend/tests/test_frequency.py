@@ -0,0 +1,49 @@
+"""Frequency parsing: counts only mean per-day when the phrase says so, and unreadable phrases stay unscheduled."""
+import pytest
+
+from backend.llm.frequency import parse_frequency
+
+
+@pytest.mark.parametrize("text, count, every_n_days", [
+    ("twice daily", 2, 1),
+    ("BID", 2, 1),
+    ("1x/day", 1, 1),
+    ("three times a day with meals", 3, 1),
+    ("once", 1, 1),
+    ("once daily for 7 days", 1, 1),
+    ("bid x 10 days", 2, 1),
+    ("q48h", 1, 2),
+    ("every other day", 1, 2),
+    ("twice a week", 1, 4),
+    ("3 times a week", 1, 2),
+    ("2x/wk", 1, 4),
+    ("once a week", 1, 7),
+    ("weekly", 1, 7),
+    ("every 2 weeks", 1, 14),
+    ("every two weeks", 1, 14),
+    ("monthly", 1, 30),
+    ("twice monthly", 1, 15),
+    ("once every 3 months", 1, 90),
+])
+def test_count_and_spacing(text, count, every_n_days):
+    spec = parse_frequency(text)
+    assert spec["parsed"]
+    assert (spec["count"], spec["every_n_days"]) == (count, every_n_days)
+
+
+@pytest.mark.parametrize("text", ["every 1.5 days", "yearly", "once a year", "2 tablets", "take as directed"])
+def test_unreadable_phrases_are_not_daily(text):
+    spec = parse_frequency(text)
+    assert not spec["parsed"]
+    assert spec["count"] == 0
+
+
+def test_empty_frequency_is_once_daily():
+    spec = parse_frequency("")
+    assert spec["parsed"] and spec["count"] == 1 and spec["every_n_days"] == 1
+
+
+def test_interval_and_anchors():
+    assert parse_frequency("q8h")["interval_hours"] == 8
+    spec = parse_frequency("once every morning before breakfast")
+    assert spec["count"] == 1 and spec["food"] == "empty_stomach"
@@ -0,0 +1,141 @@
+"""LiveContextRegistry against a fake Firestore whose on_snapshot callbacks the test drives."""
+import time
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from backend.app.live_context import LiveContextRegistry
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeWatch:
+    def __init__(self):
+        self.unsubscribed = False
+
+    def unsubscribe(self):
+        self.unsubscribed = True
+
+
+class FakeRef:
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+
+    def collection(self, name):
+        return FakeRef(self.db, f"{self.path}/{name}".lstrip("/"))
+
+    def document(self, doc_id):
+        return FakeRef(self.db, f"{self.path}/{doc_id}")
+
+    def on_snapshot(self, callback):
+        watch = FakeWatch()
+        self.db.listeners[self.path] = (callback, watch)
+        return watch
+
+
+class FakeDB(FakeRef):
+    def __init__(self):
+        super().__init__(self, "")
+        self.listeners = {}
+
+    def push(self, user_id, data):
+        callback, _ = self.listeners[f"UserContext/{user_id}"]
+        callback([FakeSnapshot(user_id, data)], [], None)
+
+
+CONTEXT = {"complete": True, "profile": {"BenjiFacts": "{}"}, "recent_checkins": []}
+
+
+def test_activate_attaches_one_user_context_listener():
+    db = FakeDB()
+    registry = LiveContextRegistry(db)
+    registry.activate("u1")
+    registry.activate("u1")
+    assert list(db.listeners) == ["UserContext/u1"]
+    # Not usable until the first snapshot has arrived
+    assert registry.get("u1") is None
+    db.push("u1", CONTEXT)
+    assert registry.get("u1") == CONTEXT
+
+
+def test_get_does_not_attach():
+    db = FakeDB()
+    registry = LiveContextRegistry(db)
+    assert registry.get("u1") is None
+    assert db.listeners == {}
+
+
+def test_updates_replace_the_document():
+    db = FakeDB()
+    registry = LiveContextRegistry(db)
+    registry.activate("u1")
+    db.push("u1", CONTEXT)
+    db.push("u1", {**CONTEXT, "recent_checkins": [{"id": "c1", "dayScore": 7}]})
+    assert registry.get("u1")["recent_checkins"] == [{"id": "c1", "dayScore": 7}]
+
+
+def test_missing_document_reads_as_none():
+    db = FakeDB()
+    registry = LiveContextRegistry(db)
+    registry.activate("u1")
+    db.push("u1", None)
+    assert registry.get("u1") is None
+    assert registry.stats()["ready"] == 1
+
+
+def test_returned_context_is_a_copy():
+    db = FakeDB()
+    registry = LiveContextRegistry(db)
+    registry.activate("u1")
+    db.push("u1", CONTEXT)
+    registry.get("u1")["profile"].clear()
+    assert registry.get("u1")["profile"] == {"BenjiFacts": "{}"}
+
+
+def test_deactivate_unsubscribes():
+    db = FakeDB()
+    registry = LiveContextRegistry(db)
+    registry.activate("u1")
+    _, watch = db.listeners["UserContext/u1"]
+    registry.deactivate("u1")
+    assert watch.unsubscribed
+    assert registry.get("u1") is None
+
+
+def test_get_sweeps_idle_users():
+    db = FakeDB()
+    registry = LiveContextRegistry(db, idle_seconds=60, sweep_seconds=30)
+    registry.activate("idle")
+    _, watch = db.listeners["UserContext/idle"]
+    registry._contexts["idle"].last_used = time.time() - 120
+
+    # Sweeps are throttled to once per sweep_seconds
+    assert registry.get("someone-else") is None
+    assert registry.stats()["active_users"] == 1
+
+    registry._last_sweep = time.time() - 31
+    assert registry.get("someone-else") is None
+    assert registry.stats()["active_users"] == 0
+    assert watch.unsubscribed
+
+
+def test_max_users_drops_least_recently_used():
+    db = FakeDB()
+    registry = LiveContextRegistry(db, max_users=2)
+    registry.activate("a")
+    _, first = db.listeners["UserContext/a"]
+    registry._contexts["a"].last_used = time.time() - 10
+    registry.activate("b")
+    registry.activate("c")
+    assert set(registry._contexts) == {"b", "c"}
+    assert first.unsubscribed
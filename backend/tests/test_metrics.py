@@ -0,0 +1,43 @@
+"""Shared check-in metric definitions and the three readers built on them."""
+import math
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+pytest.importorskip("numpy")
+
+from backend.app.checkin_stats import rebuild_stats
+from backend.app.insights import to_columns
+from backend.app.metrics import COLUMNS, checkin_day, checkin_values, to_number
+from backend.app.timeseries import checkin_row
+
+CHECKIN = {"date": "2026-03-04", "sleep": "7", "stress": True, "mood": "", "fitness": 6, "drinkScore": "bad"}
+
+
+def test_coercion():
+    assert to_number("7.5") == 7.5
+    assert to_number(True) is None
+    assert to_number("") is None
+    assert to_number("bad") is None
+
+
+def test_checkin_values_use_field_aliases():
+    assert checkin_values(CHECKIN) == {"sleep": 7.0, "fitnessScore": 6.0}
+
+
+def test_checkin_day():
+    assert checkin_day({"createdAt": "2026-03-04T08:00:00.000000Z"}) == "2026-03-04"
+    assert checkin_day({"date": "2026-W10-1"}) is None
+    assert checkin_day({}) is None
+
+
+def test_stats_series_and_insights_agree():
+    stats = rebuild_stats([CHECKIN])
+    bucket = stats["days"]["2026-03-04"]
+    row = checkin_row(CHECKIN)
+    _, values = to_columns([CHECKIN])
+    for j, (name, column) in enumerate(COLUMNS.items()):
+        expected = checkin_values(CHECKIN).get(name)
+        assert bucket.get(f"{name}_sum") == expected
+        assert row[column] == expected
+        assert (math.isnan(values[0, j]) if expected is None else values[0, j] == expected)
@@ -15,12 +15,19 @@
     return null;
   }
 
+  /** Authorization header for the signed session token issued at login; every user-scoped route requires it. */
+  function authHeaders(headers) {
+    var session = getSession();
+    var extra = session && session.token ? { Authorization: "Bearer " + session.token } : {};
+    return Object.assign(extra, headers || {});
+  }
+
   function request(path, options) {
     options = options || {};
     var url = path.indexOf("http") === 0 ? path : API_BASE + path;
     var opts = {
       method: options.method || "GET",
-      headers: Object.assign({ "Content-Type": "application/json" }, options.headers),
+      headers: authHeaders(Object.assign({ "Content-Type": "application/json" }, options.headers)),
     };
     if (options.body && typeof options.body === "object" && !(options.body instanceof FormData)) {
       opts.body = JSON.stringify(options.body);
@@ -33,6 +40,7 @@
   var BenjiAPI = {
     API_BASE: API_BASE,
     getSession: getSession,
+    authHeaders: authHeaders,
 
     getProfileInfo: function (userId) {
       return request("/profileinfo/" + userId).then(function (r) {
@@ -89,13 +97,38 @@
       });
     },
 
-    getCheckins: function (userId) {
-      return request("/checkins/" + userId).then(function (r) {
+    // params (optional): { since: ISO timestamp, limit: n, cursor: value of X-Next-Cursor }
+    getCheckins: function (userId, params) {
+      var query = [];
+      params = params || {};
+      ["since", "limit", "cursor"].forEach(function (key) {
+        if (params[key]) query.push(key + "=" + encodeURIComponent(params[key]));
+      });
+      var path = "/checkins/" + userId + (query.length ? "?" + query.join("&") : "");
+      return request(path).then(function (r) {
         if (r.status === 404) return [];
         if (!r.ok) throw new Error("Checkins fetch failed");
         return r.json();
       });
     },
+    // from/to: "YYYY-MM-DD" (optional; defaults to the last 90 days)
+    getAdherence: function (userId, fromDate, toDate) {
+      var query = [];
+      if (fromDate) query.push("from_date=" + encodeURIComponent(fromDate));
+      if (toDate) query.push("to_date=" + encodeURIComponent(toDate));
+      var path = "/adherence/" + userId + (query.length ? "?" + query.join("&") : "");
+      return request(path).then(function (r) {
+        if (!r.ok) throw new Error("Adherence fetch failed");
+        return r.json();
+      });
+    },
+    getInsights: function (userId, seriesDays) {
+      var path = "/insights/" + userId + (seriesDays ? "?series_days=" + seriesDays : "");
+      return request(path).then(function (r) {
+        if (!r.ok) throw new Error("Insights fetch failed");
+        return r.json();
+      });
+    },
     postCheckin: function (body) {
       return request("/checkins", { method: "POST", body: body }).then(function (r) {
         if (!r.ok) throw new Error("Save check-in failed");
@@ -118,12 +151,13 @@
       });
     },
 
-    getMedicationSchedule: function (userId, useAi) {
-      // Build URL with optional use_ai query parameter
-      var url = "/medication-schedule/" + userId;
-      if (useAi === true) {
-        url += "?use_ai=true";
-      }
+    getMedicationSchedule: function (userId, useAi, day) {
+      // Build URL with optional use_ai and wake/sleep ("HH:mm") query parameters
+      var params = [];
+      if (useAi === true) params.push("use_ai=true");
+      if (day && day.wakeTime) params.push("wake_time=" + encodeURIComponent(day.wakeTime));
+      if (day && day.sleepTime) params.push("sleep_time=" + encodeURIComponent(day.sleepTime));
+      var url = "/medication-schedule/" + userId + (params.length ? "?" + params.join("&") : "");
       return request(url).then(function (r) {
         if (r.status === 404) {
           return {
@@ -172,9 +206,42 @@
       }
     },
 
+    // Check-in questions, cached in localStorage and revalidated with the bundle's ETag
+    QUESTIONS_CACHE_KEY_PREFIX: "Benji_relevant_questions_",
+
+    getRelevantQuestions: function (userId, activeGoals) {
+      var key = this.QUESTIONS_CACHE_KEY_PREFIX + userId;
+      var cached = null;
+      try {
+        cached = JSON.parse(localStorage.getItem(key) || "null");
+      } catch (e) {
+        cached = null;
+      }
+      var headers = cached && cached.etag ? { "If-None-Match": cached.etag } : {};
+      return request("/relevant-questions", {
+        method: "POST",
+        headers: headers,
+        body: { user_id: userId, active_goals: activeGoals || [] },
+      }).then(function (r) {
+        if (r.status === 304 && cached) return cached.questions;
+        if (!r.ok) throw new Error("Failed to fetch questions");
+        var etag = r.headers.get("ETag");
+        return r.json().then(function (data) {
+          try {
+            if (etag) localStorage.setItem(key, JSON.stringify({ etag: etag, questions: data.questions }));
+          } catch (e) {
+            // ignore quota errors
+          }
+          return data.questions;
+        });
+      });
+    },
+
     // Cycle recommendations API method
-    getCycleRecommendations: function (userId) {
-      return request("/menstrual-recommendations/" + userId).then(function (r) {
+    // Phase/prediction come from the backend cycle engine; useAi adds Benji-written recommendations
+    getCycleRecommendations: function (userId, useAi) {
+      var url = "/menstrual-recommendations/" + userId + (useAi === true ? "?use_ai=true" : "");
+      return request(url).then(function (r) {
         if (r.status === 404) {
           return {
             user_id: userId,
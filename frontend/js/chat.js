@@ -108,6 +108,61 @@ document.addEventListener("DOMContentLoaded", () => {
   sessions = loadSavedHistory();
   renderHistoryList();
 
+  // ─────────────────────────────────────────────────────────────
+  // WebSocket chat session (server keeps context + history; falls back to POST /chat)
+  // ─────────────────────────────────────────────────────────────
+  let chatSocket = null;
+  let socketReady = false;
+  let pendingTurn = null;
+
+  function connectChatSocket() {
+    if (!userId || !("WebSocket" in window)) return;
+    // Same host as the REST API (http -> ws, https -> wss); browsers can't send headers, so the token rides in the query
+    const wsBase = window.BenjiAPI.API_BASE.replace(/^http/, "ws");
+    const tokenQuery = session.token ? `?token=${encodeURIComponent(session.token)}` : "";
+    chatSocket = new WebSocket(`${wsBase}/ws/chat/${encodeURIComponent(userId)}${tokenQuery}`);
+
+    chatSocket.onmessage = (event) => {
+      const frame = JSON.parse(event.data);
+      if (frame.type === "ready") {
+        socketReady = true;
+        if (conversationHistory.length) resetSocketHistory();
+      } else if (frame.type === "token" && pendingTurn) {
+        pendingTurn.text += frame.text;
+        pendingTurn.onToken(pendingTurn.text);
+      } else if (frame.type === "done" && pendingTurn) {
+        pendingTurn.resolve(frame.response);
+        pendingTurn = null;
+      } else if (frame.type === "error" && pendingTurn) {
+        pendingTurn.reject(new Error(frame.detail || "Chat error"));
+        pendingTurn = null;
+      }
+    };
+
+    chatSocket.onclose = () => {
+      socketReady = false;
+      chatSocket = null;
+      if (pendingTurn) {
+        pendingTurn.reject(new Error("Chat connection closed"));
+        pendingTurn = null;
+      }
+    };
+  }
+
+  function resetSocketHistory() {
+    if (!socketReady) return;
+    chatSocket.send(JSON.stringify({ type: "reset", history: conversationHistory }));
+  }
+
+  function sendViaSocket(text, onToken) {
+    return new Promise((resolve, reject) => {
+      pendingTurn = { text: "", onToken, resolve, reject };
+      chatSocket.send(JSON.stringify({ type: "message", text }));
+    });
+  }
+
+  connectChatSocket();
+
   function createSession() {
     return {
       id: `session-${Date.now()}-${Math.random().toString(16).slice(2)}`,
@@ -267,6 +322,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
   function startFreshChat() {
     conversationHistory = [];
+    resetSocketHistory();
     currentSession = createSession();
     restoreWelcome();
     const welcomeEl = chatHistoryEl.querySelector(".chat-welcome");
@@ -288,6 +344,7 @@ document.addEventListener("DOMContentLoaded", () => {
       role: msg.role,
       content: msg.content,
     }));
+    resetSocketHistory();
     currentSession = session;
   }
 
@@ -319,10 +376,27 @@ document.addEventListener("DOMContentLoaded", () => {
     chatHistoryEl.appendChild(thinkingEl);
     chatHistoryEl.scrollTop = chatHistoryEl.scrollHeight;
 
+    if (socketReady && !pendingTurn) {
+      try {
+        const reply = await sendViaSocket(text, (partial) => {
+          thinkingEl.innerHTML = `<b>Benji:</b> ${marked.parse(partial)}`;
+          chatHistoryEl.scrollTop = chatHistoryEl.scrollHeight;
+        });
+        thinkingEl.remove();
+        if (!reply) return;
+        appendMessage("Benji", reply);
+        recordMessage("Benji", reply);
+        return;
+      } catch (err) {
+        // Fall through to the HTTP endpoint
+        console.error(err);
+      }
+    }
+
     try {
       const res = await fetch("http://localhost:8000/chat", {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }),
         body: JSON.stringify({
           user_input: text,
           user_id: userId,
@@ -391,6 +465,7 @@ document.addEventListener("DOMContentLoaded", () => {
     confirmClearHistoryBtn.addEventListener("click", () => {
     sessions = [];
     conversationHistory = [];
+    resetSocketHistory();
     localStorage.removeItem(storageKey);
     currentSession = createSession();
     renderHistoryList();
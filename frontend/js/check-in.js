@@ -31,6 +31,7 @@ async function initializeCheckIn() {
     
     // Build goal screens dynamically
     buildGoalScreens();
+    applyGoalQuestions();
     hideTabs();
     
     // Initialize visibility
@@ -123,6 +124,27 @@ function buildGoalScreens() {
   });
 }
 
+// Goal-specific prompts from /relevant-questions (ETag-cached by BenjiAPI) as note hints
+async function applyGoalQuestions() {
+  const api = window.BenjiAPI;
+  const session = api && api.getSession ? api.getSession() : null;
+  if (!session || !session.user_id || !api.getRelevantQuestions) return;
+
+  try {
+    const goalTypes = userGoals.map(goal => goal.type || goal.goalType).filter(Boolean);
+    const questions = await api.getRelevantQuestions(session.user_id, goalTypes);
+    userGoals.forEach((goal, index) => {
+      const prompts = questions && questions[goal.type || goal.goalType];
+      const notes = document.getElementById(`goal-${index}-notes`);
+      if (notes && Array.isArray(prompts) && prompts.length) {
+        notes.placeholder = `What did you do today? Worth noting: ${prompts.join(' ')}`;
+      }
+    });
+  } catch (err) {
+    console.error('Relevant questions fetch failed', err);
+  }
+}
+
 // Hide the tab bar (we use linear flow only)
 function hideTabs() {
   const nav = document.getElementById('checkinTabs');
@@ -568,7 +568,7 @@
 
       // Calculate progress based on check-ins
       var checkIns = (g.CheckIns && g.CheckIns.checkins) || [];
-      var currentValue = checkIns.length || 0;
+      var currentValue = typeof g.CheckInCount === "number" ? g.CheckInCount : (checkIns.length || 0);
 
       // Calculate progress percentage
       var progressPct = 0;
@@ -687,8 +687,10 @@
         // Fetch medication schedule using persisted mode (standard or AI)
         var medsPromise = fetchMedicationSchedule(session.user_id);
 
-        // Fetch check-ins and determine if today's check-in is done
-        var checkinsPromise = window.BenjiAPI.getCheckins(session.user_id)
+        // Fetch only today's check-ins (delta since local midnight) to see if today's is done
+        var now = new Date();
+        var startOfToday = new Date(now.getFullYear(), now.getMonth(), now.getDate()).toISOString();
+        var checkinsPromise = window.BenjiAPI.getCheckins(session.user_id, { since: startOfToday })
           .then(function (checkins) {
             console.log("Checkins API response:", checkins);
             if (checkins && checkins.length > 0) {
@@ -228,7 +228,7 @@
     if (goalType) {
       url += `?goal_type=${goalType}`;
     }
-    const response = await fetch(url);
+    const response = await fetch(url, { headers: window.BenjiAPI.authHeaders() });
     if (!response.ok) {
       throw new Error(`Failed to fetch goals: ${response.statusText}`);
     }
@@ -241,9 +241,9 @@
   async function saveGoal(userId, goalData) {
     const response = await fetch(`${API_BASE}/goals/${userId}/accepted`, {
       method: "POST",
-      headers: {
+      headers: window.BenjiAPI.authHeaders({
         "Content-Type": "application/json"
-      },
+      }),
       body: JSON.stringify({
         goals: [goalData]
       })
@@ -255,25 +255,82 @@
   }
 
   /**
-   * Fetch chat history from API
+   * Local copies of chat/health history so later visits only fetch what changed
    */
-  async function fetchChatHistory(userId) {
-    const response = await fetch(`${API_BASE}/chat-history/${userId}`);
-    if (!response.ok) {
-      throw new Error(`Failed to fetch chat history: ${response.statusText}`);
+  function readSyncCache(key) {
+    try {
+      return JSON.parse(localStorage.getItem(key));
+    } catch (e) {
+      return null;
+    }
+  }
+
+  function writeSyncCache(key, value) {
+    try {
+      localStorage.setItem(key, JSON.stringify(value));
+    } catch (e) {
+      // ignore quota errors; next load does a full fetch
     }
-    return response.json();
   }
 
   /**
-   * Fetch health history (medication compliance) from API
+   * Fetch chat history from API (only messages newer than `since` when given,
+   * following X-Next-Cursor until every newer message has been fetched)
    */
-  async function fetchHealthHistory(userId, limit = 30) {
-    const response = await fetch(`${API_BASE}/health-history/${userId}?limit=${limit}`);
-    if (!response.ok) {
-      throw new Error(`Failed to fetch health history: ${response.statusText}`);
+  async function fetchChatHistory(userId, since = null) {
+    if (!since) {
+      const response = await fetch(`${API_BASE}/chat-history/${userId}`, { headers: window.BenjiAPI.authHeaders() });
+      if (!response.ok) {
+        throw new Error(`Failed to fetch chat history: ${response.statusText}`);
+      }
+      return response.json();
     }
-    return response.json();
+
+    const messages = [];
+    let cursor = null;
+    do {
+      const query = `?since=${encodeURIComponent(since)}` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : "");
+      const response = await fetch(`${API_BASE}/chat-history/${userId}${query}`, { headers: window.BenjiAPI.authHeaders() });
+      if (!response.ok) {
+        throw new Error(`Failed to fetch chat history: ${response.statusText}`);
+      }
+      const data = await response.json();
+      messages.push(...(data.messages || []));
+      cursor = response.headers.get("X-Next-Cursor");
+    } while (cursor);
+    return { messages };
+  }
+
+  /**
+   * Fetch health history (medication compliance) from API (only days updated
+   * after `since` when given, following X-Next-Cursor until all are fetched)
+   */
+  async function fetchHealthHistory(userId, limit = 30, since = null) {
+    if (!since) {
+      const response = await fetch(`${API_BASE}/health-history/${userId}?limit=${limit}`, {
+        headers: window.BenjiAPI.authHeaders()
+      });
+      if (!response.ok) {
+        throw new Error(`Failed to fetch health history: ${response.statusText}`);
+      }
+      return response.json();
+    }
+
+    const days = [];
+    let cursor = null;
+    do {
+      const query = `?limit=${limit}&since=${encodeURIComponent(since)}` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : "");
+      const response = await fetch(`${API_BASE}/health-history/${userId}${query}`, {
+        headers: window.BenjiAPI.authHeaders()
+      });
+      if (!response.ok) {
+        throw new Error(`Failed to fetch health history: ${response.statusText}`);
+      }
+      const data = await response.json();
+      days.push(...(data.days || []));
+      cursor = response.headers.get("X-Next-Cursor");
+    } while (cursor);
+    return { days };
   }
 
   /**
@@ -597,8 +654,19 @@
     showConversationsState("loading");
 
     try {
-      const data = await fetchChatHistory(session.user_id);
-      cachedChatHistory = data.messages || [];
+      const cacheKey = `benji_journal_chat_${session.user_id}`;
+      const synced = readSyncCache(cacheKey);
+      let messages;
+      if (synced && Array.isArray(synced.messages) && synced.lastTs) {
+        const data = await fetchChatHistory(session.user_id, synced.lastTs);
+        messages = synced.messages.concat(data.messages || []);
+      } else {
+        const data = await fetchChatHistory(session.user_id);
+        messages = data.messages || [];
+      }
+      cachedChatHistory = messages.slice(-500);
+      const last = cachedChatHistory[cachedChatHistory.length - 1];
+      writeSyncCache(cacheKey, { messages: cachedChatHistory, lastTs: last ? last.ts : null });
       renderConversationHistory(cachedChatHistory);
       conversationsLoaded = true;
     } catch (error) {
@@ -633,8 +701,25 @@
     showHealthHistoryState("loading");
 
     try {
-      const data = await fetchHealthHistory(session.user_id);
-      cachedHealthHistory = data.days || [];
+      const cacheKey = `benji_journal_health_${session.user_id}`;
+      const synced = readSyncCache(cacheKey);
+      let days;
+      if (synced && Array.isArray(synced.days) && synced.lastUpdatedAt) {
+        const data = await fetchHealthHistory(session.user_id, 30, synced.lastUpdatedAt);
+        const byDate = {};
+        synced.days.concat(data.days || []).forEach(day => { byDate[day.date] = day; });
+        days = Object.values(byDate);
+      } else {
+        const data = await fetchHealthHistory(session.user_id);
+        days = data.days || [];
+      }
+      days.sort((a, b) => (b.date || "").localeCompare(a.date || ""));
+      cachedHealthHistory = days.slice(0, 30);
+      const lastUpdatedAt = cachedHealthHistory.reduce(
+        (latest, day) => (day.updatedAt && day.updatedAt > latest ? day.updatedAt : latest),
+        ""
+      );
+      writeSyncCache(cacheKey, { days: cachedHealthHistory, lastUpdatedAt: lastUpdatedAt || null });
       renderHealthHistory(cachedHealthHistory);
       healthHistoryLoaded = true;
     } catch (error) {
@@ -110,6 +110,7 @@ document.querySelector('#loginForm')?.addEventListener('submit', async (e) => {
 
   const session = {
     user_id: data.user_id,
+    token: data.token,
     email,
     loggedIn: true,
     remember: true,
@@ -207,6 +208,7 @@ document.querySelector('#loginForm')?.addEventListener('submit', async (e) => {
     // optional: auto login
     localStorage.setItem('sanctuary_session', JSON.stringify({
         user_id: data.user_id,
+        token: data.token,
         email,
         loggedIn: true,
         timestamp: new Date().toISOString()
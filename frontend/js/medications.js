@@ -198,7 +198,7 @@
     }
 
     try {
-      const response = await fetch(`${BACKEND_URL}/medications/${userId}`);
+      const response = await fetch(`${BACKEND_URL}/medications/${userId}`, { headers: window.BenjiAPI.authHeaders() });
       if (response.ok) {
         const data = await response.json();
         if (data.list && data.list.length > 0) {
@@ -261,7 +261,7 @@
     try {
       const response = await fetch(`${BACKEND_URL}/medications/${userId}`, {
         method: "PUT",
-        headers: { "Content-Type": "application/json" },
+        headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }),
         body: JSON.stringify({ list: medications })
       });
 
@@ -283,6 +283,33 @@
     }
   }
 
+  // Writes a single medication: POST (add), PATCH (edit) or DELETE
+  async function saveMedicationItem(method, id, fields) {
+    const userId = getUserId();
+    if (!userId) {
+      localStorage.setItem(getStorageKey(), JSON.stringify(medications));
+      return;
+    }
+
+    try {
+      const options = { method: method, headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }) };
+      if (fields) options.body = JSON.stringify(fields);
+      const response = await fetch(`${BACKEND_URL}/medications/${userId}/${encodeURIComponent(id)}`, options);
+
+      if (!response.ok) {
+        throw new Error(`API error: ${response.statusText}`);
+      }
+
+      localStorage.setItem(getStorageKey(), JSON.stringify(medications));
+      if (window.BenjiAPI && window.BenjiAPI.clearCachedAiSchedule) {
+        window.BenjiAPI.clearCachedAiSchedule(userId);
+      }
+    } catch (e) {
+      console.error("Error saving medication to API:", e);
+      localStorage.setItem(getStorageKey(), JSON.stringify(medications));
+    }
+  }
+
   // ---- CRUD Operations ----
   async function addMedication(med) {
     const newMed = {
@@ -294,7 +321,8 @@
       notes: med.notes ? med.notes.trim() : ""
     };
     medications.push(newMed);
-    await saveMedicationsToAPI();
+    const { id: newId, ...newFields } = newMed;
+    await saveMedicationItem("POST", newId, newFields);
     renderMedications();
     renderComplianceList();
     showMessage("Medication added successfully", "success");
@@ -311,7 +339,8 @@
         foodInstruction: med.foodInstruction || "no_preference",
         notes: med.notes ? med.notes.trim() : ""
       };
-      await saveMedicationsToAPI();
+      const { id: _id, ...fields } = medications[index];
+      await saveMedicationItem("PATCH", id, fields);
       renderMedications();
       renderComplianceList();
       showMessage("Medication updated successfully", "success");
@@ -331,7 +360,7 @@
 
     if (confirmed) {
       medications = medications.filter(m => m.id !== id);
-      await saveMedicationsToAPI();
+      await saveMedicationItem("DELETE", id);
       renderMedications();
       renderComplianceList();
       showMessage("Medication deleted", "info");
@@ -491,7 +520,7 @@
         url += "?use_ai=true";
       }
 
-      const response = await fetch(url);
+      const response = await fetch(url, { headers: window.BenjiAPI.authHeaders() });
 
       if (!response.ok) {
         throw new Error(`Failed to fetch schedule: ${response.statusText}`);
@@ -633,7 +662,9 @@
     if (complianceEmptyState) complianceEmptyState.style.display = "none";
 
     try {
-      const response = await fetch(`${BACKEND_URL}/compliance/${userId}?date=${date}`);
+      const response = await fetch(`${BACKEND_URL}/compliance/${userId}?date=${date}`, {
+        headers: window.BenjiAPI.authHeaders()
+      });
       if (response.ok) {
         const data = await response.json();
         // Build map of medication_id -> compliance entry
@@ -673,7 +704,7 @@
     try {
       const response = await fetch(`${BACKEND_URL}/compliance`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }),
         body: JSON.stringify({
           user_id: userId,
           date: currentComplianceDate,
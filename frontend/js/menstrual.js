@@ -80,7 +80,7 @@
     }
 
     try {
-      const response = await fetch(`${BACKEND_URL}/menstrual/${userId}`);
+      const response = await fetch(`${BACKEND_URL}/menstrual/${userId}`, { headers: window.BenjiAPI.authHeaders() });
       if (response.ok) {
         const data = await response.json();
         flowLog = data.entries || {};
@@ -98,7 +98,8 @@
     }
   }
 
-  async function saveFlowLog() {
+  // Saves one day (PATCH); an empty body clears the day on the server
+  async function saveFlowDay(dateStr) {
     const userId = getUserId();
     if (!userId) {
       console.error("Cannot save cycle data - no user ID");
@@ -107,10 +108,10 @@
     }
 
     try {
-      const response = await fetch(`${BACKEND_URL}/menstrual/${userId}`, {
-        method: "PUT",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ entries: flowLog })
+      const response = await fetch(`${BACKEND_URL}/menstrual/${userId}/${dateStr}`, {
+        method: "PATCH",
+        headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }),
+        body: JSON.stringify(flowLog[dateStr] || {})
       });
 
       if (!response.ok) {
@@ -423,7 +424,7 @@
       if (discharge) flowLog[editingDate].discharge = discharge;
     }
 
-    await saveFlowLog();
+    await saveFlowDay(editingDate);
     // Invalidate Benji recommendations cache when flow data changes
     clearBenjiCache();
     closeFlowEditor();
@@ -433,7 +434,7 @@
   async function deleteFlowEntry() {
     if (!editingDate) return;
     delete flowLog[editingDate];
-    await saveFlowLog();
+    await saveFlowDay(editingDate);
     // Invalidate Benji recommendations cache when flow data changes
     clearBenjiCache();
     closeFlowEditor();
@@ -703,7 +704,9 @@
     }
 
     try {
-      const response = await fetch(`${BACKEND_URL}/menstrual-recommendations/${userId}`);
+      const response = await fetch(`${BACKEND_URL}/menstrual-recommendations/${userId}?use_ai=true`, {
+        headers: window.BenjiAPI.authHeaders()
+      });
       
       if (!response.ok) {
         throw new Error(`API error: ${response.statusText}`);
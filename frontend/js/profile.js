@@ -339,7 +339,7 @@
       let userInitials = "U";
 
       try {
-        const userRes = await fetch(`${API_BASE}/user/${userId}`);
+        const userRes = await fetch(`${API_BASE}/user/${userId}`, { headers: window.BenjiAPI.authHeaders() });
         if (userRes.ok) {
           const userData = await userRes.json();
           const firstName = userData.first_name || "";
@@ -358,7 +358,7 @@
       }
 
       // Fetch profile data from backend for this specific user
-      const res = await fetch(`${API_BASE}/profileinfo/${userId}`);
+      const res = await fetch(`${API_BASE}/profileinfo/${userId}`, { headers: window.BenjiAPI.authHeaders() });
 
       let profileData = null;
       let onboarding = {};
@@ -593,7 +593,7 @@
     try {
       let res = await fetch(`${API_BASE}/profileinfo/${userId}`, {
         method: "PATCH",
-        headers: { "Content-Type": "application/json" },
+        headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }),
         body: JSON.stringify(payload)
       });
 
@@ -601,7 +601,7 @@
         console.log("Profile not found, creating new profile");
         res = await fetch(`${API_BASE}/profileinfo/${userId}`, {
           method: "POST",
-          headers: { "Content-Type": "application/json" },
+          headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }),
           body: JSON.stringify(payload)
         });
       }
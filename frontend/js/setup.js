@@ -209,9 +209,9 @@ async function fetchGoalsAndContinue() {
     try {
         var res = await fetch('http://localhost:8000/goals', {
             method: 'POST',
-            headers: {
+            headers: window.BenjiAPI.authHeaders({
                 'Content-Type': 'application/json'
-            },
+            }),
             body: JSON.stringify({
                 user_id: userId,
                 user_goal: finalGoal
@@ -256,7 +256,7 @@ async function startAnalysis() {
                     // Fallback: direct API call
                     var saveRes = await fetch('http://localhost:8000/goals/' + session.user_id + '/accepted', {
                         method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
+                        headers: window.BenjiAPI.authHeaders({ 'Content-Type': 'application/json' }),
                         body: JSON.stringify({ goals: smartGoals })
                     });
                     if (!saveRes.ok) throw new Error('Failed to save goals to database');
@@ -836,7 +836,7 @@ async function completeSetup() {
             // Try POST first (during onboarding, profile shouldn't exist yet)
             var res = await fetch(API_BASE + "/profileinfo/" + session.user_id, {
                 method: "POST",
-                headers: { "Content-Type": "application/json" },
+                headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }),
                 body: JSON.stringify(payload)
             });
 
@@ -845,7 +845,7 @@ async function completeSetup() {
                 console.log("Profile exists, updating with PATCH");
                 res = await fetch(API_BASE + "/profileinfo/" + session.user_id, {
                     method: "PATCH",
-                    headers: { "Content-Type": "application/json" },
+                    headers: window.BenjiAPI.authHeaders({ "Content-Type": "application/json" }),
                     body: JSON.stringify(payload)
                 });
             }
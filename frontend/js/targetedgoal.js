@@ -233,9 +233,9 @@
       
       const response = await fetch(`${API_BASE}/upcoming`, {
         method: "POST",
-        headers: {
+        headers: window.BenjiAPI.authHeaders({
           "Content-Type": "application/json"
-        },
+        }),
         body: JSON.stringify(requestBody)
       });
 
@@ -313,7 +313,7 @@
    */
   async function fetchProfileInfo(userId) {
     try {
-      const response = await fetch(`${API_BASE}/profileinfo/${userId}`);
+      const response = await fetch(`${API_BASE}/profileinfo/${userId}`, { headers: window.BenjiAPI.authHeaders() });
       if (!response.ok) {
         throw new Error(`Failed to fetch profile: ${response.statusText}`);
       }